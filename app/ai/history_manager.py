@@ -0,0 +1,139 @@
+"""
+Token-budgeted conversation history for the intent extraction call
+"""
+import os
+import re
+import html
+from typing import Dict, List
+
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+CARD_TITLE_PATTERN = re.compile(r"<h4>(.*?)</h4>", re.DOTALL)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the token count of text without a tokenizer
+
+    Hangul and other non-ASCII characters are close to one token each,
+    ASCII text is about four characters per token.
+
+    Args:
+        text: Input text
+
+    Returns:
+        int: Estimated token count
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text so its estimated token count fits the limit
+
+    Args:
+        text: Input text
+        max_tokens: Token limit
+
+    Returns:
+        str: Original text, or its head followed by an ellipsis
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + "…"
+
+
+def strip_rendered_html(content: str) -> str:
+    """
+    Reduce an assistant message rendered as HTML to plain text
+
+    Result cards from format_hospital_results are replaced by the list of
+    recommended hospital names; other markup is removed.
+
+    Args:
+        content: Assistant message content
+
+    Returns:
+        str: Plain text content
+    """
+    if "<" not in content:
+        return content
+
+    titles = CARD_TITLE_PATTERN.findall(content)
+    if titles:
+        names = ", ".join(html.unescape(TAG_PATTERN.sub("", t)).strip() for t in titles)
+        return f"[추천 결과] {names}"
+
+    text = html.unescape(TAG_PATTERN.sub(" ", content))
+    return " ".join(text.split())
+
+
+class HistoryManager:
+    """Builds the message list sent to the LLM within a token budget"""
+
+    def __init__(self, token_budget: int = None, max_message_tokens: int = None,
+                 summary_tokens: int = None):
+        """
+        Initialize history manager
+
+        Args:
+            token_budget: Token budget for conversation turns (system prompt excluded)
+            max_message_tokens: Token limit for a single message
+            summary_tokens: Token limit for the summary of dropped user turns
+        """
+        self.token_budget = token_budget or int(os.getenv("INTENT_HISTORY_TOKEN_BUDGET", "1500"))
+        self.max_message_tokens = max_message_tokens or int(os.getenv("INTENT_HISTORY_MESSAGE_TOKENS", "400"))
+        self.summary_tokens = summary_tokens or int(os.getenv("INTENT_HISTORY_SUMMARY_TOKENS", "200"))
+
+    def build_messages(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Build the LLM payload from the full conversation
+
+        Keeps the system prompt, strips rendered HTML from assistant turns and
+        keeps the newest turns that fit the budget. User input from dropped
+        turns is kept as a short summary so location and symptoms are not lost.
+
+        Args:
+            messages: Full conversation, system prompt first
+
+        Returns:
+            List[Dict[str, str]]: Messages to send
+        """
+        if not messages:
+            return []
+
+        system_prompt, turns = messages[0], messages[1:]
+
+        kept = []
+        used = 0
+        cut = 0
+        for i in range(len(turns) - 1, -1, -1):
+            turn = turns[i]
+            content = turn["content"]
+            if turn["role"] == "assistant":
+                content = strip_rendered_html(content)
+            content = truncate_to_tokens(content, self.max_message_tokens)
+            tokens = estimate_tokens(content)
+            # The newest message is always sent, whatever the budget
+            if kept and used + tokens > self.token_budget:
+                cut = i + 1
+                break
+            kept.append({"role": turn["role"], "content": content})
+            used += tokens
+        kept.reverse()
+
+        result = [system_prompt]
+        dropped_user_input = [t["content"] for t in turns[:cut] if t["role"] == "user"]
+        if dropped_user_input:
+            summary = truncate_to_tokens(" / ".join(dropped_user_input), self.summary_tokens)
+            result.append({"role": "system", "content": f"이전 대화의 사용자 입력 요약: {summary}"})
+        result.extend(kept)
+        return result
@@ -0,0 +1,263 @@
+"""
+Deterministic keyword matcher for intent extraction
+
+Builds its vocabulary from the fixed option lists in PromptManager.SYSTEM_PROMPT
+so that unambiguous requests can skip the LLM call entirely.
+"""
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.ai.prompt_manager import PromptManager
+from app.utils.metrics import INTENT_FAST_PATH_REQUESTS
+
+
+# Seoul districts whose names are unique nationwide (중구, 강서구 are not)
+SEOUL_DISTRICTS = (
+    "종로구", "용산구", "성동구", "광진구", "동대문구", "중랑구", "성북구", "강북구",
+    "도봉구", "노원구", "은평구", "서대문구", "마포구", "양천구", "구로구", "금천구",
+    "영등포구", "동작구", "관악구", "서초구", "강남구", "송파구", "강동구"
+)
+
+# District-like tokens: 2-4 syllables (or a single compass syllable) + 구/군/시,
+# standing alone or followed by a locative particle. Only candidates; a token is a
+# district only if it is in the matcher's district list (여섯시, 두시 are times)
+DISTRICT_PATTERN = re.compile(
+    r"(?<![가-힣])((?:[가-힣]{2,4}|[중동서남북])(?:구|군|시))(?=$|[^가-힣]|에|의|쪽|근처)"
+)
+
+# Long-form city names mapped to the prompt's city options
+CITY_ALIASES = {
+    "서울특별시": "서울", "서울시": "서울",
+    "부산광역시": "부산", "인천광역시": "인천", "대구광역시": "대구",
+    "광주광역시": "광주", "대전광역시": "대전", "울산광역시": "울산",
+    "경기도": "경기", "강원도": "강원", "제주도": "제주",
+    "충청북도": "충북", "충청남도": "충남", "전라북도": "전북", "전라남도": "전남",
+    "경상북도": "경북", "경상남도": "경남", "세종특별자치시": "세종시", "세종": "세종시",
+}
+
+# Hospital type rules from step 3 of the system prompt, most severe first
+HOSPITAL_TYPE_RULES = (
+    ("상급종합병원", ("생명위협", "중환자실", "뇌출혈", "심정지", "중증외상", "종양",
+                  "MRI", "ECMO", "감마나이프", "사이버나이프", "양성자")),
+    ("종합병원", ("고열", "장기손상", "내출혈", "폐렴", "급성호흡곤란", "호흡곤란",
+               "CT", "인공호흡기", "혈액투석")),
+    ("병원", ("복통", "요통", "두통", "일반외상", "초음파", "엑스선", "골밀도")),
+    ("의원", ("피부트러블", "비염", "소화불량", "일반상담", "감기")),
+)
+
+# Departments whose hospital type follows directly from the department
+DEPARTMENT_TYPE_DEFAULTS = {
+    "정신건강의학과": "정신병원",
+    "내과": "병원",
+    "정형외과": "병원",
+    "피부과": "의원",
+    "이비인후과": "의원",
+    "가정의학과": "의원",
+}
+DENTAL_DEPARTMENT_MARKERS = ("치과", "치의학과", "치주과", "구강")
+ORIENTAL_DEPARTMENT_MARKERS = ("한방", "침구과", "사상체질과")
+
+# Generic words that look like a hospital type but say nothing about it
+GENERIC_TYPE_WORDS = ("병원",)
+
+PREFERENCE_CUES = ("좋겠", "선호", "원해", "원합", "바랍", "가까", "저렴", "친절",
+                   "주차", "예약", "여성 의사", "여의사", "한적", "야간", "주말")
+
+
+def _compact(text: str) -> str:
+    """Remove whitespace so multi-word keywords match regardless of spacing"""
+    return re.sub(r"\s+", "", text)
+
+
+def _options_after(prompt: str, marker: str) -> List[str]:
+    """Parse the comma-separated option line that follows `marker` in the prompt"""
+    line = prompt.split(marker, 1)[1].strip().splitlines()[0]
+    line = line.replace(" 중 하나", "")
+    return [option.strip() for option in line.split(",") if option.strip()]
+
+
+def _find_longest(text: str, candidates: List[str]) -> List[str]:
+    """
+    Find candidates in text, preferring longer matches over their substrings
+
+    Args:
+        text: Compacted text to search
+        candidates: Candidate strings (compacted)
+
+    Returns:
+        List[str]: Matched candidates in order of length
+    """
+    found = []
+    for candidate in sorted(candidates, key=len, reverse=True):
+        if candidate and candidate in text:
+            found.append(candidate)
+            text = text.replace(candidate, "\0")
+    return found
+
+
+class IntentMatcher:
+    """Local rule/keyword matcher producing the intent JSON without an LLM call"""
+
+    def __init__(self, system_prompt: str = None, districts: Iterable[str] = None):
+        """
+        Initialize matcher from the system prompt option lists
+
+        Args:
+            system_prompt: Prompt text to parse (defaults to PromptManager.SYSTEM_PROMPT)
+            districts: Valid district names, e.g. the `district` table (defaults to
+                SEOUL_DISTRICTS; other districts are then left to the LLM)
+        """
+        prompt = system_prompt or PromptManager.get_system_prompt()["content"]
+        self.districts = set(districts or SEOUL_DISTRICTS)
+
+        self.cities = _options_after(prompt, "고정 선택지 중 하나에서 추출되어야 합니다:")
+        self.hospital_types = _options_after(prompt, "고려 대상 병원 종별:")
+        self.equipment = _options_after(prompt, "고정된 장비 목록 중 1개 이상을 고려합니다:")
+
+        section = prompt.split("4. 증상 키워드", 1)[1].split("\n5. ", 1)[0]
+        self.department_keywords: Dict[str, List[str]] = {}
+        for name, keywords in re.findall(r"- \*\*(.+?)\*\*: (.+)", section):
+            self.department_keywords[name] = [_compact(k) for k in keywords.split(",") if k.strip()]
+
+        # Equipment can be mentioned by its name or by the alias in parentheses
+        self.equipment_aliases: Dict[str, str] = {}
+        for name in self.equipment:
+            self.equipment_aliases[_compact(name).upper()] = name
+            alias = re.search(r"\((.+?)\)", name)
+            if alias:
+                self.equipment_aliases[_compact(alias.group(1)).upper()] = name
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of match() calls answered locally"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _match_location(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Extract (city, district); None for anything ambiguous"""
+        for alias, city in sorted(CITY_ALIASES.items(), key=lambda item: -len(item[0])):
+            text = text.replace(alias, f" {city} ")
+
+        districts = {
+            token for token in DISTRICT_PATTERN.findall(text)
+            if token in self.districts and token not in self.cities and token[:-1] not in self.cities
+        }
+        if len(districts) != 1:
+            return None, None
+
+        # A city name inside the district (대구 in 해운대구) is not a city mention
+        for token in districts:
+            text = text.replace(token, " ")
+        cities = _find_longest(_compact(text), self.cities)
+        cities = [c for c in self.cities if c in cities]
+        if len(cities) > 1:
+            return None, None
+
+        district = districts.pop()
+        if cities:
+            return cities[0], district
+        if district in SEOUL_DISTRICTS:
+            return "서울", district
+        return None, None
+
+    def _match_department(self, text: str) -> Tuple[Optional[str], List[str]]:
+        """Extract a single department and the symptom keywords that selected it"""
+        named = _find_longest(text, list(self.department_keywords))
+        if len(named) == 1:
+            return named[0], []
+        if len(named) > 1:
+            return None, []
+
+        scores: Dict[str, int] = {}
+        matched: Dict[str, List[str]] = {}
+        for department, keywords in self.department_keywords.items():
+            for keyword in keywords:
+                if keyword in text:
+                    scores[department] = scores.get(department, 0) + len(keyword)
+                    matched.setdefault(department, []).append(keyword)
+        if not scores:
+            return None, []
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return None, []
+        return ranked[0][0], matched[ranked[0][0]]
+
+    def _match_hospital_type(self, text: str, department: str) -> Optional[str]:
+        """Pick the hospital type from an explicit mention or the prompt's rules"""
+        explicit = [t for t in _find_longest(text, self.hospital_types)
+                    if t not in GENERIC_TYPE_WORDS]
+        if len(explicit) == 1:
+            return explicit[0]
+        if len(explicit) > 1:
+            return None
+
+        if any(marker in department for marker in DENTAL_DEPARTMENT_MARKERS):
+            return "치과의원"
+        if any(marker in department for marker in ORIENTAL_DEPARTMENT_MARKERS):
+            return "한의원"
+
+        upper = text.upper()
+        for hospital_type, keywords in HOSPITAL_TYPE_RULES:
+            if any(keyword.upper() in upper for keyword in keywords):
+                return hospital_type
+        return DEPARTMENT_TYPE_DEFAULTS.get(department)
+
+    def _match_equipment(self, text: str) -> Optional[str]:
+        """Extract the first equipment mentioned, if any"""
+        found = _find_longest(text.upper(), list(self.equipment_aliases))
+        return self.equipment_aliases[found[0]] if found else None
+
+    def _match_preference(self, user_text: str) -> str:
+        """Keep the clauses that express a preference, joined into one sentence"""
+        clauses = re.split(r"[.,!?\n]|그리고", user_text)
+        preferred = [c.strip() for c in clauses if any(cue in c for cue in PREFERENCE_CUES)]
+        return ", ".join(preferred)
+
+    def match(self, user_text: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Extract intent JSON from user text when every field is unambiguous
+
+        Args:
+            user_text: All user input of the conversation
+
+        Returns:
+            dict: Same fields as the LLM JSON output, or None when confidence is low
+        """
+        result = self._match(user_text)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        INTENT_FAST_PATH_REQUESTS.inc("miss" if result is None else "hit")
+        return result
+
+    def _match(self, user_text: str) -> Optional[Dict[str, Optional[str]]]:
+        city, district = self._match_location(user_text)
+        if not city:
+            return None
+
+        text = _compact(user_text)
+        department, symptoms = self._match_department(text)
+        if not department:
+            return None
+
+        hospital_type = self._match_hospital_type(text, department)
+        if not hospital_type:
+            return None
+
+        reason = f"{', '.join(symptoms)} 증상으로 " if symptoms else ""
+        return {
+            "city": city,
+            "district": district,
+            "hospital_type": hospital_type,
+            "department_name": department,
+            "equipment_name": self._match_equipment(text),
+            "preference": self._match_preference(user_text),
+            "explanation": f"{reason}{city} {district}의 {department} 진료가 가능한 {hospital_type}을 추천합니다."
+        }
@@ -2,9 +2,15 @@
 OpenAI client wrapper for hospital recommendation service
 """
 import os
+import json
 from typing import List, Dict, Any
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
 
 
 class OpenAIClient:
@@ -17,7 +23,9 @@ class OpenAIClient:
         if not api_key:
             raise ValueError("OPENAI_API_KEY is not set in the environment.")
         
-        self.client = OpenAI(api_key=api_key)
+        # OPENAI_BASE_URL points every client at a compatible server (e.g. benchmarks/fake_openai_server.py)
+        self.base_url = os.getenv("OPENAI_BASE_URL", DEFAULT_OPENAI_BASE_URL).rstrip("/")
+        self.client = OpenAI(api_key=api_key, base_url=self.base_url)
         self.model = "gpt-4o"
     
     def get_embedding(self, text: str) -> List[float]:
@@ -37,29 +45,57 @@ class OpenAIClient:
             )
             return response.data[0].embedding
         except Exception as e:
-            print(f"Error generating embedding: {str(e)}")
+            logger.error("Error generating embedding: %s", e)
             return []
-    
-    def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+
+    def get_embeddings(self, texts: List[str], batch_size: int = 256) -> List[List[float]]:
+        """
+        Get embeddings for many texts, sending batch_size inputs per request
+
+        Args:
+            texts: Texts to embed
+            batch_size: Number of inputs per embeddings request
+
+        Returns:
+            List[List[float]]: Embedding vectors in input order (empty on failure)
+        """
+        embeddings = []
+        try:
+            for start in range(0, len(texts), batch_size):
+                response = self.client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=texts[start:start + batch_size]
+                )
+                embeddings.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+            return embeddings
+        except Exception as e:
+            logger.error("Error generating embeddings: %s", e)
+            return []
+
+    def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.3,
+                        response_format: Dict[str, str] = None) -> str:
         """
         Get chat completion from OpenAI
         
         Args:
             messages: List of message dictionaries
             temperature: Temperature for response generation
+            response_format: Optional response format (e.g. {"type": "json_object"})
             
         Returns:
             str: Generated response
         """
         try:
+            kwargs = {"response_format": response_format} if response_format else {}
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                temperature=temperature
+                temperature=temperature,
+                **kwargs
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
-            print(f"Error in chat completion: {str(e)}")
+            logger.error("Error in chat completion: %s", e)
             return ""
     
     def analyze_with_rag(self, hospital_name: str, review_summary: str, user_query: str) -> str:
@@ -79,8 +115,38 @@ class OpenAIClient:
         prompt = PromptManager.get_rag_analysis_prompt(hospital_name, review_summary, user_query)
         
         messages = [
-            {"role": "system", "content": "당신은 의료 서비스 분석 전문가입니다. 리뷰 내용을 바탕으로 객관적이고 신뢰할 수 있는 분석을 제공해주세요."},
+            {"role": "system", "content": PromptManager.RAG_SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ]
         
-        return self.chat_completion(messages, temperature=0.3) 
\ No newline at end of file
+        return self.chat_completion(messages, temperature=0.3)
+    
+    def analyze_batch_with_rag(self, hospitals: List[Dict[str, str]], user_query: str) -> List[Dict[str, Any]]:
+        """
+        Perform RAG analysis for several hospitals in a single request
+        
+        Args:
+            hospitals: Hospitals with 'hospital_id', 'name' and 'review' keys
+            user_query: User's query/requirements
+            
+        Returns:
+            List[Dict[str, Any]]: Per-hospital analysis fields (empty on failure)
+        """
+        from app.ai.prompt_manager import PromptManager
+        
+        prompt = PromptManager.get_batch_rag_analysis_prompt(hospitals, user_query)
+        
+        messages = [
+            {"role": "system", "content": PromptManager.RAG_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        
+        reply = self.chat_completion(
+            messages, temperature=0.3, response_format={"type": "json_object"}
+        )
+        try:
+            analyses = json.loads(reply).get("hospitals", [])
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.error("Failed to parse batch RAG analysis: %s", e)
+            return []
+        return [a for a in analyses if isinstance(a, dict)] 
\ No newline at end of file
@@ -1,7 +1,8 @@
 """
 AI prompt management for hospital recommendation service
 """
-from typing import Dict, Any
+import json
+from typing import Dict, Any, List
 
 
 class PromptManager:
@@ -162,6 +163,8 @@ class PromptManager:
 """
     }
     
+    RAG_SYSTEM_PROMPT = "당신은 의료 서비스 분석 전문가입니다. 리뷰 내용을 바탕으로 객관적이고 신뢰할 수 있는 분석을 제공해주세요."
+    
     @classmethod
     def get_system_prompt(cls) -> Dict[str, Any]:
         """Get the system prompt for hospital recommendation"""
@@ -196,4 +199,48 @@ class PromptManager:
         5. 추천 점수: (1~5점)
         6. 추천 이유: (1~2문장으로, 왜 이 점수를 주었는지 명확히 기술)
         7. 주의사항: (있다면 간단히. 없으면 '없음')
-        """ 
\ No newline at end of file
+        """
+    
+    @classmethod
+    def get_batch_rag_analysis_prompt(cls, hospitals: List[Dict[str, str]], user_query: str) -> str:
+        """Get RAG analysis prompt evaluating several hospitals in one request"""
+        targets = json.dumps(
+            [
+                {"hospital_id": h["hospital_id"], "병원명": h["name"], "리뷰 요약": h["review"]}
+                for h in hospitals
+            ],
+            ensure_ascii=False, indent=2
+        )
+        return f"""
+        당신은 병원 추천 전문가입니다. 다음 병원들 각각에 대해 사용자의 요구에 맞는 정성적 분석을 수행해주세요.
+
+        [분석 대상]
+        {targets}
+
+        [사용자 요구사항]
+        {user_query}
+
+        [분석 지침]
+        - 병원마다 독립적으로, 해당 병원의 리뷰 요약만 근거로 분석
+        - 병원의 장점과 단점을 간결하게 요약
+        - 사용자 요구와 병원이 얼마나 잘 맞는지 판단
+        - 추천 여부는 반드시 **구체적인 이유**와 함께 작성
+        - 모든 내용은 **사실 기반**으로 명확하게 서술
+
+        [출력 형식]
+        다음 JSON 객체만 출력하세요. "hospitals" 배열에는 분석 대상의 모든 병원이 같은 순서로 포함되어야 합니다.
+        {{
+          "hospitals": [
+            {{
+              "hospital_id": "분석 대상의 hospital_id 그대로",
+              "summary": "병원 요약 (2~3줄로 핵심 정보 요약)",
+              "strengths": ["강점 (핵심만)"],
+              "weaknesses": ["약점 (핵심만)"],
+              "fit": "요구사항 적합성 (매우 높음 / 높음 / 보통 / 낮음 중 하나)",
+              "score": 추천 점수 (1~5 정수),
+              "reason": "추천 이유 (1~2문장으로, 왜 이 점수를 주었는지 명확히 기술)",
+              "cautions": "주의사항 (있다면 간단히. 없으면 '없음')"
+            }}
+          ]
+        }}
+        """
@@ -0,0 +1,186 @@
+"""
+Per-hospital review aspect scores for preference matching
+
+Aspect vectors (coverage and sentiment per review category) are computed
+offline from review_chunks by database/utils/generate_aspect_scores.py and
+stored in review_aspect_scores. At request time preference matching is a
+vectorized lookup over those vectors.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+
+# Categories from database/utils/chunking_prompt.SYSTEM_CHUNK_PROMPT, in storage order
+ASPECT_CATEGORIES = (
+    "검사/진료",
+    "전문성/친절도",
+    "예약/안내",
+    "환경/시설",
+    "교통/접근성",
+    "비용",
+    "만족/평가",
+    "기타",
+)
+ASPECT_INDEX = {category: i for i, category in enumerate(ASPECT_CATEGORIES)}
+
+POSITIVE_WORDS = (
+    "좋", "친절", "만족", "추천", "편리", "편하", "깨끗", "청결", "넓", "저렴", "합리",
+    "꼼꼼", "자세", "신속", "빠르", "빨리", "가깝", "가까", "쾌적", "정확", "재방문", "감사",
+)
+NEGATIVE_WORDS = (
+    "불친절", "불편", "불만", "별로", "비싸", "비쌌", "오래 걸", "오래걸", "기다", "대기가 길",
+    "좁", "협소", "부족", "미흡", "더럽", "불결", "아쉽", "아쉬", "실망", "늦", "과잉", "어렵",
+)
+POSITIVE_PATTERN = re.compile("|".join(map(re.escape, sorted(POSITIVE_WORDS, key=len, reverse=True))))
+NEGATIVE_PATTERN = re.compile("|".join(map(re.escape, sorted(NEGATIVE_WORDS, key=len, reverse=True))))
+
+# Negation only flips the sentiment word it attaches to: "안 좋", "친절하지 않", "불편한 점이 없"
+NEGATION_BEFORE = re.compile(r"(?:안|못)\s*$")
+NEGATION_AFTER = re.compile(r"지\s*(?:않|못|말)|없")
+NEGATION_WINDOW = 8  # characters after the word, within the same clause
+CLAUSE_BREAK = re.compile(r"[,.!?~]|고\s|[은는]데|지만|어서|아서")
+
+# Query keywords mapped to the aspects they express a preference for
+PREFERENCE_KEYWORDS = {
+    "교통/접근성": ("교통", "주차", "역세권", "역 근처", "역에서", "가까", "가깝", "접근", "위치", "버스", "지하철"),
+    "비용": ("비용", "저렴", "가격", "진료비", "비싸", "싼", "보험", "실비"),
+    "전문성/친절도": ("친절", "상냥", "전문", "꼼꼼", "의사", "실력"),
+    "예약/안내": ("예약", "대기", "접수", "기다", "안내", "빨리"),
+    "환경/시설": ("깨끗", "청결", "시설", "쾌적", "넓", "조용", "한적"),
+    "검사/진료": ("검사", "장비"),
+}
+# "선호사항: ...\n추가 설명: ..." analysis query built in routes.py; only the first part is the user's
+PREFERENCE_SECTION_PATTERN = re.compile(r"선호사항\s*:(.*?)(?:추가 설명\s*:|$)", re.DOTALL)
+PREFERENCE_PATTERNS = {
+    category: re.compile("|".join(map(re.escape, keywords)))
+    for category, keywords in PREFERENCE_KEYWORDS.items()
+}
+
+
+def _is_negated(text: str, start: int, end: int) -> bool:
+    """Whether the sentiment word at text[start:end] is directly negated"""
+    if NEGATION_BEFORE.search(text[max(0, start - 3):start]):
+        return True
+    window = text[end:end + NEGATION_WINDOW]
+    clause_end = CLAUSE_BREAK.search(window)
+    if clause_end:
+        window = window[:clause_end.start()]
+    return NEGATION_AFTER.search(window) is not None
+
+
+def sentence_sentiment(text: str) -> float:
+    """
+    Lexicon-based sentiment of a review sentence
+
+    Args:
+        text: Review sentence
+
+    Returns:
+        float: Sentiment in [-1, 1]
+    """
+    negative_hits = [(m.start(), m.end()) for m in NEGATIVE_PATTERN.finditer(text)]
+    # "불친절" also contains "친절"; count positives only outside negative words
+    stripped = NEGATIVE_PATTERN.sub(lambda m: " " * len(m.group(0)), text)
+    positive_hits = [(m.start(), m.end()) for m in POSITIVE_PATTERN.finditer(stripped)]
+
+    positive = negative = 0
+    for hits, is_positive in ((positive_hits, True), (negative_hits, False)):
+        for start, end in hits:
+            if is_positive != _is_negated(text, start, end):
+                positive += 1
+            else:
+                negative += 1
+    total = positive + negative
+    return (positive - negative) / total if total else 0.0
+
+
+def compute_aspect_vector(chunks: Iterable[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Compute coverage and mean sentiment per aspect for one hospital
+
+    Args:
+        chunks: (category, chunk_text) pairs from review_chunks
+
+    Returns:
+        tuple: (coverage, sentiment, chunk_count), vectors ordered as ASPECT_CATEGORIES
+    """
+    counts = np.zeros(len(ASPECT_CATEGORIES), dtype=np.float32)
+    sentiment_sums = np.zeros(len(ASPECT_CATEGORIES), dtype=np.float32)
+
+    for category, text in chunks:
+        idx = ASPECT_INDEX.get(category, ASPECT_INDEX["기타"])
+        counts[idx] += 1
+        sentiment_sums[idx] += sentence_sentiment(text)
+
+    total = int(counts.sum())
+    coverage = counts / total if total else counts
+    sentiment = np.divide(sentiment_sums, counts, out=np.zeros_like(counts), where=counts > 0)
+    return coverage, sentiment, total
+
+
+def preference_weights(query: str) -> Optional[np.ndarray]:
+    """
+    Turn the user's preference text into aspect weights
+
+    Args:
+        query: Preference text
+
+    Returns:
+        np.ndarray: Weights summing to 1 (ordered as ASPECT_CATEGORIES), or None
+        when no aspect is mentioned
+    """
+    weights = np.zeros(len(ASPECT_CATEGORIES), dtype=np.float32)
+    for category, pattern in PREFERENCE_PATTERNS.items():
+        weights[ASPECT_INDEX[category]] = len(pattern.findall(query))
+    total = weights.sum()
+    return weights / total if total else None
+
+
+def preference_text(query: str) -> str:
+    """
+    The user's own preference from an analysis query, without the LLM explanation
+
+    Args:
+        query: Analysis query ("선호사항: ...\n추가 설명: ...") or plain preference text
+
+    Returns:
+        str: Preference text
+    """
+    match = PREFERENCE_SECTION_PATTERN.search(query)
+    return match.group(1).strip() if match else query
+
+
+def aspect_match_scores(weights: np.ndarray, coverage: np.ndarray,
+                        sentiment: np.ndarray) -> np.ndarray:
+    """
+    Score hospitals against preference weights
+
+    A hospital scores high on an aspect when reviews talk about it
+    (coverage) and talk about it positively (sentiment).
+
+    Args:
+        weights: Aspect weights, shape (A,)
+        coverage: Coverage matrix, shape (N, A)
+        sentiment: Sentiment matrix, shape (N, A)
+
+    Returns:
+        np.ndarray: Scores in [-1, 1], shape (N,)
+    """
+    return (sentiment * np.sqrt(coverage)) @ weights
+
+
+def aspect_rows_to_matrices(rows: List[Dict]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Stack review_aspect_scores rows into matrices
+
+    Args:
+        rows: Rows with hospital_id, coverage and sentiment columns
+
+    Returns:
+        tuple: (hospital_ids, coverage matrix, sentiment matrix)
+    """
+    ids = [str(row['hospital_id']) for row in rows]
+    coverage = np.asarray([row['coverage'] for row in rows], dtype=np.float32)
+    sentiment = np.asarray([row['sentiment'] for row in rows], dtype=np.float32)
+    return ids, coverage, sentiment
@@ -5,6 +5,7 @@ from typing import List, Dict, Any
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 from app.utils.database import get_database_connection
+from app.utils.metrics import time_stage
 
 
 class HospitalSearchEngine:
@@ -18,6 +19,28 @@ class HospitalSearchEngine:
             engine: SQLAlchemy engine instance (optional)
         """
         self.engine = engine or get_database_connection()
+        self._columns = {}
+    
+    def _has_column(self, table_name: str, column_name: str) -> bool:
+        """Check once whether a table has a column (schemas differ between deployments)"""
+        key = (table_name, column_name)
+        if key not in self._columns:
+            with self.engine.connect() as conn:
+                self._columns[key] = conn.execute(text("""
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = :table_name AND column_name = :column_name
+                """), {"table_name": table_name, "column_name": column_name}).first() is not None
+        return self._columns[key]
+    
+    def _review_summaries_has_normalized_flag(self) -> bool:
+        """Check once whether review_summaries has the embedding_normalized column"""
+        return self._has_column("review_summaries", "embedding_normalized")
+    
+    def _not_deleted(self, alias: str, table_name: str) -> str:
+        """Filter out rows soft-deleted by a delta refresh, if the table has been refreshed that way"""
+        if self._has_column(table_name, "deleted_at"):
+            return f"AND {alias}.deleted_at IS NULL"
+        return ""
     
     def search_hospitals(self, city_name: str, district_name: str, 
                         hospital_type_name: str, department_name: str, 
@@ -35,7 +58,7 @@ class HospitalSearchEngine:
         Returns:
             List[Dict[str, Any]]: List of hospital information
         """
-        query = text("""
+        query = text(f"""
             SELECT h.name, h.address, h.tel, h.url, h.id
             FROM hospitals h
             JOIN city c ON h.city_code = c.code
@@ -47,10 +70,12 @@ class HospitalSearchEngine:
               AND d.name = :district
               AND ht.name = :hospital_type
               AND dp.department_name = :department
+              {self._not_deleted("h", "hospitals")}
+              {self._not_deleted("hd", "hospital_departments")}
             LIMIT :limit
         """)
 
-        with self.engine.connect() as conn:
+        with time_stage("search_hospitals"), self.engine.connect() as conn:
             result = conn.execute(query, {
                 "city": city_name,
                 "district": district_name,
@@ -73,18 +98,55 @@ class HospitalSearchEngine:
         if not hospital_ids:
             return []
             
-        query = text("""
+        # Tables created before the flag existed hold unnormalized vectors
+        normalized = ("rs.embedding_normalized" if self._review_summaries_has_normalized_flag()
+                      else "false")
+        query = text(f"""
             SELECT rs.hospital_id as hospital_id, h.name as name, 
-                   rs.review as review, rs.embedding as embedding
+                   rs.review as review, rs.embedding as embedding,
+                   {normalized} as embedding_normalized
             FROM review_summaries rs
             JOIN hospitals h ON rs.hospital_id = h.id
             WHERE rs.hospital_id IN :hospital_ids
         """)
 
-        with self.engine.connect() as conn:
+        with time_stage("get_hospital_reviews"), self.engine.connect() as conn:
+            result = conn.execute(query, {"hospital_ids": tuple(hospital_ids)})
+            return result.mappings().all()
+    
+    def get_aspect_scores(self, hospital_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get precomputed review aspect vectors
+        
+        Args:
+            hospital_ids: List of hospital IDs
+            
+        Returns:
+            List[Dict[str, Any]]: Rows with hospital_id, coverage and sentiment
+        """
+        if not hospital_ids:
+            return []
+            
+        query = text("""
+            SELECT hospital_id, coverage, sentiment
+            FROM review_aspect_scores
+            WHERE hospital_id IN :hospital_ids
+        """)
+
+        with time_stage("get_aspect_scores"), self.engine.connect() as conn:
             result = conn.execute(query, {"hospital_ids": tuple(hospital_ids)})
             return result.mappings().all()
     
+    def get_district_names(self) -> List[str]:
+        """
+        Get all district names (validates district mentions in user input)
+        
+        Returns:
+            List[str]: District names
+        """
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(text("SELECT DISTINCT name FROM district"))]
+    
     def search_by_location_only(self, city_name: str, district_name: str, 
                                limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -98,13 +160,14 @@ class HospitalSearchEngine:
         Returns:
             List[Dict[str, Any]]: List of hospital information
         """
-        query = text("""
+        query = text(f"""
             SELECT h.name, h.address, h.tel, h.url, h.id
             FROM hospitals h
             JOIN city c ON h.city_code = c.code
             JOIN district d ON h.district_code = d.code
             WHERE c.name = :city
               AND d.name = :district
+              {self._not_deleted("h", "hospitals")}
             LIMIT :limit
         """)
 
@@ -0,0 +1,181 @@
+"""
+In-memory BM25 index over review summaries using Korean character n-grams
+"""
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Hangul runs are split into character n-grams (no morphological analyzer
+# needed); Latin/digit runs such as "MRI" or "CT" stay whole words
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[가-힣]+")
+# Labels of the analysis query built in routes.py, not user terms
+QUERY_LABEL_PATTERN = re.compile(r"(선호사항|추가 설명)\s*:")
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """
+    Split text into lexical terms
+
+    Args:
+        text: Input text
+        n: Character n-gram length for Hangul runs
+
+    Returns:
+        List[str]: Terms (with repeats)
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text or "").lower()):
+        if token.isascii() or len(token) <= n:
+            terms.append(token)
+        else:
+            terms.extend(token[i:i + n] for i in range(len(token) - n + 1))
+    return terms
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index with precomputed per-posting weights
+
+    Postings are stored CSR-style (term offsets into flat document/weight
+    arrays), and each posting already holds its full BM25 contribution, so a
+    query is a handful of slice-and-add operations over numpy arrays.
+    """
+
+    def __init__(self, n: int = 2, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize lexical index
+
+        Args:
+            n: Character n-gram length
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.n = n
+        self.k1 = k1
+        self.b = b
+        self.ids = np.empty(0, dtype=object)
+        self.vocabulary: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype='int64')
+        self.postings = np.empty(0, dtype='int32')
+        self.weights = np.empty(0, dtype='float32')
+        self._position_of: Dict[str, int] = {}
+
+    def build(self, documents: Iterable[Tuple[Any, str]]) -> "LexicalIndex":
+        """
+        Build the index
+
+        Args:
+            documents: (hospital_id, review text) pairs
+
+        Returns:
+            LexicalIndex: self
+        """
+        start = time.perf_counter()
+        ids, term_counts = [], []
+        for hospital_id, review in documents:
+            ids.append(str(hospital_id))
+            term_counts.append(Counter(char_ngrams(review, self.n)))
+
+        doc_lengths = np.array([sum(counts.values()) for counts in term_counts], dtype='float32')
+        avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((position, tf))
+
+        self.vocabulary = {term: i for i, term in enumerate(postings)}
+        sizes = np.array([len(p) for p in postings.values()], dtype='int64')
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype('int64')
+        flat = np.array([entry for p in postings.values() for entry in p], dtype='int64').reshape(-1, 2)
+        self.postings = flat[:, 0].astype('int32')
+        tf = flat[:, 1].astype('float32')
+
+        # Okapi BM25 with the non-negative idf variant
+        df = np.repeat(sizes, sizes).astype('float32')
+        idf = np.log1p((len(ids) - df + 0.5) / (df + 0.5))
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths[self.postings] / max(avg_length, 1e-9))
+        self.weights = (idf * tf * (self.k1 + 1) / (tf + length_norm)).astype('float32')
+
+        self.ids = np.array(ids, dtype=object)
+        self._position_of = {hospital_id: i for i, hospital_id in enumerate(ids)}
+        logger.info("Built lexical index: %d documents, %d terms, %d postings in %.1fs",
+                    len(ids), len(self.vocabulary), len(self.postings), time.perf_counter() - start)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, hospital_id: Any) -> bool:
+        return str(hospital_id) in self._position_of
+
+    def query_terms(self, query: str) -> Counter:
+        """Terms of a query, with the analysis-query labels removed"""
+        return Counter(char_ngrams(QUERY_LABEL_PATTERN.sub(" ", query or ""), self.n))
+
+    def score(self, query: str, candidate_ids: Optional[Sequence[Any]] = None) -> Tuple[np.ndarray, List[str]]:
+        """
+        BM25 scores for a query
+
+        Args:
+            query: Query text
+            candidate_ids: Hospital IDs to score (None scores every document;
+                           IDs not in the index are dropped)
+
+        Returns:
+            Tuple[np.ndarray, List[str]]: Scores and the hospital IDs they belong to
+        """
+        scores = np.zeros(len(self.ids), dtype='float32')
+        for term, count in self.query_terms(query).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Each document appears once per term, so plain fancy-index add is safe
+            scores[self.postings[start:end]] += count * self.weights[start:end]
+
+        if candidate_ids is None:
+            return scores, list(self.ids)
+        positions = [self._position_of[str(i)] for i in candidate_ids if str(i) in self._position_of]
+        return scores[positions], [self.ids[p] for p in positions]
+
+    def save(self, path: str) -> None:
+        """
+        Save the index to a single .npz file
+
+        Args:
+            path: Output file path
+        """
+        terms = np.array(list(self.vocabulary), dtype=str)
+        np.savez(path, ids=self.ids.astype(str), terms=terms, offsets=self.offsets,
+                 postings=self.postings, weights=self.weights,
+                 params=np.array([self.n, self.k1, self.b], dtype='float64'))
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """
+        Load an index saved with save()
+
+        Args:
+            path: .npz file path
+
+        Returns:
+            LexicalIndex: Loaded index
+        """
+        data = np.load(path)
+        n, k1, b = data["params"]
+        lexical_index = cls(int(n), float(k1), float(b))
+        lexical_index.ids = np.array(data["ids"].tolist(), dtype=object)
+        lexical_index.vocabulary = {term: i for i, term in enumerate(data["terms"].tolist())}
+        lexical_index.offsets = data["offsets"]
+        lexical_index.postings = data["postings"]
+        lexical_index.weights = data["weights"]
+        lexical_index._position_of = {hospital_id: i for i, hospital_id in enumerate(lexical_index.ids)}
+        logger.info("Loaded lexical index with %d documents from %s", len(lexical_index), path)
+        return lexical_index
@@ -1,28 +1,49 @@
 """
 RAG (Retrieval-Augmented Generation) analysis for hospital recommendation
 """
+import os
 import time
 from typing import List, Dict, Any
+import numpy as np
 from app.ai.openai_client import OpenAIClient
 from app.core.hospital_search import HospitalSearchEngine
 from app.core.similarity_calculator import SimilarityCalculator
+from app.core.aspect_scores import (
+    preference_weights, preference_text, aspect_match_scores, aspect_rows_to_matrices
+)
+from app.utils.metrics import time_stage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class RAGAnalyzer:
     """RAG analyzer for hospital recommendation service"""
     
     def __init__(self, openai_client: OpenAIClient = None, 
-                 search_engine: HospitalSearchEngine = None):
+                 search_engine: HospitalSearchEngine = None,
+                 batch_analysis: bool = False, vector_index=None,
+                 rerank_candidates: int = 0, lexical_index=None):
         """
         Initialize RAG analyzer
         
         Args:
             openai_client: OpenAI client instance (optional)
             search_engine: Hospital search engine instance (optional)
+            batch_analysis: Analyze all top hospitals in a single LLM call
+            vector_index: Prebuilt VectorIndex passed to the similarity calculator (optional)
+            rerank_candidates: Two-stage similarity re-rank depth (0 keeps exact search)
+            lexical_index: LexicalIndex for hybrid BM25 + dense ranking (optional)
         """
         self.openai_client = openai_client or OpenAIClient()
         self.search_engine = search_engine or HospitalSearchEngine()
-        self.similarity_calculator = SimilarityCalculator(openai_client)
+        self.similarity_calculator = SimilarityCalculator(
+            openai_client, vector_index, rerank_candidates=rerank_candidates,
+            coarse_dims=int(os.getenv("SIMILARITY_COARSE_DIMS", "256")),
+            lexical_index=lexical_index
+        )
+        self.batch_analysis = batch_analysis
+        self.aspect_weight = float(os.getenv("ASPECT_RERANK_WEIGHT", "0.1"))
     
     def perform_rag_analysis(self, hospital_info: Dict[str, Any], 
                            query: str) -> Dict[str, Any]:
@@ -40,9 +61,10 @@ class RAGAnalyzer:
         review_summary = hospital_info['review']
         
         try:
-            analysis = self.openai_client.analyze_with_rag(
-                hospital_name, review_summary, query
-            )
+            with time_stage("analyze_with_rag"):
+                analysis = self.openai_client.analyze_with_rag(
+                    hospital_name, review_summary, query
+                )
             
             return {
                 'hospital_name': hospital_name,
@@ -50,14 +72,112 @@ class RAGAnalyzer:
             }
             
         except Exception as e:
-            print(f"Error in RAG analysis for {hospital_name}: {str(e)}")
+            logger.error("Error in RAG analysis for %s: %s", hospital_name, e)
             return {
                 'hospital_name': hospital_name,
                 'analysis': "분석 중 오류가 발생했습니다."
             }
     
+    def perform_batch_rag_analysis(self, hospital_infos: List[Dict[str, Any]], 
+                                   query: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Perform RAG analysis for several hospitals in one LLM call
+        
+        Args:
+            hospital_infos: Hospital information with review
+            query: User query
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Analysis fields keyed by hospital ID
+            (hospitals missing from the reply are left out)
+        """
+        try:
+            with time_stage("analyze_with_rag_batch"):
+                analyses = self.openai_client.analyze_batch_with_rag(hospital_infos, query)
+        except Exception as e:
+            logger.error("Error in batch RAG analysis: %s", e)
+            return {}
+        
+        requested_ids = [str(h['hospital_id']) for h in hospital_infos]
+        by_id = {str(a.get('hospital_id')): a for a in analyses}
+        # Fall back to position when the model did not echo the IDs back
+        if not any(hospital_id in by_id for hospital_id in requested_ids) \
+                and len(analyses) == len(requested_ids):
+            by_id = dict(zip(requested_ids, analyses))
+        return {hospital_id: by_id[hospital_id] for hospital_id in requested_ids if hospital_id in by_id}
+    
+    @staticmethod
+    def format_analysis_fields(fields: Dict[str, Any]) -> str:
+        """
+        Render structured analysis fields in the single-hospital text format
+        
+        Args:
+            fields: Analysis fields from the batch analysis
+            
+        Returns:
+            str: Analysis text
+        """
+        def bullets(items):
+            if isinstance(items, str):
+                items = [items]
+            return "\n".join(f"• {item}" for item in items or []) or "• 없음"
+        
+        return "\n".join([
+            f"1. 병원 요약: {fields.get('summary', '')}",
+            f"2. 강점:\n{bullets(fields.get('strengths'))}",
+            f"3. 약점:\n{bullets(fields.get('weaknesses'))}",
+            f"4. 요구사항 적합성: {fields.get('fit', '')}",
+            f"5. 추천 점수: {fields.get('score', '')}",
+            f"6. 추천 이유: {fields.get('reason', '')}",
+            f"7. 주의사항: {fields.get('cautions') or '없음'}",
+        ])
+    
+    def apply_aspect_preferences(self, similarity_results: List[Dict[str, Any]],
+                                 preference: str) -> List[Dict[str, Any]]:
+        """
+        Re-rank similarity results with precomputed review aspect scores
+        
+        Args:
+            similarity_results: Results from SimilarityCalculator
+            preference: The user's preference text (not the LLM explanation,
+                whose wording would add aspects the user never asked for)
+            
+        Returns:
+            List[Dict[str, Any]]: Results ordered by similarity (hybrid score when
+            present) plus weighted aspect score, with 'aspect_score' set where available
+        """
+        weights = preference_weights(preference or "")
+        if weights is None or not self.aspect_weight or not similarity_results:
+            return similarity_results
+        
+        try:
+            rows = self.search_engine.get_aspect_scores(
+                [r['hospital_id'] for r in similarity_results]
+            )
+        except Exception as e:
+            logger.warning("Aspect scores unavailable: %s", e)
+            return similarity_results
+        if not rows:
+            return similarity_results
+        
+        ids, coverage, sentiment = aspect_rows_to_matrices(rows)
+        scores = dict(zip(ids, aspect_match_scores(weights, coverage, sentiment)))
+        
+        reranked = []
+        for result in similarity_results:
+            score = scores.get(result['hospital_id'])
+            if score is not None:
+                result = {**result, 'aspect_score': round(float(score), 4)}
+            reranked.append(result)
+        combined = np.array([
+            r.get('hybrid_score', r['similarity']) + self.aspect_weight * r.get('aspect_score', 0.0)
+            for r in reranked
+        ])
+        return [reranked[i] for i in np.argsort(-combined, kind='stable')]
+    
     def analyze_hospitals(self, hospitals: List[Dict[str, Any]], 
-                         query: str, max_analysis: int = 3) -> List[Dict[str, Any]]:
+                         query: str, max_analysis: int = 3,
+                         preference: str = None) -> List[Dict[str, Any]]:
         """
         Analyze multiple hospitals using RAG
         
@@ -65,71 +185,93 @@ class RAGAnalyzer:
             hospitals: List of hospital information
             query: User query
             max_analysis: Maximum number of hospitals to analyze
+            preference: User preference for aspect re-ranking (defaults to
+                the 선호사항 part of query)
             
         Returns:
             List[Dict[str, Any]]: Analysis results
         """
-        print(f"\n=== 병원 분석 시작 ===")
-        print(f"검색된 병원 수: {len(hospitals)}")
+        logger.info("=== 병원 분석 시작 === 검색된 병원 수: %d", len(hospitals))
         
         if not hospitals:
-            print("분석할 병원이 없습니다.")
+            logger.info("분석할 병원이 없습니다.")
             return []
         
         # Get hospital reviews for similarity calculation
         hospital_ids = [h['id'] for h in hospitals]
-        print(f"\n1. 병원 리뷰 요약 데이터 조회 중...")
+        logger.debug("1. 병원 리뷰 요약 데이터 조회 중...")
         
         hospital_reviews = self.search_engine.get_hospital_reviews(hospital_ids)
         if not hospital_reviews:
-            print("리뷰 요약 데이터가 없습니다.")
+            logger.info("리뷰 요약 데이터가 없습니다.")
             return []
         
-        print(f"리뷰 요약 데이터 조회 완료: {len(hospital_reviews)}개")
+        logger.debug("리뷰 요약 데이터 조회 완료: %d개", len(hospital_reviews))
         
         # Calculate similarity
-        print(f"\n2. 유사도 계산 중...")
+        logger.debug("2. 유사도 계산 중...")
         similarity_results = self.similarity_calculator.calculate_similarity(
             query, hospital_reviews, top_k=len(hospital_reviews)
         )
-        print("유사도 계산 완료")
+        if preference is None:
+            preference = preference_text(query)
+        similarity_results = self.apply_aspect_preferences(similarity_results, preference)
+        logger.debug("유사도 계산 완료")
         
         # Perform RAG analysis on top hospitals
-        print(f"\n3. 상위 {max_analysis}개 병원 RAG 분석 시작...")
+        logger.debug("3. 상위 %d개 병원 RAG 분석 시작...", max_analysis)
         results = []
         
-        for i, sim_result in enumerate(similarity_results[:max_analysis]):
-            hospital_name = sim_result['name']
-            print(f"\n{i+1}순위 병원 분석 중: {hospital_name}")
-            
-            # Find original hospital info
+        # Pair top similarity results with original hospital info
+        candidates = []
+        for sim_result in similarity_results[:max_analysis]:
             original_hospital = next(
                 (h for h in hospitals if str(h['id']) == sim_result['hospital_id']), 
                 None
             )
             if not original_hospital:
-                print(f"원본 병원 정보를 찾을 수 없음: {sim_result['hospital_id']}")
+                logger.warning("원본 병원 정보를 찾을 수 없음: %s", sim_result['hospital_id'])
                 continue
+            candidates.append((sim_result, original_hospital))
+        
+        batch_fields = {}
+        if self.batch_analysis and candidates:
+            logger.debug("- 일괄 RAG 분석 수행 중 (%d개 병원)...", len(candidates))
+            batch_fields = self.perform_batch_rag_analysis(
+                [sim_result for sim_result, _ in candidates], query
+            )
+        
+        for i, (sim_result, original_hospital) in enumerate(candidates):
+            hospital_name = sim_result['name']
+            logger.debug("%d순위 병원 분석 중: %s", i + 1, hospital_name)
             
-            # Perform RAG analysis
-            print(f"- RAG 분석 수행 중...")
-            rag_analysis = self.perform_rag_analysis(sim_result, query)
+            fields = batch_fields.get(sim_result['hospital_id'])
+            if fields is not None:
+                analysis = self.format_analysis_fields(fields)
+            else:
+                # Perform RAG analysis
+                logger.debug("- RAG 분석 수행 중...")
+                analysis = self.perform_rag_analysis(sim_result, query)['analysis']
             
             # Combine results
             result = {
                 **original_hospital,
                 'similarity': sim_result['similarity'],
-                'rag_analysis': rag_analysis['analysis']
+                'rag_analysis': analysis
             }
+            for key in ('aspect_score', 'lexical_score', 'hybrid_score'):
+                if key in sim_result:
+                    result[key] = sim_result[key]
+            if fields is not None:
+                result['rag_fields'] = fields
             results.append(result)
-            print(f"- 분석 완료 (유사도: {result['similarity']})")
+            logger.debug("- 분석 완료 (유사도: %s)", result['similarity'])
             
-            # Rate limiting
-            if i < max_analysis - 1:
+            # Rate limiting between individual analysis calls
+            if fields is None and i < len(candidates) - 1:
                 time.sleep(2)
         
-        print(f"\n=== 병원 분석 완료 ===")
-        print(f"분석된 병원 수: {len(results)}")
+        logger.info("=== 병원 분석 완료 === 분석된 병원 수: %d", len(results))
         return results
     
     def analyze_with_similarity_and_rag(self, query: str, 
@@ -156,7 +298,7 @@ class RAGAnalyzer:
         )
         
         if not hospitals:
-            print("검색된 병원이 없습니다.")
+            logger.info("검색된 병원이 없습니다.")
             return []
         
         # Step 2: Analyze with RAG
@@ -3,21 +3,55 @@ Similarity calculation functionality for hospital recommendation
 """
 import numpy as np
 import faiss
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 from app.ai.openai_client import OpenAIClient
+from app.utils.metrics import time_stage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2 normalize each row of a float32 matrix (zero rows are left as is)
+    
+    Args:
+        matrix: Array of shape (n, dimension)
+        
+    Returns:
+        np.ndarray: Normalized float32 array
+    """
+    matrix = np.asarray(matrix, dtype='float32')
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
 
 
 class SimilarityCalculator:
     """Calculate similarity between user queries and hospital reviews"""
     
-    def __init__(self, openai_client: OpenAIClient = None):
+    def __init__(self, openai_client: OpenAIClient = None, vector_index=None,
+                 rerank_candidates: int = 0, coarse_dims: int = 256,
+                 lexical_index=None, fusion_k: int = 60):
         """
         Initialize similarity calculator
         
         Args:
             openai_client: OpenAI client instance (optional)
+            vector_index: Prebuilt app.core.vector_index.VectorIndex (optional); hospitals
+                          it covers are scored from it instead of their row embeddings
+            rerank_candidates: Two-stage mode for row embeddings: scan with the first
+                               coarse_dims components, re-rank this many exactly (0 disables)
+            coarse_dims: Prefix length used by the coarse scan
+            lexical_index: app.core.lexical_index.LexicalIndex for hybrid ranking (optional)
+            fusion_k: Reciprocal rank fusion constant
         """
         self.openai_client = openai_client or OpenAIClient()
+        self.vector_index = vector_index
+        self.rerank_candidates = rerank_candidates
+        self.coarse_dims = coarse_dims
+        self.lexical_index = lexical_index
+        self.fusion_k = fusion_k
     
     def normalize_vector(self, vec: np.ndarray) -> np.ndarray:
         """
@@ -50,6 +84,143 @@ class SimilarityCalculator:
             # Already a list or array
             return list(raw_embedding)
     
+    def embedding_matrix(self, hospital_reviews: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[Dict[str, str]]]:
+        """
+        Stack review embeddings into a unit-norm float32 matrix
+        
+        Rows flagged 'embedding_normalized' were normalized at write time
+        and are used as stored; only unflagged rows are normalized here.
+        
+        Args:
+            hospital_reviews: List of hospital review data
+            
+        Returns:
+            Tuple[np.ndarray, List[Dict[str, str]]]: Matrix of shape (n, dimension)
+            (empty if no valid embeddings) and metadata aligned with its rows
+        """
+        try:
+            matrix = self._parse_embeddings_batch([review['embedding'] for review in hospital_reviews])
+            valid_reviews = hospital_reviews
+        except (ValueError, TypeError):
+            # Malformed or ragged rows: parse one by one and skip the bad ones
+            parsed = []
+            for review in hospital_reviews:
+                try:
+                    parsed.append((np.asarray(self.parse_embedding(review['embedding']), dtype='float32'), review))
+                except Exception as e:
+                    logger.warning("Error parsing embedding for hospital_id %s: %s", review['hospital_id'], e)
+            # Keep the majority dimension; truncated rows are dropped
+            dimensions = Counter(row.shape for row, _ in parsed)
+            dimension = dimensions.most_common(1)[0][0] if dimensions else None
+            for row, review in parsed:
+                if row.shape != dimension:
+                    logger.warning("Skipping embedding with shape %s for hospital_id %s", row.shape, review['hospital_id'])
+            parsed = [(row, review) for row, review in parsed if row.shape == dimension]
+            valid_reviews = [review for _, review in parsed]
+            matrix = np.vstack([row for row, _ in parsed]) if parsed else np.empty((0, 0), dtype='float32')
+        
+        if len(matrix):
+            unnormalized = np.array([not review.get('embedding_normalized') for review in valid_reviews])
+            if unnormalized.any():
+                matrix[unnormalized] = normalize_rows(matrix[unnormalized])
+        
+        metadata = [{
+            'hospital_id': str(review['hospital_id']),
+            'name': str(review['name']),
+            'review': str(review['review'])
+        } for review in valid_reviews]
+        return matrix, metadata
+    
+    def _parse_embeddings_batch(self, raw_embeddings: List[Any]) -> np.ndarray:
+        """
+        Parse all embeddings in one call instead of per row
+        
+        Raises:
+            ValueError: If rows are malformed or have different dimensions
+        """
+        if not raw_embeddings:
+            return np.empty((0, 0), dtype='float32')
+        if all(isinstance(raw, str) for raw in raw_embeddings):
+            # pgvector text format "[0.1,0.2,...]" parsed by numpy's C reader
+            return np.loadtxt([raw.strip('[] ') for raw in raw_embeddings], delimiter=',',
+                              dtype='float32', ndmin=2)
+        return np.array([np.asarray(raw, dtype='float32') for raw in raw_embeddings], dtype='float32')
+    
+    def top_k(self, matrix: np.ndarray, query_embedding: np.ndarray, top_k: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Inner product top-k with matrix-vector products
+        
+        Exact by default. In two-stage mode (rerank_candidates > 0) all rows are
+        scanned with raw (unnormalized) dot products of their first coarse_dims
+        components, and the best max(top_k, rerank_candidates) of them are
+        re-scored with full vectors. Those prefix scores are not comparable with
+        exact scores, so only exact scores are ranked and returned.
+        
+        Args:
+            matrix: Unit-norm embedding matrix from embedding_matrix
+            query_embedding: Query vector
+            top_k: Number of results
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Similarities and row positions, best first
+        """
+        query = normalize_rows(np.asarray(query_embedding, dtype='float32').reshape(1, -1))[0]
+        two_stage = (self.rerank_candidates and len(matrix) > self.rerank_candidates
+                     and self.coarse_dims < matrix.shape[1])
+        if not two_stage:
+            return self._top_k_scores(matrix @ query, top_k)
+        
+        # Raw prefix dot products: renormalizing every row would cost more than
+        # the scan saves, and the exact re-rank absorbs the difference
+        coarse = matrix[:, :self.coarse_dims] @ query[:self.coarse_dims]
+        _, order = self._top_k_scores(coarse, max(top_k, self.rerank_candidates))
+        
+        exact_scores, exact_order = self._top_k_scores(matrix[order] @ query, top_k)
+        return exact_scores, order[exact_order]
+    
+    @staticmethod
+    def _top_k_scores(scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k of a score vector with argpartition, best first"""
+        k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return scores[order], order
+    
+    def build_index(self, hospital_reviews: List[Dict[str, Any]]) -> Tuple[Optional[faiss.Index], List[Dict[str, str]]]:
+        """
+        Build an inner product index over normalized review embeddings
+        
+        Args:
+            hospital_reviews: List of hospital review data
+            
+        Returns:
+            Tuple[Optional[faiss.Index], List[Dict[str, str]]]: Index (None if no
+            valid embeddings) and metadata aligned with index positions
+        """
+        embeddings, metadata = self.embedding_matrix(hospital_reviews)
+        if not len(embeddings):
+            return None, metadata
+        
+        index = faiss.IndexFlatIP(embeddings.shape[1])  # Inner product for cosine similarity
+        index.add(np.ascontiguousarray(embeddings))
+        return index, metadata
+    
+    def search(self, index: faiss.Index, query_embeddings: np.ndarray,
+               top_k: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search an index with one or more query embeddings
+        
+        Args:
+            index: Index from build_index
+            query_embeddings: Query vectors, shape (dimension,) or (n_queries, dimension)
+            top_k: Number of neighbours per query
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Similarities and index positions, shape (n_queries, k)
+        """
+        queries = normalize_rows(np.atleast_2d(query_embeddings))
+        return index.search(np.ascontiguousarray(queries), min(top_k, index.ntotal))
+    
     def calculate_similarity(self, query: str, hospital_reviews: List[Dict[str, Any]], 
                            top_k: int = 30) -> List[Dict[str, Any]]:
         """
@@ -61,63 +232,105 @@ class SimilarityCalculator:
             top_k: Number of top results to return
             
         Returns:
-            List[Dict[str, Any]]: Similarity results
+            List[Dict[str, Any]]: Similarity results; with a lexical index they are
+            ordered by 'hybrid_score' and also carry 'lexical_score'
         """
         if not hospital_reviews:
-            print("No hospital reviews provided")
+            logger.info("No hospital reviews provided")
             return []
         
         # Generate query embedding
-        query_embedding = self.openai_client.get_embedding(query)
+        with time_stage("query_embedding"):
+            query_embedding = self.openai_client.get_embedding(query)
         if not query_embedding:
-            print("Failed to generate query embedding")
+            logger.warning("Failed to generate query embedding")
             return []
         
-        # Normalize query embedding
-        query_embedding = self.normalize_vector(np.array(query_embedding)).astype('float32').reshape(1, -1)
-        
-        # Process hospital review embeddings
-        embeddings = []
-        metadata = []
-        
-        for review in hospital_reviews:
-            try:
-                embedding_values = self.parse_embedding(review['embedding'])
-                normalized = self.normalize_vector(np.array(embedding_values))
-                embeddings.append(normalized.astype('float32'))
-                
-                metadata.append({
-                    'hospital_id': str(review['hospital_id']),
-                    'name': str(review['name']),
-                    'review': str(review['review'])
-                })
-            except Exception as e:
-                print(f"Error parsing embedding for hospital_id {review['hospital_id']}: {str(e)}")
-                continue
-        
-        if not embeddings:
-            print("No valid embeddings found")
-            return []
+        query_embedding = np.array(query_embedding)
+        candidate_ids = [str(review['hospital_id']) for review in hospital_reviews]
+        # Fusion needs the dense rank of every candidate, not just the top_k
+        dense_k = len(hospital_reviews) if self.lexical_index is not None else top_k
+        scored = []  # (similarity, review metadata)
+        
+        if self.vector_index is not None:
+            indexed = [review for review in hospital_reviews if review['hospital_id'] in self.vector_index]
+            hospital_reviews = [review for review in hospital_reviews if review['hospital_id'] not in self.vector_index]
+            if indexed:
+                by_id = {str(review['hospital_id']): review for review in indexed}
+                with time_stage("vector_index_search"):
+                    scores, ids = self.vector_index.search(query_embedding, dense_k, candidate_ids=list(by_id))
+                scored.extend(
+                    (float(score), {'hospital_id': hospital_id, 'name': str(by_id[hospital_id]['name']),
+                                    'review': str(by_id[hospital_id]['review'])})
+                    for score, hospital_id in zip(scores[0], ids[0])
+                )
+            if hospital_reviews:
+                logger.debug("%d candidates missing from vector index, scoring from row embeddings",
+                             len(hospital_reviews))
+        
+        if hospital_reviews:
+            with time_stage("parse_embeddings"):
+                embeddings, metadata = self.embedding_matrix(hospital_reviews)
+            if len(embeddings):
+                with time_stage("vector_search"):
+                    similarities, indices = self.top_k(embeddings, query_embedding, dense_k)
+                scored.extend((float(sim), metadata[idx]) for sim, idx in zip(similarities, indices))
         
-        # Convert to numpy array
-        embeddings = np.vstack(embeddings).astype('float32')
+        if not scored:
+            logger.warning("No valid embeddings found")
+            return []
+        scored.sort(key=lambda item: -item[0])
         
-        # Create FAISS index and search
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        index.add(embeddings)
-        similarities, indices = index.search(query_embedding, min(top_k, len(embeddings)))
+        if self.lexical_index is not None:
+            with time_stage("lexical_search"):
+                scored = self.fuse_lexical(query, scored, candidate_ids)
         
         # Format results
         results = []
-        for i, (sim, idx) in enumerate(zip(similarities[0], indices[0])):
-            hospital_info = metadata[idx]
+        for i, (sim, hospital_info) in enumerate(scored[:top_k]):
             results.append({
                 'rank': i + 1,
-                'hospital_id': hospital_info['hospital_id'],
-                'name': hospital_info['name'],
-                'review': hospital_info['review'],
+                **hospital_info,
                 'similarity': round(float(sim), 4)
             })
         
-        return results 
\ No newline at end of file
+        return results
+    
+    def fuse_lexical(self, query: str, scored: List[Tuple[float, Dict[str, Any]]],
+                     candidate_ids: List[str]) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Reciprocal rank fusion of dense similarity and BM25 rankings
+        
+        hybrid_score is the RRF sum scaled by its maximum (2 / (fusion_k + 1)),
+        so it stays in [0, 1] like the cosine similarity it replaces for ordering.
+        
+        Args:
+            query: User query
+            scored: (similarity, metadata) pairs in dense order
+            candidate_ids: Hospital IDs eligible for lexical scoring
+            
+        Returns:
+            List[Tuple[float, Dict[str, Any]]]: Pairs in fused order, metadata extended
+            with 'lexical_score' and 'hybrid_score'
+        """
+        lexical_scores, lexical_ids = self.lexical_index.score(query, candidate_ids)
+        matched = lexical_scores > 0
+        lexical_order = np.argsort(-lexical_scores[matched], kind='stable')
+        matched_ids = np.array(lexical_ids, dtype=object)[matched][lexical_order]
+        lexical_rank = {hospital_id: rank for rank, hospital_id in enumerate(matched_ids, 1)}
+        lexical_score = dict(zip(lexical_ids, lexical_scores.tolist()))
+        
+        k = self.fusion_k
+        fused = []
+        for dense_rank, (similarity, info) in enumerate(scored, 1):
+            rrf = 1.0 / (k + dense_rank)
+            if info['hospital_id'] in lexical_rank:
+                rrf += 1.0 / (k + lexical_rank[info['hospital_id']])
+            fused.append((rrf, similarity, info))
+        fused.sort(key=lambda item: -item[0])
+        fused = [(similarity, {
+            **info,
+            'lexical_score': round(lexical_score.get(info['hospital_id'], 0.0), 4),
+            'hybrid_score': round(rrf * (k + 1) / 2, 4)
+        }) for rrf, similarity, info in fused]
+        return fused
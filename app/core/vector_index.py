@@ -0,0 +1,297 @@
+"""
+Persistent embedding index with reduced-dimension and quantized storage options
+"""
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import faiss
+from app.core.similarity_calculator import normalize_rows
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FILE = "index.faiss"
+IDS_FILE = "ids.npy"
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.json"
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise top-k of a score matrix with argpartition
+
+    Args:
+        scores: Array of shape (n_queries, n_candidates)
+        k: Number of results per row
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Scores and column positions, best first
+    """
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+class VectorIndex:
+    """
+    Inner product index over unit-norm embeddings
+
+    Kinds:
+        flat     exact float32 (IndexFlatIP), the baseline
+        float16  scalar quantized to 2 bytes per dimension
+        int8     scalar quantized to 1 byte per dimension (trained per-dimension ranges)
+        ivfpq    inverted lists + product quantization (m bytes per vector at 8 bits)
+
+    Any kind can be combined with `dims`, which keeps the first dims
+    components and renormalizes. For text-embedding-3 models this is
+    equivalent to requesting the `dimensions` parameter from the API.
+
+    With `rerank` set, searches become two-stage: the compact index picks
+    the top `rerank` candidates and full-precision vectors re-rank them.
+    The full vectors are saved next to the index and memory-mapped on load,
+    so only the rows being re-ranked are paged in.
+    """
+
+    KINDS = ("flat", "float16", "int8", "ivfpq")
+
+    def __init__(self, kind: str = "flat", dims: Optional[int] = None, nlist: Optional[int] = None,
+                 m: Optional[int] = None, nbits: int = 8, nprobe: int = 16, rerank: int = 0):
+        """
+        Initialize vector index
+
+        Args:
+            kind: One of KINDS
+            dims: Keep only the first dims components (None keeps all)
+            nlist: Number of IVF lists (ivfpq; default ~4 * sqrt(n))
+            m: Number of PQ sub-quantizers (ivfpq; must divide the dimension, default dim / 16)
+            nbits: Bits per PQ code (ivfpq)
+            nprobe: Lists visited per query (ivfpq)
+            rerank: Coarse candidates re-ranked with full-precision vectors (0 disables)
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown index kind '{kind}', expected one of {self.KINDS}")
+        self.kind = kind
+        self.dims = dims
+        self.nlist = nlist
+        self.m = m
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.index = None
+        self.full_vectors: Optional[np.ndarray] = None
+        self.ids = np.empty(0, dtype=object)
+        self._position_of: Dict[str, int] = {}
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "VectorIndex":
+        """
+        Create an index from a spec string such as "int8,dims=512" or "ivfpq,nlist=1024,m=48,nprobe=32"
+
+        Args:
+            spec: Kind followed by optional comma separated key=value options
+
+        Returns:
+            VectorIndex: Unbuilt index
+        """
+        kind, *options = [part.strip() for part in spec.split(",") if part.strip()]
+        params = {}
+        for option in options:
+            key, _, value = option.partition("=")
+            params[key.strip()] = int(value)
+        return cls(kind, **params)
+
+    @property
+    def spec(self) -> str:
+        """Spec string describing this configuration"""
+        options = [("dims", self.dims)]
+        if self.kind == "ivfpq":
+            options += [("nlist", self.nlist), ("m", self.m), ("nbits", self.nbits), ("nprobe", self.nprobe)]
+        if self.rerank:
+            options.append(("rerank", self.rerank))
+        return ",".join([self.kind] + [f"{k}={v}" for k, v in options if v is not None])
+
+    def prepare(self, vectors: np.ndarray, full: bool = False) -> np.ndarray:
+        """
+        Apply dimension reduction and normalization to raw embeddings
+
+        Args:
+            vectors: Array of shape (n, dimension) or (dimension,)
+            full: Keep every dimension (for re-ranking)
+
+        Returns:
+            np.ndarray: Contiguous unit-norm float32 array of shape (n, dims)
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype='float32'))
+        if self.dims and not full:
+            vectors = vectors[:, :self.dims]
+        return np.ascontiguousarray(normalize_rows(vectors))
+
+    def _create(self, dimension: int, n: int) -> faiss.Index:
+        """Create the empty FAISS index for this kind"""
+        if self.kind == "flat":
+            return faiss.IndexFlatIP(dimension)
+        if self.kind in ("float16", "int8"):
+            qtype = faiss.ScalarQuantizer.QT_fp16 if self.kind == "float16" else faiss.ScalarQuantizer.QT_8bit
+            return faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_INNER_PRODUCT)
+
+        self.nlist = self.nlist or max(1, min(int(4 * np.sqrt(n)), n // 39))
+        self.m = self.m or max(1, dimension // 16)
+        if dimension % self.m:
+            raise ValueError(f"m={self.m} must divide the index dimension {dimension}")
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, self.nlist, self.m, self.nbits, faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = self.nprobe
+        return index
+
+    def build(self, vectors: np.ndarray, ids: Sequence[Any]) -> "VectorIndex":
+        """
+        Build the index
+
+        Args:
+            vectors: Embeddings of shape (n, dimension), normalized or not
+            ids: Hospital IDs aligned with vectors
+
+        Returns:
+            VectorIndex: self
+        """
+        if self.rerank:
+            self.full_vectors = self.prepare(vectors, full=True)
+        vectors = self.prepare(vectors)
+        if len(vectors) != len(ids):
+            raise ValueError("vectors and ids must have the same length")
+
+        start = time.perf_counter()
+        self.index = self._create(vectors.shape[1], len(vectors))
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add(vectors)
+        if self.kind == "ivfpq":
+            # Needed for reconstruct_batch in candidate-restricted searches
+            self.index.make_direct_map()
+        self._set_ids(ids)
+        logger.info("Built %s index over %d vectors in %.1fs (%.1f MiB)",
+                    self.spec, len(vectors), time.perf_counter() - start, self.memory_bytes / 2**20)
+        return self
+
+    def _set_ids(self, ids: Sequence[Any]) -> None:
+        self.ids = np.array([str(i) for i in ids], dtype=object)
+        self._position_of = {hospital_id: pos for pos, hospital_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return 0 if self.index is None else self.index.ntotal
+
+    def __contains__(self, hospital_id: Any) -> bool:
+        return str(hospital_id) in self._position_of
+
+    @property
+    def memory_bytes(self) -> int:
+        """Serialized index size, a close proxy for resident memory"""
+        return 0 if self.index is None else int(faiss.serialize_index(self.index).nbytes)
+
+    def search(self, queries: np.ndarray, top_k: int = 30,
+               candidate_ids: Optional[Sequence[Any]] = None) -> Tuple[np.ndarray, List[List[str]]]:
+        """
+        Search the index
+
+        Args:
+            queries: Query embeddings, shape (dimension,) or (n_queries, dimension)
+            top_k: Number of results per query
+            candidate_ids: Restrict results to these hospital IDs (ids not in the index are ignored)
+
+        Returns:
+            Tuple[np.ndarray, List[List[str]]]: Scores of shape (n_queries, k) and
+            matching hospital IDs, best first
+        """
+        full_queries = self.prepare(queries, full=True)
+        queries = self.prepare(queries)
+        reranking = self.rerank and self.full_vectors is not None
+        coarse_k = max(top_k, self.rerank) if reranking else top_k
+
+        if candidate_ids is None:
+            scores, positions = self.index.search(queries, min(coarse_k, len(self)))
+        else:
+            # Filtered searches (one district, one department) score only their
+            # candidates using the stored, decoded representation
+            allowed = np.array(sorted({self._position_of[str(i)] for i in candidate_ids
+                                       if str(i) in self._position_of}), dtype='int64')
+            if not len(allowed):
+                return np.empty((len(queries), 0), dtype='float32'), [[] for _ in queries]
+            scores, top = top_k_rows(queries @ self.index.reconstruct_batch(allowed).T, coarse_k)
+            positions = allowed[top]
+
+        if reranking:
+            scores, positions = self._rerank(full_queries, scores, positions, top_k)
+        return scores, [[self.ids[p] for p in row if p >= 0] for row in positions]
+
+    def _rerank(self, queries: np.ndarray, coarse_scores: np.ndarray, positions: np.ndarray,
+                top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Re-score all coarse candidates (the best max(top_k, rerank)) with
+        full-precision vectors and keep the top_k by exact score
+
+        Every returned score is exact: coarse scores use the compressed or
+        truncated representation and are not comparable with exact ones, so
+        they are never mixed into one ranking.
+        """
+        width = min(top_k, positions.shape[1])
+        scores = np.full((len(queries), width), -np.inf, dtype='float32')
+        ranked = np.full((len(queries), width), -1, dtype='int64')
+        for i, query in enumerate(queries):
+            candidates = positions[i][positions[i] >= 0]
+            # Read rows in file order from the memory map
+            file_order = np.argsort(candidates)
+            exact = np.empty(len(candidates), dtype='float32')
+            exact[file_order] = self.full_vectors[candidates[file_order]] @ query
+            order = np.argsort(-exact, kind='stable')[:width]
+            ranked[i, :len(order)] = candidates[order]
+            scores[i, :len(order)] = exact[order]
+        return scores, ranked
+
+    def save(self, path: str) -> None:
+        """
+        Save index, IDs and configuration to a directory
+
+        Args:
+            path: Target directory
+        """
+        os.makedirs(path, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(path, INDEX_FILE))
+        np.save(os.path.join(path, IDS_FILE), self.ids.astype(str))
+        if self.full_vectors is not None:
+            np.save(os.path.join(path, VECTORS_FILE), self.full_vectors)
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"kind": self.kind, "dims": self.dims, "nlist": self.nlist, "m": self.m,
+                       "nbits": self.nbits, "nprobe": self.nprobe, "rerank": self.rerank,
+                       "count": len(self)}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """
+        Load an index saved with save()
+
+        Args:
+            path: Index directory
+
+        Returns:
+            VectorIndex: Loaded index
+        """
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        meta.pop("count", None)
+        vector_index = cls(**meta)
+        vector_index.index = faiss.read_index(os.path.join(path, INDEX_FILE))
+        if vector_index.kind == "ivfpq":
+            vector_index.index.nprobe = vector_index.nprobe
+            vector_index.index.make_direct_map()
+        vector_index._set_ids(np.load(os.path.join(path, IDS_FILE)).tolist())
+        if vector_index.rerank and os.path.exists(os.path.join(path, VECTORS_FILE)):
+            vector_index.full_vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r')
+        logger.info("Loaded %s index with %d vectors from %s", vector_index.spec, len(vector_index), path)
+        return vector_index
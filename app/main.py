@@ -8,10 +8,14 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.web.routes import HospitalRecommendationApp
+from app.utils.logger import setup_logging
 
 
 def main():
     """Main application entry point"""
+    # Debug runs keep full per-request detail unless LOG_LEVEL overrides it
+    setup_logging(os.getenv("LOG_LEVEL", "DEBUG"))
+
     # Only show startup message if not in reloader
     if not os.environ.get('WERKZEUG_RUN_MAIN'):
         print("🏥 Hospital Recommendation AI Service Starting...")
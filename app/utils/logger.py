@@ -0,0 +1,118 @@
+"""
+Structured, queue-backed logging for hospital recommendation service
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+
+APP_LOGGER_NAME = "app"
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message"}
+
+_listener: Optional[QueueListener] = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """Format records as `key=value` text or JSON lines, including `extra` fields"""
+
+    def __init__(self, json_lines: bool = False):
+        """
+        Initialize formatter
+
+        Args:
+            json_lines: Emit one JSON object per line instead of key=value text
+        """
+        super().__init__(datefmt="%Y-%m-%dT%H:%M:%S")
+        self.json_lines = json_lines
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a log record"""
+        fields = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                fields[key] = value
+        if record.exc_info:
+            fields["exc"] = self.formatException(record.exc_info)
+
+        if self.json_lines:
+            return json.dumps(fields, ensure_ascii=False, default=str)
+        extras = " ".join(f"{k}={v}" for k, v in fields.items()
+                          if k not in ("ts", "level", "logger", "msg"))
+        line = f"{fields['ts']} {fields['level']:<7} {fields['logger']}: {fields['msg']}"
+        return f"{line} {extras}" if extras else line
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread
+
+    The stock QueueHandler formats in the calling thread; records here only
+    carry plain strings and numbers, so they can be passed through as-is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: Optional[str] = None) -> logging.Logger:
+    """
+    Configure the application logger with a queued stdout handler
+
+    Safe to call more than once: handlers are installed once and later calls
+    only change the level when one is given explicitly.
+
+    Args:
+        level: Log level name (defaults to LOG_LEVEL env var, then WARNING)
+
+    Returns:
+        logging.Logger: Application root logger
+    """
+    global _listener
+
+    logger = logging.getLogger(APP_LOGGER_NAME)
+    if level is not None:
+        logger.setLevel(level.upper())
+    elif _listener is None:
+        logger.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(
+            StructuredFormatter(json_lines=os.getenv("LOG_FORMAT") == "json")
+        )
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        logger.propagate = False
+
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a logger under the application namespace
+
+    Args:
+        name: Module name (usually __name__)
+
+    Returns:
+        logging.Logger: Logger instance
+    """
+    if not name.startswith(APP_LOGGER_NAME):
+        name = f"{APP_LOGGER_NAME}.{name}"
+    return logging.getLogger(name)
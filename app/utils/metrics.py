@@ -0,0 +1,257 @@
+"""
+Lightweight latency metrics for hospital recommendation service
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+
+# Bucket upper bounds in seconds (LLM calls can take tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+# Per-request stage timings used for the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class Histogram:
+    """Prometheus-style histogram with a single label dimension"""
+
+    def __init__(self, name: str, help_text: str, label: str = "stage",
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize histogram
+
+        Args:
+            name: Metric name
+            help_text: Metric description
+            label: Label name used to split series
+            buckets: Sorted bucket upper bounds in seconds
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        """
+        Record one observation
+
+        Args:
+            label_value: Label value (e.g. stage name)
+            value: Observed value in seconds
+        """
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                # [bucket counts..., +Inf count], sum
+                series = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[label_value] = series
+            series[0][idx] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        """
+        Render histogram in Prometheus text exposition format
+
+        Returns:
+            List[str]: Exposition lines
+        """
+        lines = [f"# HELP {self.name} {self.help_text}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+
+        for label_value, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound}"}} {cumulative}'
+                )
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter with a single label dimension"""
+
+    def __init__(self, name: str, help_text: str, label: str = "result"):
+        """
+        Initialize counter
+
+        Args:
+            name: Metric name
+            help_text: Metric description
+            label: Label name used to split series
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1.0) -> None:
+        """
+        Increment a series
+
+        Args:
+            label_value: Label value
+            amount: Increment
+        """
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def value(self, label_value: str) -> float:
+        """
+        Get the current value of a series
+
+        Args:
+            label_value: Label value
+
+        Returns:
+            float: Current value
+        """
+        with self._lock:
+            return self._values.get(label_value, 0.0)
+
+    def render(self) -> List[str]:
+        """
+        Render counter in Prometheus text exposition format
+
+        Returns:
+            List[str]: Exposition lines
+        """
+        lines = [f"# HELP {self.name} {self.help_text}",
+                 f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_value, value in sorted(snapshot.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+class MetricsRegistry:
+    """Registry holding all metrics exposed on /metrics"""
+
+    def __init__(self):
+        """Initialize empty registry"""
+        self._metrics = []
+
+    def register(self, metric):
+        """
+        Register a metric
+
+        Args:
+            metric: Metric object providing render()
+
+        Returns:
+            The registered metric
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all registered metrics
+
+        Returns:
+            str: Prometheus text exposition
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "hospital_stage_latency_seconds",
+    "Latency of each stage of the recommendation flow"
+))
+
+INTENT_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "hospital_intent_cache_requests_total",
+    "Intent-extraction cache lookups by result"
+))
+
+INTENT_FAST_PATH_REQUESTS = REGISTRY.register(Counter(
+    "hospital_intent_fast_path_requests_total",
+    "Local keyword intent matcher attempts by result"
+))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """
+    Record a stage duration in the histogram and the current request timings
+
+    Args:
+        stage: Stage name
+        seconds: Duration in seconds
+    """
+    STAGE_LATENCY.observe(stage, seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.setdefault(stage, []).append(seconds)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """
+    Time a block of code as one stage of the recommendation flow
+
+    Args:
+        stage: Stage name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def start_request_timing() -> None:
+    """Begin collecting stage timings for the current request"""
+    _request_timings.set({})
+
+
+def server_timing_header() -> str:
+    """
+    Build a Server-Timing header value from the current request timings
+
+    Returns:
+        str: Header value (empty if nothing was timed)
+    """
+    timings = _request_timings.get()
+    if not timings:
+        return ""
+
+    entries = []
+    for stage, durations in timings.items():
+        entry = f"{stage};dur={sum(durations) * 1000:.1f}"
+        if len(durations) > 1:
+            entry += f';desc="{len(durations)} calls"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+def render_metrics() -> str:
+    """
+    Render all metrics in Prometheus text format
+
+    Returns:
+        str: Prometheus text exposition
+    """
+    return REGISTRY.render()
@@ -0,0 +1,45 @@
+"""
+Thread-safe rate limiter for outbound API calls
+"""
+import time
+import threading
+
+
+class RateLimiter:
+    """Token bucket limiter shared by worker threads"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize rate limiter
+
+        Args:
+            rate: Allowed calls per second
+            burst: Maximum number of calls allowed back to back
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
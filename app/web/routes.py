@@ -1,36 +1,108 @@
 """
 Web routes for hospital recommendation service
 """
+import os
 import re
+import copy
 import json
+import hashlib
 import requests
-from flask import Flask, request, render_template_string, redirect
+from flask import Flask, Response, request, render_template_string, redirect
 from app.ai.prompt_manager import PromptManager
 from app.ai.openai_client import OpenAIClient
+from app.ai.intent_matcher import IntentMatcher
+from app.ai.history_manager import HistoryManager
 from app.core.hospital_search import HospitalSearchEngine
 from app.core.rag_analyzer import RAGAnalyzer
+from app.core.vector_index import VectorIndex
+from app.core.lexical_index import LexicalIndex
+from app.utils.cache import TTLCache
 from app.utils.database import get_database_connection
+from app.utils.metrics import (
+    INTENT_CACHE_REQUESTS, time_stage, start_request_timing,
+    server_timing_header, render_metrics
+)
+from app.utils.logger import get_logger, setup_logging
 from app.web.templates import HTML_TEMPLATE, format_hospital_results
 
+logger = get_logger(__name__)
+
 
 class HospitalRecommendationApp:
     """Main application class for hospital recommendation service"""
     
     def __init__(self):
         """Initialize the application"""
+        setup_logging()
         self.app = Flask(__name__)
         self.openai_client = OpenAIClient()
         self.search_engine = HospitalSearchEngine()
-        self.rag_analyzer = RAGAnalyzer(self.openai_client, self.search_engine)
+        self.rag_analyzer = RAGAnalyzer(
+            self.openai_client, self.search_engine,
+            batch_analysis=os.getenv("RAG_BATCH_ANALYSIS", "true").lower() == "true",
+            vector_index=self.load_vector_index(),
+            rerank_candidates=int(os.getenv("SIMILARITY_RERANK_CANDIDATES", "0")),
+            lexical_index=self.load_lexical_index()
+        )
         self.messages = [PromptManager.get_system_prompt()]
+        self.intent_matcher = IntentMatcher(districts=self.load_district_names())
+        self.history_manager = HistoryManager()
+        self.intent_cache = TTLCache(
+            max_size=int(os.getenv("INTENT_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("INTENT_CACHE_TTL", "3600"))
+        )
         
         # Setup routes
         self.setup_routes()
     
+    def load_vector_index(self):
+        """Load the prebuilt embedding index from VECTOR_INDEX_PATH, if configured"""
+        path = os.getenv("VECTOR_INDEX_PATH")
+        if not path:
+            return None
+        try:
+            return VectorIndex.load(path)
+        except Exception as e:
+            logger.warning("Could not load vector index from %s, using row embeddings: %s", path, e)
+            return None
+    
+    def load_district_names(self):
+        """Load valid district names for the intent fast path from the district table"""
+        try:
+            return self.search_engine.get_district_names()
+        except Exception as e:
+            logger.warning("Could not load district names, fast path limited to Seoul districts: %s", e)
+            return None
+    
+    def load_lexical_index(self):
+        """Load the BM25 review index from LEXICAL_INDEX_PATH, if configured"""
+        path = os.getenv("LEXICAL_INDEX_PATH")
+        if not path:
+            return None
+        try:
+            return LexicalIndex.load(path)
+        except Exception as e:
+            logger.warning("Could not load lexical index from %s, using dense ranking only: %s", path, e)
+            return None
+    
     def setup_routes(self):
         """Setup Flask routes"""
         self.app.route("/", methods=["GET", "POST"])(self.chat)
         self.app.route("/reset", methods=["POST"])(self.reset)
+        self.app.route("/metrics", methods=["GET"])(self.metrics)
+        self.app.before_request(start_request_timing)
+        self.app.after_request(self.add_server_timing)
+
+    def metrics(self):
+        """Expose stage latency histograms in Prometheus text format"""
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    def add_server_timing(self, response):
+        """Attach per-stage durations of this request as a Server-Timing header"""
+        header = server_timing_header()
+        if header:
+            response.headers["Server-Timing"] = header
+        return response
 
     def reset(self):
         self.messages = [PromptManager.get_system_prompt()]
@@ -48,7 +120,7 @@ class HospitalRecommendationApp:
         """
         data = {
             "model": self.openai_client.model,
-            "messages": self.messages
+            "messages": self.history_manager.build_messages(self.messages)
         }
         
         headers = {
@@ -56,11 +128,12 @@ class HospitalRecommendationApp:
             "Content-Type": "application/json"
         }
         
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions", 
-            headers=headers, 
-            json=data
-        )
+        with time_stage("intent_llm"):
+            response = requests.post(
+                f"{self.openai_client.base_url}/chat/completions", 
+                headers=headers, 
+                json=data
+            )
         
         response_json = response.json()
         reply = response_json["choices"][0]["message"]["content"].strip()
@@ -85,6 +158,52 @@ class HospitalRecommendationApp:
                 return None
         return None
     
+    def _intent_cache_key(self) -> str:
+        """
+        Build a cache key from the normalized conversation as sent to the LLM
+        (system prompt excluded)
+        
+        Returns:
+            str: Hash of the normalized conversation content
+        """
+        normalized = [
+            (m["role"], " ".join(m["content"].split()).lower())
+            for m in self.history_manager.build_messages(self.messages)[1:]
+        ]
+        payload = json.dumps(normalized, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get_intent(self, user_input: str):
+        """
+        Get the reply and extracted JSON for the current conversation.
+        Unambiguous requests are answered by the local keyword matcher,
+        identical conversations reuse a cached LLM result.
+        
+        Args:
+            user_input: User's input text
+            
+        Returns:
+            tuple: (reply, extracted JSON data or None)
+        """
+        user_text = "\n".join(m["content"] for m in self.messages if m["role"] == "user")
+        with time_stage("intent_fast_path"):
+            data = self.intent_matcher.match(user_text)
+        if data is not None:
+            return json.dumps(data, ensure_ascii=False), data
+        
+        key = self._intent_cache_key()
+        cached = self.intent_cache.get(key)
+        if cached is not None:
+            INTENT_CACHE_REQUESTS.inc("hit")
+            reply, data = cached
+            return reply, copy.deepcopy(data)
+        
+        INTENT_CACHE_REQUESTS.inc("miss")
+        reply = self.call_openai_api(user_input)
+        data = self.extract_json_from_reply(reply)
+        self.intent_cache.set(key, (reply, copy.deepcopy(data)))
+        return reply, data
+    
     def chat(self):
         """Main chat route handler"""
         if request.method == "POST":
@@ -93,8 +212,7 @@ class HospitalRecommendationApp:
             self.messages.append({"role": "user", "content": user_input})
 
             # Call LLM + DB lookup
-            reply = self.call_openai_api(user_input)
-            data = self.extract_json_from_reply(reply)
+            reply, data = self.get_intent(user_input)
 
             if data:
                 # you returned JSON: turn into HTML list or whatever
@@ -107,7 +225,7 @@ class HospitalRecommendationApp:
                 hospitals = self.search_engine.search_hospitals(
                     city, district, hospital_type, department
                 )
-                print(f"Found {len(hospitals)} hospitals")
+                logger.info("Found %d hospitals", len(hospitals))
 
                 if hospitals:
                     # Create analysis query
@@ -117,7 +235,7 @@ class HospitalRecommendationApp:
                     
                     # Perform RAG analysis
                     analyzed_hospitals = self.rag_analyzer.analyze_hospitals(
-                        hospitals, analysis_query
+                        hospitals, analysis_query, preference=preference
                     )
                     
                     # Format and display results
@@ -1,6 +1,7 @@
 """
 HTML templates for hospital recommendation web interface
 """
+from html import escape
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -102,6 +103,10 @@ HTML_TEMPLATE = """
         border-radius: 5px;
         margin-top: 10px;
     }
+    .analysis-section ul {
+        margin: 0.25rem 0;
+        padding-left: 1.25rem;
+    }
   </style>
 </head>
 
@@ -146,6 +151,34 @@ HTML_TEMPLATE = """
 """
 
 
+def format_rag_fields(fields):
+    """
+    Convert structured RAG analysis fields to HTML
+    
+    Args:
+        fields: Per-hospital analysis fields from the batch analysis
+        
+    Returns:
+        str: HTML formatted analysis
+    """
+    def bullet_list(items):
+        if isinstance(items, str):
+            items = [items]
+        if not items:
+            return '<p>없음</p>'
+        return '<ul>' + ''.join(f'<li>{escape(str(item))}</li>' for item in items) + '</ul>'
+    
+    return (
+        f'<p><b>병원 요약</b>: {escape(str(fields.get("summary", "")))}</p>'
+        + '<p><b>강점</b></p>' + bullet_list(fields.get('strengths'))
+        + '<p><b>약점</b></p>' + bullet_list(fields.get('weaknesses'))
+        + f'<p><b>요구사항 적합성</b>: {escape(str(fields.get("fit", "")))}'
+        + f' · <b>추천 점수</b>: {escape(str(fields.get("score", "")))}/5</p>'
+        + f'<p><b>추천 이유</b>: {escape(str(fields.get("reason", "")))}</p>'
+        + f'<p><b>주의사항</b>: {escape(str(fields.get("cautions") or "없음"))}</p>'
+    )
+
+
 def format_hospital_results(hospitals):
     """
     Convert hospital analysis results to HTML formatted string
@@ -173,8 +206,12 @@ def format_hospital_results(hospitals):
             if h.get('url'):
                 url_html = f'<p><a href="{h["url"]}" target="_blank" class="btn btn-outline-primary btn-sm">병원 홈페이지</a></p>'
             
-            # RAG 분석 결과의 줄바꿈을 HTML <br> 태그로 변환
-            analysis_html = h["rag_analysis"].replace('\n', '<br>')
+            if h.get('rag_fields'):
+                # 일괄 분석의 구조화된 결과는 필드별로 표시
+                analysis_html = format_rag_fields(h['rag_fields'])
+            else:
+                # RAG 분석 결과의 줄바꿈을 HTML <br> 태그로 변환
+                analysis_html = h["rag_analysis"].replace('\n', '<br>')
             
             hospital_info = (
                 '<div class="result-card">'
@@ -183,6 +220,8 @@ def format_hospital_results(hospitals):
                 + f'<p>{h["address"]}<br>☎ {h["tel"]}</p>'
                 + url_html
                 + f'<p class="similarity-score">유사도 점수: {h["similarity"]}</p>'
+                + (f'<p>선호 항목 리뷰 점수: {h["aspect_score"]}</p>' if 'aspect_score' in h else '')
+                + (f'<p>키워드 일치 점수(BM25): {h["lexical_score"]}</p>' if h.get('lexical_score') else '')
                 + '<div class="analysis-section">'
                 + '<h5>AI 분석 결과:</h5>'
                 + analysis_html
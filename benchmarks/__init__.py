@@ -0,0 +1,3 @@
+"""
+Offline benchmarking and load-testing tools for hospital recommendation service
+"""
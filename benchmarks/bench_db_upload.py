@@ -0,0 +1,141 @@
+"""
+Bulk upload paths for ingestion tables, against a scratch table in DATABASE_URL
+
+    to_sql          DataFrame.to_sql append (previous upload_dataframe)
+    executemany     INSERT ... ON CONFLICT DO NOTHING with to_dict records
+                    (previous upload_dataframe_ignore_dups)
+    copy            COPY straight into the table (upload_dataframe)
+    copy_merge      COPY into a staging table + INSERT ... ON CONFLICT DO NOTHING
+                    (upload_dataframe_ignore_dups)
+    copy_update     same with ON CONFLICT DO UPDATE
+
+Each method loads the same synthetic hospital_departments-like rows into an
+empty table ("load_s"); the ON CONFLICT methods then load them again so every
+row conflicts ("reload_s", a refresh of unchanged data).
+
+    python -m benchmarks.bench_db_upload --rows 10000 100000 500000
+"""
+import time
+import json
+import argparse
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from sqlalchemy import MetaData, Table, text
+from sqlalchemy.dialects.postgresql import insert
+
+from database.utils.db_utils import get_engine, copy_dataframe
+
+TABLE = "bench_upload_rows"
+PK = ["hospital_id", "department_code"]
+
+
+def synthetic_rows(n: int, seed: int = 0) -> pd.DataFrame:
+    """Hospital-department relation rows with unique keys"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "hospital_id": [f"JDQ4MTYyMiM{i // 20:08d}" for i in range(n)],
+        "department_code": [f"{i % 20:02d}" for i in range(n)],
+        "department_name": rng.choice(["내과", "외과", "소아청소년과", "정형외과", "피부과"], size=n),
+        "specialist_count": rng.integers(0, 30, size=n),
+    })
+
+
+def create_table(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                hospital_id      TEXT NOT NULL,
+                department_code  TEXT NOT NULL,
+                department_name  TEXT,
+                specialist_count INTEGER,
+                PRIMARY KEY (hospital_id, department_code)
+            )
+        """))
+
+
+def truncate(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {TABLE}"))
+
+
+def load_to_sql(engine, df: pd.DataFrame) -> None:
+    with engine.begin() as conn:
+        df.to_sql(TABLE, con=conn, if_exists="append", index=False)
+
+
+def load_executemany(engine, df: pd.DataFrame) -> None:
+    table = Table(TABLE, MetaData(), autoload_with=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(table).on_conflict_do_nothing(index_elements=PK), df.to_dict(orient="records"))
+
+
+METHODS = {
+    "to_sql": (load_to_sql, False),
+    "executemany": (load_executemany, True),
+    "copy": (lambda engine, df: copy_dataframe(df, TABLE, engine=engine), False),
+    "copy_merge": (lambda engine, df: copy_dataframe(df, TABLE, pk=PK, on_conflict="nothing", engine=engine), True),
+    "copy_update": (lambda engine, df: copy_dataframe(df, TABLE, pk=PK, on_conflict="update", engine=engine), True),
+}
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return round(time.perf_counter() - start, 3)
+
+
+def run(sizes: List[int], methods: List[str]) -> List[Dict]:
+    """Measure every method at every size"""
+    engine = get_engine()
+    create_table(engine)
+    rows = []
+    try:
+        for n in sizes:
+            df = synthetic_rows(n)
+            for name in methods:
+                load, merges = METHODS[name]
+                truncate(engine)
+                load_s = timed(lambda: load(engine, df))
+                reload_s = timed(lambda: load(engine, df)) if merges else None
+                rows.append({
+                    "rows": len(df),
+                    "method": name,
+                    "load_s": load_s,
+                    "rows_per_s": int(len(df) / max(load_s, 1e-9)),
+                    "reload_s": reload_s,
+                })
+                print(json.dumps(rows[-1]), flush=True)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    return rows
+
+
+def print_table(rows: List[Dict]) -> None:
+    """Print results as an aligned table"""
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) + 2 for c in columns}
+    print("\n" + "".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main(argv: List[str] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compare bulk upload paths (needs DATABASE_URL)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args(argv)
+
+    rows = run(args.rows, args.methods)
+    print_table(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Recall vs latency vs memory for VectorIndex configurations
+
+Every configuration is compared against the exact float32 IndexFlatIP
+baseline on the same corpus and queries:
+
+    recall@k           overlap with the exact top-k for nationwide searches
+    filtered_recall@k  same, restricted to a random candidate set (one district)
+    search_ms          p50 latency of a single nationwide query
+    filtered_ms        p50 latency of a single filtered query
+    mib                serialized index size (with rerank, the full vectors
+                       are memory-mapped from disk and not counted)
+
+The corpus comes from review_summaries (--source db) or is generated with
+clustered structure and a decaying spectrum, which roughly mimics
+text-embedding-3 vectors (--source synthetic). Random Gaussian vectors
+would understate both quantization and dimension-reduction recall.
+
+    python -m benchmarks.bench_index_recall --source synthetic --size 80000
+    python -m benchmarks.bench_index_recall --source db --specs flat int8 "int8,dims=512" "ivfpq,m=96"
+"""
+import time
+import json
+import argparse
+from typing import Dict, List, Tuple
+import numpy as np
+
+from app.core.vector_index import VectorIndex
+
+
+DEFAULT_SPECS = [
+    "flat", "float16", "int8",
+    "flat,dims=512", "flat,dims=256", "int8,dims=512",
+    "ivfpq,m=96,nprobe=16", "ivfpq,m=96,nprobe=64", "ivfpq,m=48,dims=768,nprobe=32",
+    "int8,dims=256,rerank=300", "ivfpq,m=48,dims=768,nprobe=32,rerank=300",
+]
+
+
+def synthetic_corpus(size: int, queries: int, dimension: int = 1536, clusters: int = 200,
+                     latent: int = 96, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Clustered vectors with most variance in the leading dimensions"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, latent)).astype('float32')
+    projection = rng.standard_normal((latent, dimension)).astype('float32')
+    decay = (1.0 / np.sqrt(1.0 + np.arange(dimension) / 64.0)).astype('float32')
+
+    def sample(n):
+        z = centers[rng.integers(clusters, size=n)] + 0.6 * rng.standard_normal((n, latent)).astype('float32')
+        x = (z @ projection) * decay + 0.5 * rng.standard_normal((n, dimension)).astype('float32') * decay
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    return sample(size), sample(queries)
+
+
+def db_corpus(queries: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """review_summaries embeddings; queries are held-out rows with small perturbations"""
+    from database.utils.build_vector_index import load_summary_embeddings
+    from app.utils.database import get_database_connection
+
+    _, embeddings = load_summary_embeddings(get_database_connection())
+    rng = np.random.default_rng(seed)
+    picked = embeddings[rng.choice(len(embeddings), size=min(queries, len(embeddings)), replace=False)]
+    noisy = picked + 0.02 * rng.standard_normal(picked.shape).astype('float32')
+    return embeddings, noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def recall(found: List[List[str]], truth: List[List[str]], k: int) -> float:
+    """Mean overlap of the top-k ID lists"""
+    return float(np.mean([len(set(f[:k]) & set(t[:k])) / max(1, min(k, len(t))) for f, t in zip(found, truth)]))
+
+
+def p50_ms(func, queries: np.ndarray) -> float:
+    """Median single-query latency"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(float(np.median(timings)), 3)
+
+
+def run(corpus: np.ndarray, queries: np.ndarray, specs: List[str], k: int,
+        candidates: int, latency_queries: int, seed: int) -> List[Dict]:
+    """Build every configuration and measure it against the exact baseline"""
+    ids = [f"H{i:06d}" for i in range(len(corpus))]
+    rng = np.random.default_rng(seed)
+    candidate_ids = [ids[i] for i in rng.choice(len(ids), size=min(candidates, len(ids)), replace=False)]
+
+    exact = VectorIndex("flat").build(corpus, ids)
+    _, truth = exact.search(queries, k)
+    _, filtered_truth = exact.search(queries, k, candidate_ids=candidate_ids)
+
+    rows = []
+    for spec in specs:
+        start = time.perf_counter()
+        index = VectorIndex.from_spec(spec).build(corpus, ids)
+        build_s = time.perf_counter() - start
+
+        _, found = index.search(queries, k)
+        _, filtered = index.search(queries, k, candidate_ids=candidate_ids)
+        sample = queries[:latency_queries]
+        rows.append({
+            "spec": index.spec,
+            "build_s": round(build_s, 2),
+            "mib": round(index.memory_bytes / 2**20, 1),
+            "bytes_per_vector": round(index.memory_bytes / len(corpus), 1),
+            f"recall@{k}": round(recall(found, truth, k), 4),
+            "recall@10": round(recall(found, truth, 10), 4),
+            f"filtered_recall@{k}": round(recall(filtered, filtered_truth, k), 4),
+            "search_ms": p50_ms(lambda q: index.search(q, k), sample),
+            "filtered_ms": p50_ms(lambda q: index.search(q, k, candidate_ids=candidate_ids), sample),
+        })
+        print(json.dumps(rows[-1]), flush=True)
+    return rows
+
+
+def print_table(rows: List[Dict]) -> None:
+    """Print results as an aligned table"""
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) + 2 for c in columns}
+    print("\n" + "".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main(argv: List[str] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Recall vs latency for embedding index options")
+    parser.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--latency-queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--candidates", type=int, default=1000, help="Candidate set size for filtered searches")
+    parser.add_argument("--specs", nargs="+", default=DEFAULT_SPECS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args(argv)
+
+    if args.source == "db":
+        corpus, queries = db_corpus(args.queries, args.seed)
+    else:
+        corpus, queries = synthetic_corpus(args.size, args.queries, seed=args.seed)
+    print(f"Corpus {corpus.shape}, {len(queries)} queries")
+
+    rows = run(corpus, queries, args.specs, args.k, args.candidates, args.latency_queries, args.seed)
+    print_table(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"source": args.source, "corpus": len(corpus), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Microbenchmark for SimilarityCalculator at realistic candidate counts
+
+Runs each stage of SimilarityCalculator.calculate_similarity on synthetic
+1536-d embeddings and reports wall time and peak memory per stage:
+
+    parse_embedding   text embedding -> list of floats (per row)
+    normalize_vector  per-row L2 normalization and float32 cast
+    vstack            stacking rows into one matrix
+    faiss_build       IndexFlatIP creation and add
+    faiss_search      top-k inner product search
+    embedding_matrix  batched parse + normalization used by the request path
+    matvec_top_k      one matrix-vector product + argpartition
+    end_to_end        calculate_similarity with a fixed query embedding
+
+Peak memory comes from tracemalloc in a separate, untimed pass. FAISS
+allocates outside the Python allocator, so its stages report the index
+size (n * d * 4 bytes) instead.
+
+    python -m benchmarks.bench_similarity --sizes 10 100 1000 10000 80000
+"""
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List
+import numpy as np
+import faiss
+
+from app.core.similarity_calculator import SimilarityCalculator
+
+
+DIMENSION = 1536
+DEFAULT_SIZES = [10, 100, 1000, 10000, 80000]
+# Distinct embedding strings; larger candidate sets reuse them so that the
+# input itself stays small while parse work per row is unchanged
+UNIQUE_ROWS = 1000
+
+
+class FixedEmbeddingClient:
+    """Stands in for OpenAIClient so end_to_end measures local work only"""
+
+    def __init__(self, embedding: List[float]):
+        self.embedding = embedding
+
+    def get_embedding(self, text: str, model: str = None) -> List[float]:
+        return self.embedding
+
+
+def make_reviews(size: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    """
+    Build synthetic review rows shaped like HospitalSearchEngine.get_hospital_reviews output
+
+    Embeddings are text in pgvector's output format, which is what the
+    request path receives without a pgvector adapter.
+    """
+    unique = min(size, UNIQUE_ROWS)
+    vectors = rng.standard_normal((unique, DIMENSION)).astype('float32')
+    texts = ["[" + ",".join(f"{v:.8g}" for v in row) + "]" for row in vectors]
+    return [
+        {'hospital_id': f"H{i:06d}", 'name': f"병원{i}", 'review': "리뷰", 'embedding': texts[i % unique]}
+        for i in range(size)
+    ]
+
+
+def measure(func: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    """
+    Time a stage and measure its peak traced memory
+
+    Args:
+        func: Stage to run
+        repeats: Number of timed runs (best is reported)
+
+    Returns:
+        Dict[str, float]: Best time in ms and peak memory in MiB
+    """
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ms': round(min(timings), 3), 'peak_mib': round(peak / 2**20, 2)}
+
+
+def bench_size(size: int, top_k: int, repeats: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark every stage for one candidate count
+
+    Args:
+        size: Number of candidate reviews
+        top_k: Number of results to search for
+        repeats: Number of timed runs per stage
+        seed: Random seed
+
+    Returns:
+        Dict[str, Dict[str, float]]: Stage name to measurements
+    """
+    rng = np.random.default_rng(seed)
+    reviews = make_reviews(size, rng)
+    query = rng.standard_normal(DIMENSION).astype('float32')
+    calculator = SimilarityCalculator(openai_client=FixedEmbeddingClient(query.tolist()))
+    query_vec = calculator.normalize_vector(query).reshape(1, -1)
+
+    # Parsed lists are kept only for the distinct strings: one float list
+    # costs ~50 KB per row, which would not fit in memory at 80k
+    unique = min(size, UNIQUE_ROWS)
+    parsed = [calculator.parse_embedding(r['embedding']) for r in reviews[:unique]]
+    rows = [calculator.normalize_vector(np.array(parsed[i % unique])).astype('float32') for i in range(size)]
+    matrix = np.vstack(rows).astype('float32')
+    index = faiss.IndexFlatIP(DIMENSION)
+    index.add(matrix)
+    index_mib = round(matrix.nbytes / 2**20, 2)
+
+    def build():
+        fresh = faiss.IndexFlatIP(DIMENSION)
+        fresh.add(matrix)
+
+    results = {
+        # Rows are consumed one at a time, as calculate_similarity does
+        'parse_embedding': measure(
+            lambda: [len(calculator.parse_embedding(r['embedding'])) for r in reviews], repeats),
+        'normalize_vector': measure(
+            lambda: [calculator.normalize_vector(np.array(parsed[i % unique])).astype('float32')
+                     for i in range(size)], repeats),
+        'vstack': measure(lambda: np.vstack(rows).astype('float32'), repeats),
+        'faiss_build': measure(build, repeats),
+        'faiss_search': measure(lambda: index.search(query_vec, min(top_k, size)), repeats),
+        'embedding_matrix': measure(lambda: calculator.embedding_matrix(reviews), repeats),
+        'matvec_top_k': measure(lambda: calculator.top_k(matrix, query, top_k), repeats),
+        'end_to_end': measure(lambda: calculator.calculate_similarity("쿼리", reviews, top_k), repeats),
+    }
+    results['faiss_build']['peak_mib'] = index_mib
+    results['faiss_search']['peak_mib'] = index_mib
+    return results
+
+
+def print_table(report: Dict[int, Dict[str, Dict[str, float]]]) -> None:
+    """Print stage x size tables for time and memory"""
+    sizes = list(report)
+    stages = list(next(iter(report.values())))
+    for metric, label in (('ms', "time (ms)"), ('peak_mib', "peak memory (MiB)")):
+        print(f"\n{label}")
+        print("stage".ljust(18) + "".join(f"{size:>12}" for size in sizes))
+        for stage in stages:
+            print(stage.ljust(18) + "".join(f"{report[size][stage][metric]:>12}" for size in sizes))
+
+
+def main(argv: List[str] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark SimilarityCalculator stages")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--top-k", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage (sizes >= 10k run once)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for size in args.sizes:
+        repeats = 1 if size >= 10000 else args.repeats
+        report[size] = bench_size(size, args.top_k, repeats, args.seed)
+        print(f"{size} candidates done", flush=True)
+
+    print_table(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'dimension': DIMENSION, 'faiss': faiss.__version__, 'results': report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Local OpenAI-compatible stand-in server for offline benchmarking and tests
+
+Implements /v1/chat/completions and /v1/embeddings with configurable latency,
+error and 429 injection, and deterministic embeddings. Point every client at
+it with a single switch:
+
+    python -m benchmarks.fake_openai_server --port 8001 --chat-latency lognormal:800:0.4
+    export OPENAI_BASE_URL=http://localhost:8001/v1
+"""
+import re
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from flask import Flask, jsonify, request
+
+from app.ai.prompt_manager import PromptManager
+from app.ai.intent_matcher import IntentMatcher
+from app.core.aspect_scores import ASPECT_CATEGORIES
+
+
+EMBEDDING_DIMENSIONS = 1536
+
+# Keywords used to sort review sentences into the chunking categories
+CHUNK_CATEGORY_KEYWORDS = {
+    "검사/진료": ("검사", "진료", "치료", "MRI", "CT", "장비", "수술"),
+    "전문성/친절도": ("친절", "설명", "의사", "선생님", "간호사"),
+    "예약/안내": ("예약", "대기", "접수", "안내"),
+    "환경/시설": ("깨끗", "시설", "청결", "대기실", "넓"),
+    "교통/접근성": ("주차", "역", "교통", "버스", "위치"),
+    "비용": ("비용", "진료비", "가격", "비싸", "저렴", "보험"),
+    "만족/평가": ("만족", "추천", "재방문"),
+}
+
+
+def deterministic_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Deterministic unit-norm embedding built by hashing character n-grams
+
+    Texts sharing many n-grams get similar vectors, so retrieval behaves
+    plausibly without a real model.
+
+    Args:
+        text: Input text
+        dimensions: Embedding dimensionality
+
+    Returns:
+        np.ndarray: float32 unit vector
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    compact = re.sub(r"\s+", " ", text.strip().lower())
+    grams = [compact[i:i + n] for n in (1, 2, 3) for i in range(len(compact) - n + 1)]
+    for gram in grams or [""]:
+        digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimensions
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class LatencyModel:
+    """Samples artificial latency from a configured distribution"""
+
+    def __init__(self, spec: str, rng: random.Random):
+        """
+        Initialize latency model
+
+        Args:
+            spec: "fixed:MS", "uniform:MIN_MS:MAX_MS", "normal:MEAN_MS:STD_MS"
+                  or "lognormal:MEDIAN_MS:SIGMA"
+            rng: Random generator shared by the server
+        """
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self.rng = rng
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        """
+        Sample one latency
+
+        Returns:
+            float: Latency in seconds
+        """
+        if self.kind == "fixed":
+            ms = self.params[0] if self.params else 0.0
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            ms = self.rng.gauss(self.params[0], self.params[1])
+        else:
+            ms = self.rng.lognormvariate(np.log(max(self.params[0], 1e-3)), self.params[1])
+        return max(ms, 0.0) / 1000.0
+
+
+class FakeOpenAIServer:
+    """Flask app emulating the subset of the OpenAI API used by this project"""
+
+    def __init__(self, chat_latency: str = "fixed:0", embedding_latency: str = "fixed:0",
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 0):
+        """
+        Initialize fake server
+
+        Args:
+            chat_latency: Latency spec for chat completions
+            embedding_latency: Latency spec for embeddings
+            error_rate: Fraction of requests answered with HTTP 500
+            rate_limit_rate: Fraction of requests answered with HTTP 429
+            seed: Seed for latency and fault injection
+        """
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.chat_latency = LatencyModel(chat_latency, self.rng)
+        self.embedding_latency = LatencyModel(embedding_latency, self.rng)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.intent_matcher = IntentMatcher()
+
+        self.app = Flask(__name__)
+        self.app.route("/v1/chat/completions", methods=["POST"])(self.chat_completions)
+        self.app.route("/v1/embeddings", methods=["POST"])(self.embeddings)
+        self.app.route("/v1/models", methods=["GET"])(self.models)
+
+    def _inject(self, latency: LatencyModel):
+        """Sleep for the sampled latency and return an error response if one is injected"""
+        with self.rng_lock:
+            delay = latency.sample()
+            roll = self.rng.random()
+        time.sleep(delay)
+
+        if roll < self.rate_limit_rate:
+            response = jsonify({"error": {"message": "Rate limit reached (injected)",
+                                          "type": "rate_limit_exceeded", "code": "rate_limit_exceeded"}})
+            response.status_code = 429
+            response.headers["Retry-After"] = "1"
+            return response
+        if roll < self.rate_limit_rate + self.error_rate:
+            response = jsonify({"error": {"message": "Internal server error (injected)",
+                                          "type": "server_error", "code": None}})
+            response.status_code = 500
+            return response
+        return None
+
+    def models(self):
+        """List the models this server pretends to serve"""
+        return jsonify({"object": "list", "data": [
+            {"id": model, "object": "model", "owned_by": "fake"}
+            for model in ("gpt-4o", "gpt-4o-mini", "text-embedding-3-small")
+        ]})
+
+    def embeddings(self):
+        """Handle /v1/embeddings"""
+        error = self._inject(self.embedding_latency)
+        if error is not None:
+            return error
+
+        body = request.get_json(force=True)
+        inputs = body.get("input", "")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(body.get("dimensions") or EMBEDDING_DIMENSIONS)
+        as_base64 = body.get("encoding_format") == "base64"
+
+        data = []
+        for i, text in enumerate(inputs):
+            vector = deterministic_embedding(text, dimensions)
+            embedding = (base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+                         if as_base64 else vector.tolist())
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(len(text) for text in inputs)
+        return jsonify({
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    def chat_completions(self):
+        """Handle /v1/chat/completions"""
+        error = self._inject(self.chat_latency)
+        if error is not None:
+            return error
+
+        body = request.get_json(force=True)
+        messages = body.get("messages", [])
+        content = self._reply(messages, body.get("response_format"))
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages)
+        return jsonify({
+            "id": "chatcmpl-fake-" + hashlib.md5(content.encode("utf-8")).hexdigest()[:12],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content),
+                      "total_tokens": prompt_tokens + len(content)}
+        })
+
+    def _reply(self, messages: List[Dict[str, str]], response_format: Optional[Dict]) -> str:
+        """Produce a deterministic reply shaped like the real model's for each known prompt"""
+        system = messages[0].get("content", "") if messages else ""
+        user = messages[-1].get("content", "") if messages else ""
+
+        if system == PromptManager.get_system_prompt()["content"]:
+            return self._intent_reply(messages)
+        if system == PromptManager.RAG_SYSTEM_PROMPT:
+            if response_format and response_format.get("type") == "json_object":
+                return self._batch_rag_reply(user)
+            return self._rag_reply(user)
+        if "의미 범주" in system:
+            return self._chunk_reply(user)
+        return f"[fake] {hashlib.md5(user.encode('utf-8')).hexdigest()[:8]} {user.strip()[:60]}"
+
+    def _intent_reply(self, messages: List[Dict[str, str]]) -> str:
+        user_turns = [m["content"] for m in messages if m.get("role") == "user"]
+        data = self.intent_matcher.match("\n".join(user_turns))
+        if data is None and len(user_turns) < 2:
+            return "정확한 병원 추천을 위해 현재 계신 곳의 위치 정보가 필요합니다. 어느 지역(시/도, 시/군/구)에 계신가요? 증상은 언제부터 있었나요?"
+        if data is None:
+            data = {"city": "서울", "district": "강남구", "hospital_type": "의원",
+                    "department_name": "내과", "equipment_name": None,
+                    "preference": "", "explanation": "기본 추천"}
+        return "```json\n" + json.dumps(data, ensure_ascii=False, indent=2) + "\n```"
+
+    def _rag_reply(self, prompt: str) -> str:
+        name = re.search(r"병원명: (.+)", prompt)
+        name = name.group(1).strip() if name else "병원"
+        score = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16) % 5 + 1
+        return "\n".join([
+            f"1. 병원 요약: {name}의 리뷰 요약을 바탕으로 한 분석입니다.",
+            "2. 강점:\n• 친절한 설명",
+            "3. 약점:\n• 대기 시간",
+            "4. 요구사항 적합성: 보통",
+            f"5. 추천 점수: {score}",
+            "6. 추천 이유: 리뷰 내용이 요구사항과 일부 일치합니다.",
+            "7. 주의사항: 없음",
+        ])
+
+    def _batch_rag_reply(self, prompt: str) -> str:
+        targets = prompt.split("[분석 대상]", 1)[-1].split("[사용자 요구사항]", 1)[0]
+        hospital_ids = re.findall(r'"hospital_id": "(.*?)"', targets)
+        hospitals = []
+        for hospital_id in hospital_ids:
+            score = int(hashlib.md5(hospital_id.encode("utf-8")).hexdigest(), 16) % 5 + 1
+            hospitals.append({
+                "hospital_id": hospital_id,
+                "summary": "리뷰 요약을 바탕으로 한 분석입니다.",
+                "strengths": ["친절한 설명"],
+                "weaknesses": ["대기 시간"],
+                "fit": "보통",
+                "score": score,
+                "reason": "리뷰 내용이 요구사항과 일부 일치합니다.",
+                "cautions": "없음"
+            })
+        return json.dumps({"hospitals": hospitals}, ensure_ascii=False)
+
+    def _chunk_reply(self, prompt: str) -> str:
+        review = prompt.split("```")[1] if "```" in prompt else prompt
+        chunks = {category: [] for category in ASPECT_CATEGORIES}
+        for sentence in re.split(r"(?<=[.!?])\s+|\n+", review):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            category = next(
+                (c for c, keywords in CHUNK_CATEGORY_KEYWORDS.items()
+                 if any(k in sentence for k in keywords)),
+                "기타"
+            )
+            chunks[category].append(sentence)
+        return json.dumps({c: s for c, s in chunks.items() if s}, ensure_ascii=False)
+
+
+def main(argv: List[str] = None):
+    """Run the fake server from the command line"""
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible fake server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--chat-latency", default="fixed:0",
+                        help="fixed:MS | uniform:MIN:MAX | normal:MEAN:STD | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--embedding-latency", default="fixed:0")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of HTTP 429 responses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        chat_latency=args.chat_latency,
+        embedding_latency=args.embedding_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1 "
+          f"(set OPENAI_BASE_URL to this address)", file=sys.stderr)
+    server.app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+End-to-end load generator for the recommendation flow
+
+Drives the chat endpoint with multi-turn Korean conversations at a fixed
+concurrency and reports throughput, latency percentiles, error rate and a
+per-stage breakdown taken from the Server-Timing header. Results are stored
+as JSON so runs can be compared across commits and gunicorn configurations.
+
+Note that the app keeps a single conversation per worker process, so
+concurrent virtual users share (and reset) each other's history. Latency
+numbers are still representative; per-conversation answers are not.
+
+Typical setup (all local, no paid API calls):
+
+    python -m benchmarks.fake_openai_server --port 8001 --chat-latency lognormal:800:0.4 &
+    export OPENAI_BASE_URL=http://localhost:8001/v1 DATABASE_URL=postgresql://localhost/hospital_bench
+    python -m benchmarks.seed_database --hospitals 2000
+    gunicorn -w 4 -b :5000 wsgi:application &
+    python -m benchmarks.load_test run --url http://localhost:5000 --concurrency 8 --conversations 200
+    python -m benchmarks.load_test compare results/a.json results/b.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import subprocess
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+import requests
+
+
+# Multi-turn conversations: first turns mix complete and incomplete requests
+CONVERSATIONS = [
+    ["강남구 정형외과 허리 통증"],
+    ["서울 강남구에서 복통이 심해요. 주차 편한 곳이면 좋겠어요"],
+    ["허리가 너무 아파요", "서울 송파구에 살아요", "디스크 같아요. 정형외과로 가고 싶어요"],
+    ["두통이 일주일째 계속돼요", "마포구 쪽이에요"],
+    ["아이가 열이 나요", "서울 노원구", "소아청소년과 의원 찾아주세요"],
+    ["서울시 서초구 여드름 피부과 추천해주세요. 진료비 저렴한 곳"],
+    ["사랑니가 아파요", "서울 관악구입니다", "치과의원이면 돼요"],
+    ["요즘 잠을 못 자고 불안해요", "서울 용산구", "정신건강의학과 가고 싶어요"],
+    ["비염 때문에 코막힘이 심해요", "서울 성동구 이비인후과", "예약 가능한 곳이면 좋겠어요"],
+    ["서울 영등포구 내과 소화불량", "친절한 의사 선생님이었으면 좋겠어요"],
+    ["무릎 관절통이 있어요", "서울 동작구 정형외과, 지하철역에서 가까운 곳"],
+    ["서울 강동구 안과 시력 저하"],
+]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile in milliseconds-rounded form, or None for no data"""
+    return round(float(np.percentile(values, q)), 2) if values else None
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    Parse a Server-Timing header
+
+    Args:
+        header: Header value, e.g. 'intent_llm;dur=812.3, search_hospitals;dur=4.1'
+
+    Returns:
+        Dict[str, float]: Stage name to duration in milliseconds
+    """
+    stages = {}
+    for entry in filter(None, (e.strip() for e in (header or "").split(","))):
+        name, *params = entry.split(";")
+        for param in params:
+            match = re.match(r"\s*dur=([\d.]+)", param)
+            if match:
+                stages[name.strip()] = float(match.group(1))
+    return stages
+
+
+def git_commit() -> Optional[str]:
+    """Current commit hash, if run inside the repository"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class LoadTest:
+    """Runs conversations concurrently and aggregates per-request measurements"""
+
+    def __init__(self, base_url: str, endpoint: str = "/", mode: str = "form",
+                 timeout: float = 120.0, seed: int = 0):
+        """
+        Initialize load test
+
+        Args:
+            base_url: Application base URL
+            endpoint: Chat endpoint path
+            mode: "form" posts user_input as form data, "json" posts a JSON body
+            timeout: Per-request timeout in seconds
+            seed: Seed for conversation selection
+        """
+        self.base_url = base_url.rstrip("/")
+        self.endpoint = endpoint
+        self.mode = mode
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.samples: List[Dict] = []
+        self.samples_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        """One keep-alive session per worker thread"""
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _post_turn(self, session: requests.Session, user_input: str, turn: int) -> None:
+        """Send one user turn and record the measurement"""
+        url = f"{self.base_url}{self.endpoint}"
+        start = time.perf_counter()
+        status, stages, error = None, {}, None
+        try:
+            if self.mode == "json":
+                response = session.post(url, json={"user_input": user_input}, timeout=self.timeout)
+            else:
+                response = session.post(url, data={"user_input": user_input}, timeout=self.timeout)
+            status = response.status_code
+            stages = parse_server_timing(response.headers.get("Server-Timing", ""))
+        except requests.RequestException as e:
+            error = type(e).__name__
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self.samples_lock:
+            self.samples.append({
+                "turn": turn,
+                "latency_ms": elapsed_ms,
+                "status": status,
+                "ok": error is None and status is not None and status < 400,
+                "error": error,
+                "stages": stages,
+            })
+
+    def run_conversation(self, _index: int) -> None:
+        """Run one randomly chosen conversation from a fresh chat state"""
+        with self.rng_lock:
+            conversation = self.rng.choice(CONVERSATIONS)
+        session = self._session()
+        try:
+            session.post(f"{self.base_url}/reset", timeout=self.timeout, allow_redirects=False)
+        except requests.RequestException:
+            pass
+        for turn, user_input in enumerate(conversation, 1):
+            self._post_turn(session, user_input, turn)
+
+    def run(self, concurrency: int, conversations: int) -> Dict:
+        """
+        Run the load test
+
+        Args:
+            concurrency: Number of concurrent virtual users
+            conversations: Total number of conversations to run
+
+        Returns:
+            Dict: Summary report
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(self.run_conversation, range(conversations)))
+        wall_seconds = time.perf_counter() - start
+        return self.summarize(wall_seconds, concurrency, conversations)
+
+    def summarize(self, wall_seconds: float, concurrency: int, conversations: int) -> Dict:
+        """Aggregate recorded samples into a report"""
+        latencies = [s["latency_ms"] for s in self.samples]
+        ok_latencies = [s["latency_ms"] for s in self.samples if s["ok"]]
+        errors = [s for s in self.samples if not s["ok"]]
+
+        stage_values = defaultdict(list)
+        for sample in self.samples:
+            for stage, duration in sample["stages"].items():
+                stage_values[stage].append(duration)
+
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "base_url": self.base_url,
+                "endpoint": self.endpoint,
+                "concurrency": concurrency,
+                "conversations": conversations,
+                "web_concurrency": os.getenv("WEB_CONCURRENCY"),
+                "gunicorn_cmd_args": os.getenv("GUNICORN_CMD_ARGS"),
+            },
+            "requests": len(self.samples),
+            "wall_seconds": round(wall_seconds, 3),
+            "throughput_rps": round(len(self.samples) / wall_seconds, 3) if wall_seconds else None,
+            "error_rate": round(len(errors) / len(self.samples), 4) if self.samples else None,
+            "errors": dict(Counter(e["error"] or f"HTTP {e['status']}" for e in errors)),
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": round(float(np.mean(latencies)), 2) if latencies else None,
+                "ok_p50": percentile(ok_latencies, 50),
+            },
+            "stages_ms": {
+                stage: {
+                    "count": len(values),
+                    "mean": round(float(np.mean(values)), 2),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "p99": percentile(values, 99),
+                }
+                for stage, values in sorted(stage_values.items())
+            },
+        }
+
+
+def compare(paths: List[str]) -> None:
+    """Print key metrics of several result files side by side"""
+    reports = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            reports.append(json.load(f))
+
+    rows = [
+        ("commit", lambda r: r["meta"].get("commit")),
+        ("concurrency", lambda r: r["meta"].get("concurrency")),
+        ("web_concurrency", lambda r: r["meta"].get("web_concurrency")),
+        ("throughput_rps", lambda r: r.get("throughput_rps")),
+        ("error_rate", lambda r: r.get("error_rate")),
+        ("p50_ms", lambda r: r["latency_ms"].get("p50")),
+        ("p95_ms", lambda r: r["latency_ms"].get("p95")),
+        ("p99_ms", lambda r: r["latency_ms"].get("p99")),
+    ]
+    stages = sorted({stage for r in reports for stage in r.get("stages_ms", {})})
+    for stage in stages:
+        rows.append((f"{stage}_p95_ms",
+                     lambda r, s=stage: r.get("stages_ms", {}).get(s, {}).get("p95")))
+
+    width = max(len(name) for name, _ in rows) + 2
+    print("".ljust(width) + "".join(os.path.basename(p)[:24].ljust(26) for p in paths))
+    for name, getter in rows:
+        print(name.ljust(width) + "".join(str(getter(r)).ljust(26) for r in reports))
+
+
+def main(argv: List[str] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load test for the recommendation flow")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run a load test")
+    run_parser.add_argument("--url", default="http://localhost:5000")
+    run_parser.add_argument("--endpoint", default="/")
+    run_parser.add_argument("--mode", choices=["form", "json"], default="form")
+    run_parser.add_argument("--concurrency", type=int, default=4)
+    run_parser.add_argument("--conversations", type=int, default=50)
+    run_parser.add_argument("--timeout", type=float, default=120.0)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<time>_<commit>.json)")
+
+    compare_parser = sub.add_parser("compare", help="Compare result files")
+    compare_parser.add_argument("paths", nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        compare(args.paths)
+        return
+
+    test = LoadTest(args.url, args.endpoint, args.mode, args.timeout, args.seed)
+    report = test.run(args.concurrency, args.conversations)
+
+    output = args.output
+    if not output:
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(os.path.dirname(__file__), "results",
+                              f"load_{stamp}_{report['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps({k: report[k] for k in ("requests", "throughput_rps", "error_rate", "latency_ms")},
+                     ensure_ascii=False, indent=2))
+    print(f"Results saved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Seed a local Postgres with synthetic hospitals for load tests and benchmarks
+
+Creates the tables the recommendation flow reads (city, district,
+hospital_type, departments, hospitals, hospital_departments,
+review_summaries) and fills them with deterministic synthetic data whose
+review embeddings come from the fake OpenAI server's embedding function.
+
+    DATABASE_URL=postgresql://localhost/hospital_bench python -m benchmarks.seed_database --hospitals 2000
+"""
+import random
+import argparse
+from typing import List
+from sqlalchemy import text
+
+from app.utils.database import get_database_connection
+from app.ai.intent_matcher import IntentMatcher, SEOUL_DISTRICTS
+from benchmarks.fake_openai_server import deterministic_embedding
+
+
+REVIEW_SENTENCES = {
+    "검사/진료": ["MRI 검사를 당일에 받을 수 있었다.", "물리치료 과정이 체계적이다.", "검사 과정 설명이 부족했다."],
+    "전문성/친절도": ["의사 선생님이 친절하게 설명해 주었다.", "간호사 응대가 다소 불친절했다."],
+    "예약/안내": ["모바일 예약이 편리하다.", "대기 시간이 길었다.", "야간진료를 한다."],
+    "환경/시설": ["대기실이 넓고 깨끗하다.", "시설이 오래되었다."],
+    "교통/접근성": ["지하철역에서 가깝다.", "주차 공간이 협소하다.", "주차가 편리하다."],
+    "비용": ["진료비가 저렴한 편이다.", "비급여 항목이 비쌌다."],
+}
+
+# Most load-test conversations hit these, so they get most of the hospitals
+COMMON_TYPES = ("의원", "병원", "종합병원", "정신병원", "치과의원", "한의원")
+COMMON_DEPARTMENTS = ("내과", "정형외과", "신경과", "피부과", "이비인후과", "가정의학과",
+                      "정신건강의학과", "신경외과", "산부인과", "안과")
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS city (code TEXT PRIMARY KEY, name TEXT)",
+    "CREATE TABLE IF NOT EXISTS district (code TEXT PRIMARY KEY, name TEXT)",
+    "CREATE TABLE IF NOT EXISTS hospital_type (code TEXT PRIMARY KEY, name TEXT)",
+    "CREATE TABLE IF NOT EXISTS departments (department_code TEXT PRIMARY KEY, department_name TEXT)",
+    """CREATE TABLE IF NOT EXISTS hospitals (
+        id TEXT PRIMARY KEY, name TEXT, type_code TEXT, city_code TEXT, district_code TEXT,
+        town TEXT, address TEXT, tel TEXT, url TEXT, lat DOUBLE PRECISION, lon DOUBLE PRECISION)""",
+    """CREATE TABLE IF NOT EXISTS hospital_departments (
+        hospital_id TEXT, department_code TEXT, specialist_count INTEGER,
+        PRIMARY KEY (hospital_id, department_code))""",
+]
+
+
+def _review_text(rng: random.Random) -> str:
+    """Build a review summary in the generate_review_summaries output format"""
+    lines = []
+    for category, sentences in REVIEW_SENTENCES.items():
+        picked = rng.sample(sentences, k=rng.randint(1, len(sentences)))
+        lines.append(f"{category}: {' '.join(picked)}")
+    return "\n".join(lines)
+
+
+def seed_database(hospitals: int = 2000, seed: int = 0, reset: bool = False) -> None:
+    """
+    Create tables and insert synthetic data
+
+    Args:
+        hospitals: Number of hospitals to create
+        seed: Random seed
+        reset: Drop seeded tables first
+    """
+    rng = random.Random(seed)
+    matcher = IntentMatcher()
+    departments: List[str] = list(matcher.department_keywords)
+    hospital_types: List[str] = matcher.hospital_types
+
+    engine = get_database_connection()
+    with engine.begin() as conn:
+        if reset:
+            for table in ("review_summaries", "hospital_departments", "hospitals",
+                          "departments", "hospital_type", "district", "city"):
+                conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+
+        # pgvector is optional: SimilarityCalculator also parses text embeddings
+        has_vector = conn.execute(text(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'vector'"
+        )).first() is not None
+        if has_vector:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        embedding_type = "vector(1536)" if has_vector else "TEXT"
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS review_summaries (
+                hospital_id TEXT PRIMARY KEY REFERENCES hospitals(id),
+                name TEXT, review TEXT, embedding {embedding_type})
+        """))
+
+        conn.execute(text("INSERT INTO city VALUES ('110000', '서울') ON CONFLICT DO NOTHING"))
+        conn.execute(
+            text("INSERT INTO district VALUES (:code, :name) ON CONFLICT DO NOTHING"),
+            [{"code": f"1100{i:02d}", "name": name} for i, name in enumerate(SEOUL_DISTRICTS, 1)]
+        )
+        conn.execute(
+            text("INSERT INTO hospital_type VALUES (:code, :name) ON CONFLICT DO NOTHING"),
+            [{"code": f"{i:02d}", "name": name} for i, name in enumerate(hospital_types, 1)]
+        )
+        conn.execute(
+            text("INSERT INTO departments VALUES (:code, :name) ON CONFLICT DO NOTHING"),
+            [{"code": f"{i:02d}", "name": name} for i, name in enumerate(departments, 1)]
+        )
+
+        hospital_rows, department_rows, review_rows = [], [], []
+        for i in range(hospitals):
+            hospital_id = f"BENCH{i:06d}"
+            district_idx = rng.randrange(len(SEOUL_DISTRICTS))
+            name = f"벤치{i}{rng.choice(['정형외과', '내과', '의원', '병원', '치과의원', '한의원'])}"
+            hospital_type = rng.choice(COMMON_TYPES if rng.random() < 0.9 else hospital_types)
+            hospital_rows.append({
+                "id": hospital_id, "name": name,
+                "type_code": f"{hospital_types.index(hospital_type) + 1:02d}",
+                "city_code": "110000", "district_code": f"1100{district_idx + 1:02d}",
+                "town": "", "address": f"서울 {SEOUL_DISTRICTS[district_idx]} 테스트로 {i}",
+                "tel": f"02-000-{i % 10000:04d}", "url": "",
+                "lat": 37.5 + rng.random() / 10, "lon": 127.0 + rng.random() / 10,
+            })
+            hospital_departments = set(rng.sample(COMMON_DEPARTMENTS, k=2))
+            hospital_departments.add(rng.choice(departments))
+            for department in hospital_departments:
+                department_rows.append({
+                    "hospital_id": hospital_id,
+                    "department_code": f"{departments.index(department) + 1:02d}",
+                    "specialist_count": rng.randint(0, 5),
+                })
+            review = _review_text(rng)
+            review_rows.append({
+                "hospital_id": hospital_id, "name": name, "review": review,
+                "embedding": str(deterministic_embedding(review).tolist()),
+            })
+
+        conn.execute(text("""
+            INSERT INTO hospitals VALUES (:id, :name, :type_code, :city_code, :district_code,
+                                          :town, :address, :tel, :url, :lat, :lon)
+            ON CONFLICT DO NOTHING
+        """), hospital_rows)
+        conn.execute(text("""
+            INSERT INTO hospital_departments VALUES (:hospital_id, :department_code, :specialist_count)
+            ON CONFLICT DO NOTHING
+        """), department_rows)
+        conn.execute(text("""
+            INSERT INTO review_summaries VALUES (:hospital_id, :name, :review, :embedding)
+            ON CONFLICT DO NOTHING
+        """), review_rows)
+
+    print(f"Seeded {hospitals} hospitals across {len(SEOUL_DISTRICTS)} districts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a local Postgres with synthetic hospitals")
+    parser.add_argument("--hospitals", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="Drop seeded tables first")
+    args = parser.parse_args()
+    seed_database(args.hospitals, args.seed, args.reset)
@@ -1,39 +1,168 @@
+import json
+import re
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import Timeout, HTTPError, RequestException
+from urllib3.util.retry import Retry
+
+from database.api.hospital_openapi.response_cache import CacheMissError, ResponseCache, cache_from_env
 
 # --- Configuration ---
 
 # SERVICE_KEY = "GTDvWSPwxWuonrDpSoJFdpfsGL10NYvxqG3hCEwNTdMp39xqNkgVUXR7+ywZsErmVoAtkLW18guG1SgF6Dcnaw==" # old
 SERVICE_KEY = "Fbq4OmxpKYD/RUVgN0+nZgm02P3BojouPbc4z3JApBzD39BllVOYadxrCb8evD0XHNbQUSSt8nwZanr5Vw7qDQ==" # new
 
+TIMEOUT = (10, 60)          # (connect, read) seconds
+MAX_RETRIES = 5             # per call, on connection errors, read timeouts and retryable statuses
+BACKOFF_FACTOR = 1.0        # sleeps 0s, 2s, 4s, 8s, ... between retries
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 16              # keep-alive connections per host (>= number of worker threads)
+
+# data.go.kr result code for an exhausted daily quota (LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR).
+# It is sent as an XML error document with HTTP 200, even when JSON was requested.
+QUOTA_EXCEEDED_CODE = "22"
+SUCCESS_CODE = "00"
+_XML_REASON_CODE = re.compile(r"<returnReasonCode>\s*(\d+)\s*</returnReasonCode>")
+_JSON_RESULT_CODE = re.compile(r'"resultCode"\s*:\s*"?(\d+)"?')
+
+
+class QuotaExceededError(RuntimeError):
+    """The service key has used up its daily request quota for this API"""
+
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_request_hooks = []
+
+
+def get_cache() -> ResponseCache:
+    """
+    Returns the process-wide response cache (configured from OPENAPI_CACHE_* env vars).
+    """
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = cache_from_env()
+        return _cache
+
+
+def set_cache(cache: ResponseCache):
+    """
+    Replaces the process-wide response cache (e.g. ResponseCache(mode="replay")).
+    """
+    global _cache
+    with _session_lock:
+        _cache = cache
+
+
+def add_request_hook(hook):
+    """
+    Registers hook(endpoint), called before every network request (not for cache hits).
+    A hook may raise (e.g. QuotaExceededError) to cancel the request.
+    """
+    _request_hooks.append(hook)
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide keep-alive session, creating it on first use.
+    Retries with exponential backoff are handled by the mounted adapter.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                connect=MAX_RETRIES,
+                read=MAX_RETRIES,
+                status=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,  # let raise_for_status() report the final response
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def result_code(text: str):
+    """
+    Result code of a response body (XML error document or JSON header), or None.
+    """
+    head = text[:2000]
+    match = _XML_REASON_CODE.search(head) or _JSON_RESULT_CODE.search(head)
+    return match.group(1) if match else None
+
+
+def check_quota(text: str, url: str = ""):
+    """
+    Raises QuotaExceededError if a response body carries result code 22,
+    either in the XML error document or in a JSON header.
+    """
+    if result_code(text) == QUOTA_EXCEEDED_CODE:
+        raise QuotaExceededError(f"Daily quota exceeded calling {url}")
+
+
+def is_cacheable(text: str) -> bool:
+    """
+    Only successful bodies are cached: an error envelope (resultCode other than 00)
+    would otherwise be replayed as data for the whole TTL.
+    """
+    return result_code(text) in (None, SUCCESS_CODE)
+
+
 # --- Helper Function to Make API Call ---
-def call_api(base_url: str, endpoint: str, params: dict, return_json=True):
+def call_api(base_url: str, endpoint: str, params: dict, return_json=True, session: requests.Session = None):
     """
     Calls the specified API service and endpoint with parameters.
-    
+
     :param base_url: API base URL (e.g., "http://apis.data.go.kr/B551182/hospInfoServicev2")
     :param endpoint: API endpoint string (e.g., "/getHospBasisList")
-    :param params: Dictionary of query parameters
+    :param params: Dictionary of query parameters (not modified)
     :param return_json: Whether to parse response as JSON
-    :return: Parsed response or raw text
+    :param session: Session to use (defaults to the shared keep-alive session)
+    :return: Parsed response or raw text (served from the response cache when enabled)
+    :raises QuotaExceededError: when the daily quota of SERVICE_KEY is used up
+    :raises RuntimeError: on timeouts, HTTP errors and other request failures (after retries)
     """
-    timeout = 60 # seconds
-    try:
-        url = f"{base_url}{endpoint}"
-        params["ServiceKey"] = SERVICE_KEY
-        params["_type"] = "json"
+    url = f"{base_url}{endpoint}"
+    params = dict(params)
+    params["_type"] = "json"
+    cache = get_cache()
+    body = cache.get(url, params)
+    if body is not None:
+        if is_cacheable(body):
+            return json.loads(body) if return_json else body
+        # Error body cached by an older version: refetch it (never from replay mode)
+        if cache.mode == "replay":
+            raise CacheMissError(f"Cached response is an error (replay mode): {url} {params}")
 
-        response = requests.get(url, params=params, timeout=timeout)
+    for hook in _request_hooks:
+        hook(endpoint)
+    params["ServiceKey"] = SERVICE_KEY
+    try:
+        response = (session or get_session()).get(url, params=params, timeout=TIMEOUT)
         response.raise_for_status()
-        return response.json() if return_json else response.text
+        check_quota(response.text, url)
+        parsed = response.json() if return_json else response.text
+        if is_cacheable(response.text):
+            cache.put(url, params, response.text)
+        return parsed
     except Timeout:
         # caller can catch this specifically if desired
-        raise RuntimeError(f"Timeout ({timeout}s) calling {url}")
+        raise RuntimeError(f"Timeout ({TIMEOUT[1]}s) calling {url} after {MAX_RETRIES} retries")
     except HTTPError as he:
-        # 4xx, 5xx responses
-        status = he.response.status_code if he.response else "?"
-        text   = he.response.text       if he.response else ""
+        # 4xx, 5xx responses (a Response with an error status is falsy, so compare with None)
+        status = he.response.status_code if he.response is not None else "?"
+        text   = he.response.text        if he.response is not None else ""
         raise RuntimeError(f"HTTP {status} calling {url}: {text}") from he
     except RequestException as re:
         # includes ConnectionError, TooManyRedirects, etc.
-        raise RuntimeError(f"Request failed calling {url}: {re}") from re
\ No newline at end of file
+        raise RuntimeError(f"Request failed calling {url}: {re}") from re
@@ -53,3 +53,14 @@ API_PARAMS = {
     }
 
 }
+
+# Daily request quotas per endpoint for SERVICE_KEY (data.go.kr counts each operation separately,
+# the window resets at midnight KST). Development keys get 10,000 calls per operation per day;
+# keep these slightly below the granted traffic since retried calls also count.
+API_DAILY_QUOTAS = {
+    "/getHospBasisList": 9500,
+    "/getSpcSbjtSdrInfo2.7": 9500,
+    "/getMedOftInfo2.7": 9500,
+    "/getDtlInfo2.7": 9500,
+    "/getHospAsmInfo1": 9500,
+}
@@ -0,0 +1,158 @@
+# detail_pipeline.py
+# One pass over the hospital list that fetches every HOSP_DETAIL endpoint per ykiho.
+#
+# Calls for all configured endpoints (departments, equipments, operating hours) of a
+# hospital are issued concurrently, with a bounded number of hospitals in flight, over
+# the shared keep-alive session of api.call_api. Results fan out to one checkpointed
+# streaming writer per endpoint (hospital_departments, hospital_equipments, hospital_operating_hours),
+# so progress is saved and resumed per endpoint exactly like the single-endpoint scripts.
+#
+#   python -m database.api.hospital_openapi.detail_pipeline --all-hospitals --workers 4 --respect-quota
+
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from database.api.hospital_openapi.api import QuotaExceededError
+from database.api.hospital_openapi.response_cache import CacheMissError
+from database.api.hospital_openapi.quota_scheduler import QuotaScheduler, detail_jobs
+from database.utils.checkpoint_store import CheckpointStore, CheckpointedBatch
+from database.utils.db_utils import get_hospital_ids, get_hospital_ids_fixed
+
+
+def plan_hospitals(store: CheckpointStore, jobs: list, ids: list, stale_after_days: float = None):
+    """
+    Which endpoints each hospital still needs, and the hospital order:
+    hospitals new to any endpoint first, then failed retries, then stale records.
+    """
+    needs = {}
+    tiers = ([], [], [])
+    for endpoint, _, _ in jobs:
+        for tier, planned in zip(tiers, store.plan(endpoint, ids, stale_after_days)):
+            for ykiho in planned:
+                needs.setdefault(ykiho, []).append(endpoint)
+                tier.append(ykiho)
+    order = list(dict.fromkeys(tiers[0] + tiers[1] + tiers[2]))
+    return order, needs
+
+
+def run_detail_pipeline(
+    ids: list,
+    jobs: list,
+    store: CheckpointStore = None,
+    scheduler: QuotaScheduler = None,
+    workers: int = 4,
+    flush_every: int = 100,
+    limit: int = None,
+    stale_after_days: float = None,
+) -> dict:
+    """
+    Fetches all endpoints in `jobs` for each pending hospital.
+
+    :param ids: Hospital IDs (ykiho)
+    :param jobs: (endpoint, fetch, writer factory) tuples
+    :param store: Checkpoint store (defaults to the shared ingestion state file)
+    :param scheduler: Count calls against daily quotas; an exhausted endpoint is
+                      skipped for the rest of the run while the others continue
+    :param workers: Hospitals in flight; up to workers * len(jobs) concurrent calls
+    :param flush_every: Hospitals per DB upload, per endpoint
+    :param limit: Maximum hospitals this run
+    :param stale_after_days: Also refresh records older than this
+    :return: Per-endpoint done/empty/failed counts
+    """
+    if scheduler is not None:
+        store = scheduler.store
+    store = store or CheckpointStore()
+    order, needs = plan_hospitals(store, jobs, ids, stale_after_days)
+    if limit is not None:
+        order = order[:limit]
+    total_calls = sum(len(needs[ykiho]) for ykiho in order)
+    print(f"{len(order)} hospitals, {total_calls} calls over {len(jobs)} endpoints, {workers} hospitals in flight")
+
+    fetchers = {endpoint: scheduler.guard(endpoint, fetch) if scheduler else fetch for endpoint, fetch, _ in jobs}
+    batches = {endpoint: CheckpointedBatch(store, endpoint, make_writer(), flush_every)
+               for endpoint, _, make_writer in jobs}
+    exhausted = set()
+    start = time.perf_counter()
+    calls = 0
+    interrupted = False
+
+    hospitals = iter(order)
+    in_flight = {}   # future -> (ykiho, endpoint)
+    open_hospitals = {}  # ykiho -> calls still running
+
+    def submit_next(pool):
+        for ykiho in hospitals:
+            endpoints = [e for e in needs[ykiho] if e not in exhausted]
+            if not endpoints:
+                continue
+            open_hospitals[ykiho] = len(endpoints)
+            for endpoint in endpoints:
+                in_flight[pool.submit(fetchers[endpoint], ykiho)] = (ykiho, endpoint)
+            return
+
+    with ThreadPoolExecutor(max_workers=workers * len(jobs)) as pool:
+        try:
+            for _ in range(workers):
+                submit_next(pool)
+            while in_flight:
+                finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    ykiho, endpoint = in_flight.pop(future)
+                    calls += 1
+                    try:
+                        batches[endpoint].add(ykiho, future.result())
+                    except QuotaExceededError as e:
+                        if endpoint not in exhausted:
+                            print(f"🔴 {endpoint}: {e}; skipping it for the rest of this run")
+                            exhausted.add(endpoint)
+                    except CacheMissError as e:
+                        batches[endpoint].skip(ykiho, e)
+                    except Exception as e:
+                        batches[endpoint].fail(ykiho, e)
+
+                    open_hospitals[ykiho] -= 1
+                    if open_hospitals[ykiho] == 0:
+                        del open_hospitals[ykiho]
+                        submit_next(pool)
+
+                    if calls % 500 == 0:
+                        elapsed = time.perf_counter() - start
+                        print(f"  [{calls}/{total_calls} calls] {calls / elapsed:.1f} calls/s, "
+                              f"~{elapsed / calls * (total_calls - calls):.0f}s left")
+        except KeyboardInterrupt:
+            print("🔴 Interrupted, flushing completed results")
+            interrupted = True
+            for future in in_flight:
+                future.cancel()
+
+    for batch in batches.values():
+        batch.flush()
+        batch.report()
+        print(f"   rows written: {batch.writer.summary()}")
+    elapsed = time.perf_counter() - start
+    print(f"⏱ {calls} calls in {elapsed:.1f}s ({calls / max(elapsed, 1e-9):.1f} calls/s)")
+    if interrupted:
+        raise KeyboardInterrupt
+    return {endpoint: batch.counts for endpoint, batch in batches.items()}
+
+
+if __name__ == "__main__":
+    available = detail_jobs()
+    parser = argparse.ArgumentParser(description="Fetch all hospital detail endpoints in one resumable pass")
+    parser.add_argument("--jobs", nargs="+", choices=list(available), default=list(available))
+    parser.add_argument("--workers", type=int, default=4, help="Hospitals fetched concurrently")
+    parser.add_argument("--limit", type=int, help="Maximum hospitals to fetch this run")
+    parser.add_argument("--flush-every", type=int, default=100, help="Hospitals per DB upload")
+    parser.add_argument("--stale-days", type=float, help="Also refresh records older than this many days")
+    parser.add_argument("--all-hospitals", action="store_true", help="All hospitals instead of the fixed district subset")
+    parser.add_argument("--respect-quota", action="store_true", help="Count calls against API_DAILY_QUOTAS")
+    parser.add_argument("--delta", action="store_true", help="Write only changed rows, soft-delete vanished ones")
+    args = parser.parse_args()
+
+    available = detail_jobs(delta=args.delta)
+    ids = get_hospital_ids() if args.all_hospitals else get_hospital_ids_fixed()
+    run_detail_pipeline(ids, [available[name] for name in args.jobs],
+                        scheduler=QuotaScheduler() if args.respect_quota else None,
+                        workers=args.workers, flush_every=args.flush_every,
+                        limit=args.limit, stale_after_days=args.stale_days)
@@ -1,77 +1,66 @@
-from database.utils.db_utils import get_hospital_ids_fixed
-from database.api.hospital_openapi.api import call_api
-from database.api.hospital_openapi.api_config import ApiService, API_BASE_URLS, API_ENDPOINTS, API_PARAMS
-from database.utils.data_utils import extract_items_from_response, clean_dataframe
-import pandas as pd
-from database.utils.db_utils import upload_dataframe_ignore_dups
-import time
-from requests.exceptions import RequestException
+import argparse
 
-# ids = get_hospital_ids()
-ids = get_hospital_ids_fixed()
-    
-# ---- Step 3: For each hospital, get hospital detail info by id and attach to table
-equipments_master = []       # Will collect all unique equipment codes + names
-hospital_equipment_records = []   # Will collect each hospital's equipment + count info
+from database.utils.db_utils import get_hospital_ids, get_hospital_ids_fixed
+from database.api.hospital_openapi.api import call_api, QuotaExceededError
+from database.api.hospital_openapi.response_cache import CacheMissError
+from database.api.hospital_openapi.api_config import ApiService, API_BASE_URLS, API_ENDPOINTS
+from database.utils.data_utils import extract_items_from_response, clean_dataframe
+from database.utils.checkpoint_store import CheckpointStore, run_with_checkpoints
+from database.utils.streaming_writer import DeltaTableWriter, FanOutWriter, StreamingTableWriter
 
-# Get detail information for each hospital using id
-start_idx = 45370
-request_count = 0
-# batch_size = 1000
-batch_size = 2980
-# for id in ids[start_idx:]:
-for id in ids:
-    ## Log request count
-    if request_count >= batch_size:
-      break
-    request_count += 1
-    print(f"[{request_count}/{batch_size}]")
-    try:
-        time.sleep(0.1)
-        ## API CALL (HOSP_DETAIL)
-        detail_response = call_api(base_url=API_BASE_URLS[ApiService.HOSP_DETAIL], endpoint=API_ENDPOINTS[ApiService.HOSP_DETAIL]["EQUIPMENT_INFO"], params={
-            "serviceKey": "Fbq4OmxpKYD/RUVgN0+nZgm02P3BojouPbc4z3JApBzD39BllVOYadxrCb8evD0XHNbQUSSt8nwZanr5Vw7qDQ==",
-            "ykiho": id,
-            "pageNo": 1,
-            "numOfRows": 1000,
-            "_type": "json"
-        })
-        print(f"Detail response for {id}: {detail_response}")
+ENDPOINT = API_ENDPOINTS[ApiService.HOSP_DETAIL]["EQUIPMENT_INFO"]
 
-        detail_df = extract_items_from_response(detail_response)
-        if detail_df.empty:
-            print(f"ℹ️ No items for {id}, skipping.")
-            continue
-        detail_df_clean = clean_dataframe(detail_df, 
-                                          column_mapping={
-                                              "oftCd": "equipment_code",
-                                              "oftCdNm": "equipment_name",
-                                              "oftCnt": "equipment_count"
-                                              })
-        detail_df_clean["hospital_id"] = id # retain hospital ID for join
 
-        # Collect unique equipments codes and names
-        equipments_master.append(detail_df_clean[["equipment_code", "equipment_name"]])
+def fetch_equipments(id):
+    """
+    Equipment codes and counts for one hospital, or None if the API has no items.
+    """
+    detail_response = call_api(base_url=API_BASE_URLS[ApiService.HOSP_DETAIL], endpoint=ENDPOINT, params={
+        "ykiho": id,
+        "pageNo": 1,
+        "numOfRows": 1000,
+        "_type": "json"
+    })
 
-         # Collect hospital-equipments mapping
-        hospital_equipment_records.append(detail_df_clean[["hospital_id", "equipment_code", "equipment_count"]])
+    detail_df = extract_items_from_response(detail_response)
+    if detail_df.empty:
+        return None
+    detail_df_clean = clean_dataframe(detail_df,
+                                      column_mapping={
+                                          "oftCd": "equipment_code",
+                                          "oftCdNm": "equipment_name",
+                                          "oftCnt": "equipment_count"
+                                          })
+    detail_df_clean["hospital_id"] = id # retain hospital ID for join
+    return detail_df_clean
 
-    except RequestException as e:
-        print(f"⚠️ Request failed for {id}: {e}")
-        continue
-    except Exception as e:
-        print(f"❌ Unexpected error for {id}: {e}")
-        continue
 
-# # Combine and deduplicate equipment codes
-equipments_df = pd.concat(equipments_master).drop_duplicates().reset_index(drop=True)
+def equipments_writer(delta: bool = False):
+    """
+    Streams each hospital's rows to equipment codes first, then hospital-equipment relations.
+    With delta, relation rows are fingerprinted and only changes are written;
+    rows the API no longer returns for a fetched hospital are soft-deleted.
+    """
+    relation_writer = DeltaTableWriter if delta else StreamingTableWriter
+    return FanOutWriter([
+        (StreamingTableWriter("equipments", pk=["equipment_code"], update=False), ["equipment_code", "equipment_name"]),
+        (relation_writer("hospital_equipments", pk=["hospital_id", "equipment_code"]), ["hospital_id", "equipment_code", "equipment_count"]),
+    ])
 
-# # Combine all hospital-equipment relations
-hospital_equipments_df = pd.concat(hospital_equipment_records).reset_index(drop=True)
 
-# ---- Step 4: Upload data to database
-# # Upload equipments codes
-upload_dataframe_ignore_dups(equipments_df, table_name="equipments", pk=["equipment_code"])
-# # Upload hospital-equipment relations
-upload_dataframe_ignore_dups(hospital_equipments_df, table_name="hospital_equipments", pk=["hospital_id", "equipment_code"])
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch medical equipment info for every hospital (resumable)")
+    parser.add_argument("--limit", type=int, help="Maximum hospitals to fetch this run")
+    parser.add_argument("--flush-every", type=int, default=100, help="Hospitals per DB upload")
+    parser.add_argument("--all-hospitals", action="store_true", help="All hospitals instead of the fixed district subset")
+    parser.add_argument("--reset", action="store_true", help="Forget saved progress and start over")
+    parser.add_argument("--delta", action="store_true", help="Write only changed rows, soft-delete vanished ones")
+    args = parser.parse_args()
 
+    store = CheckpointStore()
+    if args.reset:
+        store.reset(ENDPOINT)
+    ids = get_hospital_ids() if args.all_hospitals else get_hospital_ids_fixed()
+    run_with_checkpoints(store, ENDPOINT, ids, fetch_equipments, equipments_writer(delta=args.delta),
+                         flush_every=args.flush_every, limit=args.limit,
+                         stop_on=(QuotaExceededError,), skip_on=(CacheMissError,))
@@ -1,88 +1,92 @@
-from db_utils import get_hospital_ids_fixed
-from api import call_api
-from api_config import ApiService, API_BASE_URLS, API_ENDPOINTS, API_PARAMS
-from data_utils import extract_items_from_response, clean_dataframe
-import pandas as pd
-from db_utils import upload_dataframe, upload_dataframe_ignore_dups
-import time
+import argparse
 
-# ids = get_hospital_ids()
-ids = get_hospital_ids_fixed()
-    
-# ---- Step 3: For each hospital, get hospital detail info by id and attach to table
-hospital_operating_hours_records = [] 
+from database.utils.db_utils import get_hospital_ids, get_hospital_ids_fixed
+from database.api.hospital_openapi.api import call_api, QuotaExceededError
+from database.api.hospital_openapi.response_cache import CacheMissError
+from database.api.hospital_openapi.api_config import ApiService, API_BASE_URLS, API_ENDPOINTS
+from database.utils.data_utils import extract_items_from_response, clean_dataframe
+from database.utils.checkpoint_store import CheckpointStore, run_with_checkpoints
+from database.utils.streaming_writer import DeltaTableWriter, FanOutWriter, StreamingTableWriter
 
-# Get detail information for each hospital using id
-start_idx = 37173
-request_count = 0
-# batch_size = 5000 
-batch_size = 2980
-# for id in ids[start_idx:]:
-for id in ids:
-    ## Log request count
-    if request_count >= batch_size:
-      break
-    request_count += 1
-    print(f"[{request_count}/{batch_size}]")
+ENDPOINT = API_ENDPOINTS[ApiService.HOSP_DETAIL]["OPERATING_HOURS"]
 
-    try:
-        time.sleep(0.1)
-        ## API CALL (HOSP_DETAIL)
-        detail_response = call_api(base_url=API_BASE_URLS[ApiService.HOSP_DETAIL], endpoint=API_ENDPOINTS[ApiService.HOSP_DETAIL]["OPERATING_HOURS"], params={
-            "serviceKey": "Fbq4OmxpKYD/RUVgN0+nZgm02P3BojouPbc4z3JApBzD39BllVOYadxrCb8evD0XHNbQUSSt8nwZanr5Vw7qDQ==",
-            "ykiho": id,
-            "pageNo": 1,
-            "numOfRows": 1000,
-            "_type": "json"
-        })
-        print(f"Detail response for {id}: {detail_response}")
+column_mapping = {
+    "trmtMonStart": "monday_start",
+    "trmtMonEnd": "monday_end",
+    "trmtTueStart": "tuesday_start",
+    "trmtTueEnd": "tuesday_end",
+    "trmtWedStart": "wednesday_start",
+    "trmtWedEnd": "wednesday_end",
+    "trmtThuStart": "thursday_start",
+    "trmtThuEnd": "thursday_end",
+    "trmtFriStart": "friday_start",
+    "trmtFriEnd": "friday_end",
+    "trmtSatStart": "saturday_start",
+    "trmtSatEnd": "saturday_end",
+    "trmtSunStart": "sunday_start",
+    "trmtSunEnd": "sunday_end",
 
-        detail_df = extract_items_from_response(detail_response)
-        if detail_df.empty:
-            print(f"No data returned for hospital {id}")
-            continue
+    "lunchWeek": "lunch_weekday",
+    "lunchSat": "lunch_saturday",
 
-        column_mapping = {
-            "trmtMonStart": "monday_start",
-            "trmtMonEnd": "monday_end",
-            "trmtTueStart": "tuesday_start",
-            "trmtTueEnd": "tuesday_end",
-            "trmtWedStart": "wednesday_start",
-            "trmtWedEnd": "wednesday_end",
-            "trmtThuStart": "thursday_start",
-            "trmtThuEnd": "thursday_end",
-            "trmtFriStart": "friday_start",
-            "trmtFriEnd": "friday_end",
-            "trmtSatStart": "saturday_start",
-            "trmtSatEnd": "saturday_end",
-            "trmtSunStart": "sunday_start",
-            "trmtSunEnd": "sunday_end",
+    "noTrmtSun": "closed_sunday",
+    "noTrmtHoli": "closed_holiday",
 
-            "lunchWeek": "lunch_weekday",
-            "lunchSat": "lunch_saturday",
+    "emyDayYn": "emergency_open_day",
+    "emyNgtYn": "emergency_open_night",
+}
+drop_columns = ["plcDir", "plcNm", "plcDist", "parkQty", "rcvSat", "rcvWeek", "parkXpnsYn", "parkEtc", "emyDayTelNo1", "emyDayTelNo2", "emyNgtTelNo1", "emyNgtTelNo2"]
 
-            "noTrmtSun": "closed_sunday",
-            "noTrmtHoli": "closed_holiday",
 
-            "emyDayYn": "emergency_open_day",
-            "emyNgtYn": "emergency_open_night",
-        }
-        drop_columns = ["plcDir", "plcNm", "plcDist", "parkQty", "rcvSat", "rcvWeek", "parkXpnsYn", "parkEtc", "emyDayTelNo1", "emyDayTelNo2", "emyNgtTelNo1", "emyNgtTelNo2"]
-        operating_hrs_df = clean_dataframe(detail_df, 
-                                          column_mapping=column_mapping, 
-                                          drop_columns=drop_columns,
-                                          convert_bool_cols=["emergency_open_day", "emergency_open_night"])
-        operating_hrs_df["hospital_id"] = id # retain hospital ID for join
-        hospital_operating_hours_records.append(operating_hrs_df)
+def fetch_operating_hours(id):
+    """
+    Operating hours for one hospital, or None if the API has no items.
+    """
+    detail_response = call_api(base_url=API_BASE_URLS[ApiService.HOSP_DETAIL], endpoint=ENDPOINT, params={
+        "ykiho": id,
+        "pageNo": 1,
+        "numOfRows": 1000,
+        "_type": "json"
+    })
 
-    except Exception as e:
-        print(f"Failed to fetch details for {id}: {e}")
+    detail_df = extract_items_from_response(detail_response)
+    if detail_df.empty:
+        return None
+    operating_hrs_df = clean_dataframe(detail_df,
+                                      column_mapping=column_mapping,
+                                      drop_columns=drop_columns,
+                                      convert_bool_cols=["emergency_open_day", "emergency_open_night"])
+    operating_hrs_df["hospital_id"] = id # retain hospital ID for join
+    return operating_hrs_df
 
-# ---- Step 4: Upload data to database
-if hospital_operating_hours_records:
-    combined_operating_hrs_df = pd.concat(hospital_operating_hours_records).reset_index(drop=True)
-    # upload_dataframe(combined_operating_hrs_df, table_name="hospital_operating_hours")
-    upload_dataframe_ignore_dups(combined_operating_hrs_df, table_name="hospital_operating_hours", pk=["hospital_id"])
 
+def operating_hours_writer(delta: bool = False):
+    """
+    Streams operating hours to hospital_operating_hours (one row per hospital).
+    With delta, rows are fingerprinted and only changes are written; a fetched
+    hospital that no longer returns hours has its row soft-deleted.
+    """
+    if delta:
+        writer = DeltaTableWriter("hospital_operating_hours", pk=["hospital_id"],
+                                  columns=["hospital_id", *column_mapping.values()])
+    else:
+        writer = StreamingTableWriter("hospital_operating_hours", pk=["hospital_id"])
+    return FanOutWriter([(writer, None)])
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch operating hours for every hospital (resumable)")
+    parser.add_argument("--limit", type=int, help="Maximum hospitals to fetch this run")
+    parser.add_argument("--flush-every", type=int, default=100, help="Hospitals per DB upload")
+    parser.add_argument("--all-hospitals", action="store_true", help="All hospitals instead of the fixed district subset")
+    parser.add_argument("--reset", action="store_true", help="Forget saved progress and start over")
+    parser.add_argument("--delta", action="store_true", help="Write only changed rows, soft-delete vanished ones")
+    args = parser.parse_args()
+
+    store = CheckpointStore()
+    if args.reset:
+        store.reset(ENDPOINT)
+    ids = get_hospital_ids() if args.all_hospitals else get_hospital_ids_fixed()
+    run_with_checkpoints(store, ENDPOINT, ids, fetch_operating_hours, operating_hours_writer(delta=args.delta),
+                         flush_every=args.flush_every, limit=args.limit,
+                         stop_on=(QuotaExceededError,), skip_on=(CacheMissError,))
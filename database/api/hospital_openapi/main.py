@@ -1,8 +1,15 @@
 from database.api.hospital_openapi.api import call_api
+from database.api.hospital_openapi.paginated_fetcher import fetch_all_pages
 from database.api.hospital_openapi.api_config import ApiService, API_BASE_URLS, API_ENDPOINTS, API_PARAMS
-from database.utils.data_utils import extract_items_from_response, clean_dataframe
-import pandas as pd
+from database.utils.data_utils import clean_dataframe
+import argparse
 from database.utils.db_utils import upload_dataframe
+from database.utils.delta_sync import apply_delta, format_delta
+
+parser = argparse.ArgumentParser(description="Fetch the national hospital list and load it into the DB")
+parser.add_argument("--delta", action="store_true",
+                    help="Only write new/changed hospitals and soft-delete ones no longer listed")
+args = parser.parse_args()
 
 # Function to check API parameters
 def get_api_data(service_enum, endpoint_key, user_params):
@@ -17,26 +24,11 @@ endpoint_key = "LIST"
 endpoint = API_ENDPOINTS[service][endpoint_key]
 base_url = API_BASE_URLS[service]
 
-totalCount = 78779
 numOfRows = 500
-# totalPages = 2
-totalPages = (totalCount // numOfRows) + (1 if totalCount % numOfRows > 0 else 0)
-dataframes = []
-
-for page in range(1, totalPages + 1):
-    params = {
-        "pageNo": page,
-        "numOfRows": numOfRows,
-        "_type": "json",
-    }
-    response = call_api(base_url, endpoint, params)
-    df_page = extract_items_from_response(response)
-    dataframes.append(df_page)
-    print(f"Fetched page {page} of {totalPages}")
-    print(df_page)
-
-combined_df = pd.concat(dataframes, ignore_index=True)
-print(combined_df)
+maxWorkers = 8
+
+# totalCount is read from page 1; the remaining pages are fetched concurrently
+combined_df = fetch_all_pages(base_url, endpoint, num_of_rows=numOfRows, max_workers=maxWorkers)
 combined_df.to_csv("all_data.csv", index=False)
 
 # params = {
@@ -88,10 +80,17 @@ hospital_type_df.rename(columns={"type_code": "code", "type_name": "name"}, inpl
 # Remove the name columns from the hospital dataframe
 hospitals_df = df_clean.drop(columns=["city_name", "district_name", "type_name"])
 
-# Upload cleaned city, district, hospital_type hospital metadata
-upload_dataframe(city_df, table_name="city") 
-upload_dataframe(district_df, table_name="district") 
-upload_dataframe(hospital_type_df, table_name="hospital_type") 
-upload_dataframe(hospitals_df, table_name="hospitals")
+if args.delta:
+    # Compare fingerprints with the stored rows and write only the difference.
+    # Codes missing from today's list may still be referenced, so they are never deleted.
+    for code_df, table_name in [(city_df, "city"), (district_df, "district"), (hospital_type_df, "hospital_type")]:
+        print(format_delta(table_name, apply_delta(code_df, table_name, ["code"], delete_missing=False)))
+    print(format_delta("hospitals", apply_delta(hospitals_df, "hospitals", ["id"])))
+else:
+    # Upload cleaned city, district, hospital_type hospital metadata
+    upload_dataframe(city_df, table_name="city") 
+    upload_dataframe(district_df, table_name="district") 
+    upload_dataframe(hospital_type_df, table_name="hospital_type") 
+    upload_dataframe(hospitals_df, table_name="hospitals")
 
 
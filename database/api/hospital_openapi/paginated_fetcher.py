@@ -0,0 +1,77 @@
+# paginated_fetcher.py
+# Fetches every page of a list endpoint (e.g. /getHospBasisList) concurrently
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from database.api.hospital_openapi.api import call_api
+from database.utils.data_utils import extract_items_from_response
+
+
+def get_total_count(response: dict) -> int:
+    """
+    Reads body.totalCount from an OpenAPI list response.
+    """
+    try:
+        return int(response["response"]["body"]["totalCount"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Invalid response structure. Could not find totalCount.")
+
+
+def fetch_all_pages(
+    base_url: str,
+    endpoint: str,
+    params: dict = None,
+    num_of_rows: int = 500,
+    max_workers: int = 8,
+    progress_every: int = 10,
+) -> pd.DataFrame:
+    """
+    Fetches page 1 to learn totalCount, then the remaining pages with a bounded
+    thread pool over the shared keep-alive session (see api.get_session).
+
+    - Pages are combined in page order, regardless of completion order
+    - Every call is retried with exponential backoff by the session; pages that
+      still fail are reported together after the other pages finish
+    - Progress (pages, rows, elapsed, ETA) is printed every `progress_every` pages
+    """
+    params = dict(params or {})
+    params["numOfRows"] = num_of_rows
+    start = time.perf_counter()
+
+    first = call_api(base_url, endpoint, {**params, "pageNo": 1})
+    total_count = get_total_count(first)
+    total_pages = max(1, -(-total_count // num_of_rows))
+    pages = {1: extract_items_from_response(first)}
+    print(f"{endpoint}: totalCount={total_count}, {total_pages} pages of {num_of_rows}, {max_workers} workers")
+
+    def fetch(page):
+        return extract_items_from_response(call_api(base_url, endpoint, {**params, "pageNo": page}))
+
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch, page): page for page in range(2, total_pages + 1)}
+        for done, future in enumerate(as_completed(futures), 2):
+            page = futures[future]
+            try:
+                pages[page] = future.result()
+            except (RuntimeError, ValueError) as e:
+                failed[page] = e
+                print(f"⚠️ Page {page} failed: {e}")
+            if done % progress_every == 0 or done == total_pages:
+                elapsed = time.perf_counter() - start
+                eta = elapsed / done * (total_pages - done)
+                rows = sum(len(df) for df in pages.values())
+                print(f"  [{done}/{total_pages}] {rows} rows, {elapsed:.0f}s elapsed, ~{eta:.0f}s left")
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {total_pages} pages failed: {sorted(failed)}")
+
+    combined = pd.concat([pages[p] for p in sorted(pages)], ignore_index=True)
+    if len(combined) != total_count:
+        # The list can change while it is being paged through
+        print(f"⚠️ Expected {total_count} rows but fetched {len(combined)}")
+    print(f"✅ Fetched {len(combined)} rows in {time.perf_counter() - start:.1f}s")
+    return combined
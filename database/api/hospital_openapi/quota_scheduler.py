@@ -0,0 +1,200 @@
+# quota_scheduler.py
+# Runs per-hospital detail jobs within the daily data.go.kr quota of SERVICE_KEY.
+#
+# Each endpoint has its own daily quota (api_config.API_DAILY_QUOTAS, reset at midnight KST).
+# Calls are counted in the ingestion state sqlite file, so separate runs on the same day
+# share one budget. Within an endpoint's budget, hospitals are fetched by priority:
+# new hospitals first, then previously failed ones, then the stalest records.
+# When every endpoint is out of quota the scheduler stops cleanly; with --wait it
+# sleeps until the next window and continues.
+#
+#   python -m database.api.hospital_openapi.quota_scheduler --jobs departments equipments hours --stale-days 30 --wait
+
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from database.api.hospital_openapi.api import QuotaExceededError, add_request_hook
+from database.api.hospital_openapi.response_cache import CacheMissError
+from database.api.hospital_openapi.api_config import API_DAILY_QUOTAS
+from database.utils.checkpoint_store import CheckpointStore, DEFAULT_STATE_PATH, SKIPPED, run_with_checkpoints
+from database.utils.db_utils import get_hospital_ids
+
+KST = timezone(timedelta(hours=9))  # no daylight saving time
+
+
+def current_window(now: datetime = None) -> str:
+    """
+    Quota window (KST date) that `now` falls in.
+    """
+    return (now or datetime.now(timezone.utc)).astimezone(KST).date().isoformat()
+
+
+def seconds_until_next_window(now: datetime = None) -> float:
+    """
+    Seconds until the next KST midnight.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(KST)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), KST)
+    return (tomorrow - now).total_seconds()
+
+
+class QuotaScheduler:
+    """
+    Per-endpoint daily call budget, persisted next to the ingestion checkpoints.
+    """
+
+    def __init__(self, quotas: dict = None, path: str = DEFAULT_STATE_PATH):
+        self.quotas = dict(API_DAILY_QUOTAS if quotas is None else quotas)
+        self.store = CheckpointStore(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                endpoint TEXT NOT NULL,
+                day      TEXT NOT NULL,
+                used     INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (endpoint, day)
+            )
+        """)
+        self._conn.commit()
+        # Count real network calls only; responses served from the cache are free
+        add_request_hook(self.acquire)
+
+    def used(self, endpoint: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM quota_usage WHERE endpoint = ? AND day = ?", (endpoint, current_window())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self, endpoint: str) -> int:
+        return max(0, self.quotas.get(endpoint, 0) - self.used(endpoint))
+
+    def acquire(self, endpoint: str) -> None:
+        """
+        Counts one call against today's quota, or raises QuotaExceededError if none is left.
+        Endpoints without a configured quota are not limited.
+        """
+        if endpoint not in self.quotas:
+            return
+        window = current_window()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM quota_usage WHERE endpoint = ? AND day = ?", (endpoint, window)
+            ).fetchone()
+            if (row[0] if row else 0) >= self.quotas.get(endpoint, 0):
+                raise QuotaExceededError(f"Daily quota of {endpoint} used up for {window}")
+            self._conn.execute("""
+                INSERT INTO quota_usage (endpoint, day, used) VALUES (?, ?, 1)
+                ON CONFLICT (endpoint, day) DO UPDATE SET used = used + 1
+            """, (endpoint, window))
+            self._conn.commit()
+
+    def exhaust(self, endpoint: str) -> None:
+        """
+        Marks today's quota as used up (the API answered with result code 22).
+        """
+        window = current_window()
+        quota = self.quotas.get(endpoint, 0)
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO quota_usage (endpoint, day, used) VALUES (?, ?, ?)
+                ON CONFLICT (endpoint, day) DO UPDATE SET used = MAX(used, excluded.used)
+            """, (endpoint, window, quota))
+            self._conn.commit()
+
+    def guard(self, endpoint: str, fetch):
+        """
+        Wraps fetch(ykiho) so a quota error (from acquire or the API) closes today's window.
+        """
+        def guarded(ykiho):
+            try:
+                return fetch(ykiho)
+            except QuotaExceededError:
+                self.exhaust(endpoint)
+                raise
+        return guarded
+
+    def run(self, jobs: list, ids: list, stale_after_days: float = None, wait: bool = False,
+            flush_every: int = 100) -> None:
+        """
+        Runs jobs in priority order until all work is done or every job is out of quota.
+
+        :param jobs: (endpoint, fetch, writer factory) tuples, highest priority first
+        :param ids: Hospital IDs (ykiho) to cover
+        :param stale_after_days: Re-fetch records older than this (None: only new/failed)
+        :param wait: Sleep until the next window instead of returning when quotas run out
+        """
+        while True:
+            blocked, uncached, unfinished = [], [], False
+            for endpoint, fetch, make_writer in jobs:
+                new, retry, stale = self.store.plan(endpoint, ids, stale_after_days)
+                todo = new + retry + stale
+                if not todo:
+                    continue
+                budget = self.remaining(endpoint)
+                print(f"{endpoint}: {len(new)} new, {len(retry)} retry, {len(stale)} stale; "
+                      f"{budget}/{self.quotas.get(endpoint, 0)} calls left in {current_window()}")
+                counts = {}
+                if budget:
+                    counts = run_with_checkpoints(self.store, endpoint, todo, self.guard(endpoint, fetch), make_writer(),
+                                                  flush_every=flush_every, stop_on=(QuotaExceededError,),
+                                                  skip_on=(CacheMissError,), skip_finished=False)
+                if any(self.store.plan(endpoint, ids, stale_after_days)):
+                    if self.remaining(endpoint) == 0:
+                        blocked.append(endpoint)
+                    elif counts.get(SKIPPED):
+                        uncached.append(endpoint)  # replay mode: another pass would miss the cache again
+                    else:
+                        unfinished = True  # failed hospitals left to retry (bounded by max_attempts)
+
+            if unfinished:
+                continue
+            if uncached:
+                print(f"🟠 Responses not cached for some hospitals of {uncached} (replay mode); they stay pending")
+            if not blocked:
+                if not uncached:
+                    print("✅ All jobs are up to date")
+                return
+            if not wait:
+                print(f"🔴 Out of quota for {blocked}; run again after {current_window()} (KST) ends")
+                return
+            pause = seconds_until_next_window() + 60
+            print(f"⏸ Out of quota for {blocked}; sleeping {pause / 3600:.1f}h until the next window")
+            time.sleep(pause)
+
+
+def detail_jobs(delta: bool = False):
+    """
+    Available jobs by name: (endpoint, fetch, writer factory).
+    With delta, the writers only write changed rows (see delta_sync).
+    """
+    from database.api.hospital_openapi import retrieve_detail_info_api as departments
+    from database.api.hospital_openapi import get_equipment_info_api as equipments
+    from database.api.hospital_openapi import get_operating_hours_info_api as hours
+    return {
+        "departments": (departments.ENDPOINT, departments.fetch_departments, partial(departments.departments_writer, delta=delta)),
+        "equipments": (equipments.ENDPOINT, equipments.fetch_equipments, partial(equipments.equipments_writer, delta=delta)),
+        "hours": (hours.ENDPOINT, hours.fetch_operating_hours, partial(hours.operating_hours_writer, delta=delta)),
+    }
+
+
+if __name__ == "__main__":
+    available = detail_jobs()
+    parser = argparse.ArgumentParser(description="Run detail ingestion jobs within the daily API quota")
+    parser.add_argument("--jobs", nargs="+", choices=list(available), default=list(available),
+                        help="Jobs in priority order")
+    parser.add_argument("--stale-days", type=float, help="Also refresh records older than this many days")
+    parser.add_argument("--flush-every", type=int, default=100, help="Hospitals per DB upload")
+    parser.add_argument("--wait", action="store_true", help="Sleep until the next quota window instead of exiting")
+    parser.add_argument("--delta", action="store_true", help="Write only changed rows, soft-delete vanished ones")
+    args = parser.parse_args()
+
+    available = detail_jobs(delta=args.delta)
+    scheduler = QuotaScheduler()
+    scheduler.run([available[name] for name in args.jobs], get_hospital_ids(),
+                  stale_after_days=args.stale_days, wait=args.wait, flush_every=args.flush_every)
@@ -0,0 +1,131 @@
+# response_cache.py
+# On-disk cache of OpenAPI response bodies used by api.call_api.
+#
+# Entries are keyed by URL and query parameters without the service key, so
+# rotating the key keeps the cache valid. Bodies are stored zlib-compressed in
+# one sqlite file (hundreds of thousands of small responses would be too many files).
+#
+# Modes (OPENAPI_CACHE_MODE):
+#   off        no caching (default)
+#   readwrite  serve entries younger than OPENAPI_CACHE_TTL seconds, fetch and store the rest
+#   replay     offline: serve any cached entry regardless of age, never touch the network
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_MODES = ("off", "readwrite", "replay")
+DEFAULT_CACHE_PATH = os.path.join(os.getenv("INGEST_STATE_DIR", ".ingest_state"), "http_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600
+EXCLUDED_PARAMS = {"servicekey"}  # compared case-insensitively
+
+
+class CacheMissError(RuntimeError):
+    """Replay mode was asked for a response that is not cached"""
+
+
+def cache_key(url: str, params: dict) -> str:
+    """
+    Stable key for a request: URL plus sorted parameters, service key excluded.
+    """
+    kept = sorted((str(k), str(v)) for k, v in params.items() if str(k).lower() not in EXCLUDED_PARAMS)
+    return hashlib.sha256(json.dumps([url, kept], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe response body cache with a TTL.
+    """
+
+    def __init__(self, mode: str = "readwrite", ttl: float = DEFAULT_TTL, path: str = DEFAULT_CACHE_PATH):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.mode = mode
+        self.ttl = ttl
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != "off":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key        TEXT PRIMARY KEY,
+                    url        TEXT NOT NULL,
+                    params     TEXT NOT NULL,
+                    body       BLOB NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def get(self, url: str, params: dict):
+        """
+        Cached body for a request, or None if it must be fetched.
+        Raises CacheMissError in replay mode when nothing is cached.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE key = ?", (cache_key(url, params),)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+            elif self.mode == "readwrite" and time.time() - row[1] > self.ttl:
+                self.stats["stale"] += 1
+                return None
+            else:
+                self.stats["hits"] += 1
+        if row is None:
+            if self.mode == "replay":
+                raise CacheMissError(f"Not cached (replay mode): {url} {params}")
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, url: str, params: dict, body: str) -> None:
+        """
+        Stores a successful response body.
+        """
+        if self.mode != "readwrite":
+            return
+        kept = {k: v for k, v in params.items() if str(k).lower() not in EXCLUDED_PARAMS}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, params, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (cache_key(url, params), url, json.dumps(kept, ensure_ascii=False, default=str),
+                 zlib.compress(body.encode("utf-8")), time.time()),
+            )
+            self._conn.commit()
+            self.stats["stores"] += 1
+
+    def clear(self) -> None:
+        if self.enabled:
+            with self._lock:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+
+def cache_from_env() -> ResponseCache:
+    """
+    Cache configured by OPENAPI_CACHE_MODE, OPENAPI_CACHE_TTL (seconds) and OPENAPI_CACHE_PATH.
+    """
+    return ResponseCache(
+        mode=os.getenv("OPENAPI_CACHE_MODE", "off"),
+        ttl=float(os.getenv("OPENAPI_CACHE_TTL", DEFAULT_TTL)),
+        path=os.getenv("OPENAPI_CACHE_PATH", DEFAULT_CACHE_PATH),
+    )
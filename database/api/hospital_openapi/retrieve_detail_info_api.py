@@ -1,86 +1,66 @@
-from db_utils import get_hospital_ids, get_hospital_ids_fixed
-from api import call_api
-from api_config import ApiService, API_BASE_URLS, API_ENDPOINTS, API_PARAMS
-from data_utils import extract_items_from_response, clean_dataframe
-import pandas as pd
-from db_utils import upload_dataframe_ignore_dups
-import time
-from requests.exceptions import RequestException
+import argparse
 
-# ids = get_hospital_ids()
-ids = get_hospital_ids_fixed()
-    
-# ---- Step 3: For each hospital, get hospital detail info by id and attach to table
-department_master = []       # Will collect all department codes + names
-hospital_dept_records = []   # Will collect each hospital's dept + count info
+from database.utils.db_utils import get_hospital_ids, get_hospital_ids_fixed
+from database.api.hospital_openapi.api import call_api, QuotaExceededError
+from database.api.hospital_openapi.response_cache import CacheMissError
+from database.api.hospital_openapi.api_config import ApiService, API_BASE_URLS, API_ENDPOINTS
+from database.utils.data_utils import extract_items_from_response, clean_dataframe
+from database.utils.checkpoint_store import CheckpointStore, run_with_checkpoints
+from database.utils.streaming_writer import DeltaTableWriter, FanOutWriter, StreamingTableWriter
 
-# Get detail information for each hospital using id
-start_idx = 51600
-request_count = 0
-# batch_size = 2000
-batch_size = 1500  # Limit to 1000 requests for this run
-# for id in ids[start_idx:]:
+ENDPOINT = API_ENDPOINTS[ApiService.HOSP_DETAIL]["SPECIALIST_COUNT_BY_DEPARTMENT"]
 
-for id in ids[1500:]:
-    ## Log request count
-    if request_count >= batch_size:
-      break
-    request_count += 1
-    print(f"[{request_count}/{batch_size}]")
-    try:
-        time.sleep(0.1)
 
-        ## API CALL (HOSP_DETAIL)
-        detail_response = call_api(base_url=API_BASE_URLS[ApiService.HOSP_DETAIL], endpoint=API_ENDPOINTS[ApiService.HOSP_DETAIL]["SPECIALIST_COUNT_BY_DEPARTMENT"], params={
-            "ykiho": id,
-            "pageNo": 1,
-            "numOfRows": 1000,
-            "_type": "json"
-        })
-        print(f"Detail response for {id}: {detail_response}")
+def fetch_departments(id):
+    """
+    Specialist counts per department for one hospital, or None if the API has no items.
+    """
+    detail_response = call_api(base_url=API_BASE_URLS[ApiService.HOSP_DETAIL], endpoint=ENDPOINT, params={
+        "ykiho": id,
+        "pageNo": 1,
+        "numOfRows": 1000,
+        "_type": "json"
+    })
 
-        detail_df = extract_items_from_response(detail_response)
-        if detail_df.empty:
-            print(f"ℹ️ No items for {id}, skipping.")
-            continue
-        detail_df_clean = clean_dataframe(detail_df, 
-                                          column_mapping={
-                                              "dgsbjtCd": "department_code",
-                                              "dgsbjtCdNm": "department_name",
-                                              "dtlSdrCnt": "specialist_count"
-                                              })
-        detail_df_clean["hospital_id"] = id # retain hospital ID for join
+    detail_df = extract_items_from_response(detail_response)
+    if detail_df.empty:
+        return None
+    detail_df_clean = clean_dataframe(detail_df,
+                                      column_mapping={
+                                          "dgsbjtCd": "department_code",
+                                          "dgsbjtCdNm": "department_name",
+                                          "dtlSdrCnt": "specialist_count"
+                                          })
+    detail_df_clean["hospital_id"] = id # retain hospital ID for join
+    return detail_df_clean
 
-        # Collect unique department codes and names
-        department_master.append(detail_df_clean[["department_code", "department_name"]])
 
-         # Collect hospital-department mapping
-        hospital_dept_records.append(detail_df_clean[["hospital_id", "department_code", "specialist_count"]])
-    except RuntimeError as e:
-        msg = str(e)
-        # detect “22” in the HTTP status or in the message
-        if "22" in msg or "quota" in msg.lower() or "limited" in msg.lower():
-            print(f"🔴 API quota exceeded at hospital_id={id}. Stopping early.")
-            break
-        else:
-            print(f"⚠️ Runtime error for {id}: {e}. Skipping.")
-            continue
-    except RequestException as e:
-        print(f"⚠️ Request failed for {id}: {e}")
-        continue
-    except Exception as e:
-        print(f"❌ Unexpected error for {id}: {e}")
-        continue
+def departments_writer(delta: bool = False):
+    """
+    Streams each hospital's rows to department codes first, then hospital-department relations.
+    With delta, relation rows are fingerprinted and only changes are written;
+    rows the API no longer returns for a fetched hospital are soft-deleted.
+    """
+    relation_writer = DeltaTableWriter if delta else StreamingTableWriter
+    return FanOutWriter([
+        (StreamingTableWriter("departments", pk=["department_code"], update=False), ["department_code", "department_name"]),
+        (relation_writer("hospital_departments", pk=["hospital_id", "department_code"]), ["hospital_id", "department_code", "specialist_count"]),
+    ])
 
-# # Combine and deduplicate department codes
-departments_df = pd.concat(department_master).drop_duplicates().reset_index(drop=True)
 
-# # Combine all hospital-department relations
-hospital_departments_df = pd.concat(hospital_dept_records).reset_index(drop=True)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch specialist counts per department for every hospital (resumable)")
+    parser.add_argument("--limit", type=int, help="Maximum hospitals to fetch this run")
+    parser.add_argument("--flush-every", type=int, default=100, help="Hospitals per DB upload")
+    parser.add_argument("--all-hospitals", action="store_true", help="All hospitals instead of the fixed district subset")
+    parser.add_argument("--reset", action="store_true", help="Forget saved progress and start over")
+    parser.add_argument("--delta", action="store_true", help="Write only changed rows, soft-delete vanished ones")
+    args = parser.parse_args()
 
-
-# ---- Step 4: Upload data to database
-# # Upload department codes
-upload_dataframe_ignore_dups(departments_df, table_name="departments", pk=["department_code"])
-# # Upload hospital-department relations
-upload_dataframe_ignore_dups(hospital_departments_df, table_name="hospital_departments", pk=["hospital_id", "department_code"])
\ No newline at end of file
+    store = CheckpointStore()
+    if args.reset:
+        store.reset(ENDPOINT)
+    ids = get_hospital_ids() if args.all_hospitals else get_hospital_ids_fixed()
+    run_with_checkpoints(store, ENDPOINT, ids, fetch_departments, departments_writer(delta=args.delta),
+                         flush_every=args.flush_every, limit=args.limit,
+                         stop_on=(QuotaExceededError,), skip_on=(CacheMissError,))
@@ -0,0 +1,234 @@
+# blog_fetcher.py
+# Browser-free Naver blog post fetcher for the review crawler.
+#
+# blog.naver.com/{blogId}/{logNo} only renders a frameset whose `mainFrame` loads
+# PostView.naver; that page is plain server-rendered HTML, so it is requested directly
+# and the post body (div.se-main-container, or div#content-area for old editor posts)
+# is extracted with the stdlib HTML parser. Posts are fetched by a bounded thread pool
+# over one keep-alive session; posts that cannot be fetched or parsed this way can be
+# handed to a fallback (the Selenium crawler).
+#
+#   python -m database.api.naver_api.blog_fetcher https://blog.naver.com/melon_815/222689879387
+#   python -m database.api.naver_api.blog_fetcher saved_post.html     # saved HTML fixture
+
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POST_VIEW_URL = "https://blog.naver.com/PostView.naver"
+TIMEOUT = (5, 15)           # (connect, read) seconds
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+POOL_SIZE = 16
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Referer": "https://blog.naver.com/",
+    "Accept-Language": "ko-KR,ko;q=0.9",
+}
+
+# Containers holding the post body, in order of preference (SmartEditor ONE, then older editors)
+CONTENT_CONTAINERS = (("class", "se-main-container"), ("id", "content-area"))
+BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "table"}
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide keep-alive session for blog requests.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",),
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _post_id(url: str):
+    """
+    (blogId, logNo) of a Naver blog post link, or None if it is not one.
+    Handles blog.naver.com/{blogId}/{logNo}, m.blog.naver.com and ?blogId=&logNo= links.
+    """
+    parsed = urlparse(url)
+    if not parsed.netloc.endswith("blog.naver.com"):
+        return None
+    query = parse_qs(parsed.query)
+    blog_id, log_no = query.get("blogId", [None])[0], query.get("logNo", [None])[0]
+    if not (blog_id and log_no):
+        parts = [p for p in parsed.path.split("/") if p]
+        if len(parts) < 2 or not parts[1].isdigit():
+            return None
+        blog_id, log_no = parts[0], parts[1]
+    return blog_id, log_no
+
+
+def canonical_post_url(url: str) -> str:
+    """
+    https://blog.naver.com/{blogId}/{logNo} for any form of a Naver post link
+    (other links are returned unchanged), so one post has one key.
+    """
+    post_id = _post_id(url)
+    return url if post_id is None else "https://blog.naver.com/{}/{}".format(*post_id)
+
+
+def to_post_view_url(url: str):
+    """
+    PostView.naver URL for a Naver blog post link, or None if it is not one.
+    """
+    post_id = _post_id(url)
+    if post_id is None:
+        return None
+    blog_id, log_no = post_id
+    return f"{POST_VIEW_URL}?" + urlencode({
+        "blogId": blog_id, "logNo": log_no, "redirect": "Dlog", "widgetTypeCall": "true", "directAccess": "false",
+    })
+
+
+class _PostTextParser(HTMLParser):
+    """
+    Collects the text of each content container, with line breaks at block elements.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.texts = {container: [] for container in CONTENT_CONTAINERS}
+        self._open = []   # [container, div depth] for containers being read
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        for entry in self._open:
+            if tag == "div":
+                entry[1] += 1
+        if tag in BLOCK_TAGS:
+            self._text("\n")
+        if tag != "div":
+            return
+        attrs = dict(attrs)
+        for container in CONTENT_CONTAINERS:
+            attr, value = container
+            if value in (attrs.get(attr) or "").split() and not self.texts[container]:
+                self._open.append([container, 1])
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._text("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+            return
+        if tag in BLOCK_TAGS:
+            self._text("\n")
+        if tag == "div":
+            for entry in self._open:
+                entry[1] -= 1
+            self._open = [entry for entry in self._open if entry[1] > 0]
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._text(data)
+
+    def _text(self, data):
+        for container, _ in self._open:
+            self.texts[container].append(data)
+
+
+def _clean(text: str) -> str:
+    """
+    Collapse whitespace within lines and drop empty lines (like Selenium's element.text).
+    """
+    text = text.replace("\u200b", "").replace("\xa0", " ")
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def extract_post_text(html: str):
+    """
+    Post body text from a PostView (or saved blog post) HTML page, or None if the
+    page has no se-main-container / content-area container (e.g. private or deleted posts).
+    """
+    parser = _PostTextParser()
+    parser.feed(html)
+    parser.close()
+    for container in CONTENT_CONTAINERS:
+        text = _clean("".join(parser.texts[container]))
+        if text:
+            return text
+    return None
+
+
+def fetch_blog_post_content(url: str, session: requests.Session = None):
+    """
+    Fetches one Naver blog post over HTTP and returns its body text, or None.
+    """
+    post_view_url = to_post_view_url(url)
+    if post_view_url is None:
+        return None
+    response = (session or get_session()).get(post_view_url, timeout=TIMEOUT)
+    response.raise_for_status()
+    if response.encoding is None or response.encoding.lower() == "iso-8859-1":
+        response.encoding = "utf-8"
+    return extract_post_text(response.text)
+
+
+def fetch_blog_posts(urls: list, max_workers: int = 8, fallback=None) -> dict:
+    """
+    Fetches many posts concurrently.
+
+    :param urls: Naver blog post links
+    :param max_workers: Concurrent requests
+    :param fallback: Called as fallback(url) -> text or None, one post at a time, for
+                     posts the HTTP fetch could not read (e.g. naver_blog_crawler's Selenium fetch)
+    :return: {url: text or None}, in the order of urls
+    """
+    def fetch(url):
+        try:
+            return fetch_blog_post_content(url)
+        except requests.RequestException as e:
+            print(f"⚠️ HTTP fetch failed for {url}: {e}")
+            return None
+
+    urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        contents = dict(zip(urls, pool.map(fetch, urls)))
+
+    if fallback is not None:
+        for url in urls:
+            if contents[url] is None:
+                print(f"🟠 Falling back to browser for {url}")
+                contents[url] = fallback(url)
+    return contents
+
+
+if __name__ == "__main__":
+    sources = sys.argv[1:]
+    start = time.perf_counter()
+    files = [s for s in sources if os.path.exists(s)]
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            print(f"📄 {path}\n{extract_post_text(f.read())}\n")
+    for url, text in fetch_blog_posts([s for s in sources if s not in files]).items():
+        print(f"🔗 {url}\n{text}\n")
+    print(f"⏱ {len(sources)} posts in {time.perf_counter() - start:.2f}s")
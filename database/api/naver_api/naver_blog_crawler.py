@@ -1,14 +1,8 @@
-import sys
 import os
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 import json
 import time
-
-from selenium.common.exceptions import NoSuchElementException
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+import argparse
 
 from sqlalchemy import Table, Column, MetaData, Text, Integer
 from pgvector.sqlalchemy import Vector
@@ -20,18 +14,38 @@ from sqlalchemy.exc import IntegrityError, OperationalError
 
 from database.utils.db_utils import get_hospital_id_names_fixed
 from database.api.naver_api.naver_api import search_naver_blog
-
-# Selenium WebDriver setup
-options = webdriver.ChromeOptions()
-options.add_experimental_option("excludeSwitches", ["enable-automation"])
-options.add_experimental_option("useAutomationExtension", False)
-
-options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-options.add_argument("--headless") # Run in headless mode
-service = Service(ChromeDriverManager().install())
-
-driver = webdriver.Chrome(service=service, options=options)
-driver.implicitly_wait(3)
+from database.api.naver_api.blog_fetcher import canonical_post_url, fetch_blog_posts
+from database.utils.seen_store import ACQUIRED, DONE, DUPLICATE, EMPTY, FINISHED, SeenStore, content_hash
+
+# Selenium is only the fallback for posts blog_fetcher cannot read over HTTP,
+# so Chrome is started on first use instead of at import time
+driver = None
+
+def get_driver():
+    global driver
+    if driver is None:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        # Selenium WebDriver setup
+        options = webdriver.ChromeOptions()
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option("useAutomationExtension", False)
+
+        options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+        options.add_argument("--headless") # Run in headless mode
+        service = Service(ChromeDriverManager().install())
+
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.implicitly_wait(3)
+    return driver
+
+def close_driver():
+    global driver
+    if driver is not None:
+        driver.quit()
+        driver = None
 
 # DEBUG: Test Links
 links = [
@@ -43,8 +57,12 @@ links = [
     ]
 
 def get_blog_post_content(url):
-    #블로그 링크 하나씩 불러서 iframe에서 크롤링
+    #블로그 링크 하나씩 불러서 iframe에서 크롤링 (blog_fetcher 실패 시 fallback)
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+
     try:
+        driver = get_driver()
         driver.get(url)
         time.sleep(1) # Wait briefly for the page to load
         driver.switch_to.frame("mainFrame") # Switch to the iframe containing the blog post content
@@ -83,47 +101,81 @@ review_chunks_tbl = Table(
 )
 
 if __name__ == "__main__":
-    # id_names     = get_hospital_id_names()
-    # start_idx    = 10
-    # batch_size   = 500
-    request_count = -1
-
-    # Only iterate from start_idx up to batch_size items
-    start_idx = int(sys.argv[1])
-    end_idx   = int(sys.argv[2])
-    id_names = get_hospital_id_names_fixed()[start_idx:end_idx]
-    for hosp_id, hosp_name in id_names:
-        request_count += 1
-    # for hosp_id, hosp_name in id_names[start_idx : start_idx + batch_size]:
-        print(f"[Hosp {start_idx+request_count}] 🔍 Searching reviews for: {hosp_name} (ID={hosp_id})")
-
-        # 1) Search Naver Blog for that hospital name + '후기'
-        try:
-            blog_posts = search_naver_blog(f"{hosp_name} 진료 후기")
-        except Exception as e:
-            print(f"⚠️  검색 API 오류: {e}")
-            continue
-
-        # 2) For each returned post
-        for post_id, post in enumerate(blog_posts):
-            print(f"🔗Hosp {start_idx+request_count} | Post {post_id + 1}/{len(blog_posts)}: 📝 {post['title']} (ID={hosp_id})")
-            url = post["link"]
-
-            if "blog.naver.com" not in url:
-                print("🟠  네이버 블로그 링크가 아닙니다, 건너뜀.")
+    parser = argparse.ArgumentParser(description="Crawl Naver blog reviews into review_chunks")
+    parser.add_argument("start_idx", type=int)
+    parser.add_argument("end_idx", type=int)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent blog post requests")
+    parser.add_argument("--batch", type=int, default=20, help="Hospitals whose posts are fetched together")
+    parser.add_argument("--no-selenium", action="store_true", help="Skip posts the HTTP fetcher cannot read")
+    parser.add_argument("--reset-seen", action="store_true", help="Forget processed posts and crawl them again")
+    args = parser.parse_args()
+
+    # Posts processed by earlier runs or other shards are skipped before fetching and before chunking
+    seen = SeenStore()
+    if args.reset_seen:
+        seen.reset()
+
+    # Only iterate from start_idx up to end_idx items
+    start_idx = args.start_idx
+    id_names = get_hospital_id_names_fixed()[start_idx:args.end_idx]
+    fallback = None if args.no_selenium else get_blog_post_content
+
+    for batch_start in range(0, len(id_names), args.batch):
+        # 1) Search Naver Blog for each hospital name + '후기'
+        found = []  # (hospital index, hosp_id, post)
+        for request_count, (hosp_id, hosp_name) in enumerate(id_names[batch_start:batch_start + args.batch], start=batch_start):
+            print(f"[Hosp {start_idx+request_count}] 🔍 Searching reviews for: {hosp_name} (ID={hosp_id})")
+            try:
+                blog_posts = search_naver_blog(f"{hosp_name} 진료 후기")
+            except Exception as e:
+                print(f"⚠️  검색 API 오류: {e}")
                 continue
+            for post in blog_posts:
+                if "blog.naver.com" not in post["link"]:
+                    print(f"🟠  네이버 블로그 링크가 아닙니다, 건너뜀: {post['link']}")
+                    continue
+                found.append((request_count, hosp_id, post))
+
+        # Drop posts already processed (by URL), and repeats within this batch
+        posts = {}
+        for entry in found:
+            posts.setdefault(canonical_post_url(entry[2]["link"]), entry)
+        unseen = seen.unseen(posts)
+        print(f"⏭  {len(found) - len(unseen)}/{len(found)} posts already processed, skipping")
+        found = [posts[key] for key in unseen]
+
+        # 2) Fetch all posts of the batch concurrently (Selenium only for posts HTTP could not read)
+        contents = fetch_blog_posts([post["link"] for _, _, post in found], max_workers=args.workers, fallback=fallback)
+
+        # 3) For each returned post
+        for post_id, (request_count, hosp_id, post) in enumerate(found):
+            print(f"🔗Hosp {start_idx+request_count} | Post {post_id + 1}/{len(found)}: 📝 {post['title']} (ID={hosp_id})")
+            url = post["link"]
+            key = canonical_post_url(url)
 
-            # 3) Crawl raw text
-            content = get_blog_post_content(url)
+            content = contents.get(url)
             if not content:
                 print("⚠️  크롤링 실패, 건너뜀.")
                 continue
 
+            # Same text already chunked (under another URL) or being chunked by another shard
+            digest = content_hash(content)
+            claim = seen.claim_content(digest, key)
+            if claim == FINISHED:
+                print("⏭  동일한 본문을 이미 처리했습니다, 건너뜀.")
+                seen.mark(key, DUPLICATE, hosp_id, digest)
+                continue
+            if claim != ACQUIRED:
+                # Left unmarked: if the other run fails, a later run retries this URL
+                print("⏭  다른 실행에서 같은 본문을 처리 중입니다, 다음 실행에서 다시 확인.")
+                continue
+
             # 4) Chunk via LLM
             try:
                 chunks = chunk_review_with_llm(content)
             except Exception as e:
                 print(f"❌ Chunking failed: {e}")
+                seen.release_content(digest)
                 continue
             
             # 5) Show the chunk JSON
@@ -139,6 +191,7 @@ if __name__ == "__main__":
 
             if not texts:
                 print("⚪️ No chunks produced, skipping.")
+                seen.mark(key, EMPTY, hosp_id, digest)
                 continue
 
             # 4) Embed all texts at once
@@ -164,24 +217,27 @@ if __name__ == "__main__":
                 with engine.begin() as conn:
                     conn.execute(stmt)
                 print(f"✅ Uploaded {len(records)} chunks for {url}")
+                seen.mark(key, DONE, hosp_id, digest, len(records))
             except OperationalError as oe:
                 print(f"⚠️ DB connection error on {url}, skipping chunk upload: {oe}")
                 engine.dispose()   # drop any bad connections; new ones will be opened next loop
+                seen.release_content(digest)
                 continue
             except IntegrityError as ie:
                 # some parallel race? or constraint, skip
                 print(f"⚠️ IntegrityError, skipping duplicates: {ie}")
+                seen.release_content(digest)
                 continue
             except Exception as e:
                 # catches any other exception
                 print(f"⚠️ Skipping upload for {url} due to error: {e}")
                 # if it’s a connection‐level issue, dispose the pool so next loop gets a fresh one
                 engine.dispose()
+                seen.release_content(digest)
                 continue
 
-            # Be gentle with rate limits
-            time.sleep(0.1)
+    print(f"📊 Processed posts: {seen.summary()}")
+    seen.close()
 
-    # Finally, close your Selenium driver
-    from database.api.naver_api.naver_blog_crawler import driver
-    driver.quit()
\ No newline at end of file
+    # Finally, close the Selenium driver if the fallback started one
+    close_driver()
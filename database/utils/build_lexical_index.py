@@ -0,0 +1,41 @@
+from dotenv import load_dotenv
+from app.utils.database import load_database_url, create_db_engine
+from app.core.lexical_index import LexicalIndex
+from sqlalchemy import text
+import argparse
+import os
+
+def build_lexical_index(path: str) -> LexicalIndex:
+    """
+    Build the BM25 character n-gram index over review_summaries.review and save it
+    
+    Args:
+        path: Output .npz file (set LEXICAL_INDEX_PATH to it to serve it)
+        
+    Returns:
+        LexicalIndex: Built index
+    """
+    load_dotenv()
+    engine = create_db_engine(load_database_url())
+    
+    query = text("""
+        SELECT hospital_id, review
+        FROM review_summaries
+        WHERE review IS NOT NULL AND review != ''
+        ORDER BY hospital_id
+    """)
+    with engine.connect() as conn:
+        rows = conn.execute(query).fetchall()
+    print(f"Loaded {len(rows)} review summaries")
+    
+    lexical_index = LexicalIndex().build((row[0], row[1]) for row in rows)
+    lexical_index.save(path)
+    print(f"Saved lexical index ({len(lexical_index)} documents, "
+          f"{len(lexical_index.vocabulary)} terms) to {path}")
+    return lexical_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the review summary BM25 index")
+    parser.add_argument("--path", default=os.getenv("LEXICAL_INDEX_PATH", "lexical_index.npz"))
+    args = parser.parse_args()
+    build_lexical_index(args.path)
@@ -0,0 +1,67 @@
+from dotenv import load_dotenv
+from app.utils.database import load_database_url, create_db_engine
+from app.core.vector_index import VectorIndex
+from sqlalchemy import text
+import numpy as np
+import argparse
+import os
+
+def load_summary_embeddings(engine, batch_size: int = 5000):
+    """
+    Stream review_summaries embeddings into a float32 matrix
+    
+    Args:
+        engine: SQLAlchemy engine object
+        batch_size: Rows fetched per round trip
+        
+    Returns:
+        Tuple[List[str], np.ndarray]: Hospital IDs and embeddings of shape (n, 1536)
+    """
+    query = text("""
+        SELECT hospital_id, embedding::text
+        FROM review_summaries
+        WHERE embedding IS NOT NULL
+        ORDER BY hospital_id
+    """)
+    ids, chunks = [], []
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(query)
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            ids.extend(row[0] for row in rows)
+            chunks.append(np.loadtxt([row[1].strip('[] ') for row in rows], delimiter=',',
+                                     dtype='float32', ndmin=2))
+            print(f"Loaded {len(ids)} embeddings")
+    return ids, np.vstack(chunks) if chunks else np.empty((0, 1536), dtype='float32')
+
+def build_vector_index(spec: str, path: str) -> VectorIndex:
+    """
+    Build a VectorIndex over all review summary embeddings and save it
+    
+    Args:
+        spec: Index spec, e.g. "flat", "int8,dims=512", "ivfpq,m=48,nprobe=32"
+        path: Output directory (set VECTOR_INDEX_PATH to it to serve it)
+        
+    Returns:
+        VectorIndex: Built index
+    """
+    load_dotenv()
+    engine = create_db_engine(load_database_url())
+    ids, embeddings = load_summary_embeddings(engine)
+    if not ids:
+        raise ValueError("review_summaries has no embeddings")
+    
+    vector_index = VectorIndex.from_spec(spec).build(embeddings, ids)
+    vector_index.save(path)
+    print(f"Saved {vector_index.spec} index ({len(vector_index)} vectors, "
+          f"{vector_index.memory_bytes / 2**20:.1f} MiB) to {path}")
+    return vector_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the review summary embedding index")
+    parser.add_argument("--spec", default=os.getenv("VECTOR_INDEX_SPEC", "int8"))
+    parser.add_argument("--path", default=os.getenv("VECTOR_INDEX_PATH", "vector_index"))
+    args = parser.parse_args()
+    build_vector_index(args.spec, args.path)
@@ -0,0 +1,252 @@
+# checkpoint_store.py
+# Local sqlite record of which hospitals (ykiho) each ingestion endpoint has finished,
+# so per-hospital detail scripts resume where they stopped instead of using hand-edited offsets
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, List, Optional, Tuple
+
+DEFAULT_STATE_PATH = os.path.join(os.getenv("INGEST_STATE_DIR", ".ingest_state"), "checkpoints.sqlite")
+
+DONE = "done"      # rows fetched and flushed to the DB
+EMPTY = "empty"    # the API returned no items for this hospital
+FAILED = "failed"  # fetch failed; retried on later runs up to max_attempts
+SKIPPED = "skipped"  # left pending without an attempt (e.g. not cached in replay mode); per-run count only
+
+
+class CheckpointStore:
+    """
+    Per-(endpoint, ykiho) completion state in a local sqlite file.
+    Safe to share between threads; each write is its own transaction.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                endpoint   TEXT NOT NULL,
+                ykiho      TEXT NOT NULL,
+                status     TEXT NOT NULL,
+                attempts   INTEGER NOT NULL DEFAULT 0,
+                error      TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (endpoint, ykiho)
+            )
+        """)
+        self._conn.commit()
+
+    def pending(self, endpoint: str, ids: Iterable[str], max_attempts: int = 3) -> List[str]:
+        """
+        IDs (in the given order) that are not done yet for this endpoint.
+        Failed IDs are included until they have failed max_attempts times.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ykiho, status, attempts FROM checkpoints WHERE endpoint = ?", (endpoint,)
+            ).fetchall()
+        finished = {ykiho for ykiho, status, attempts in rows
+                    if status in (DONE, EMPTY) or attempts >= max_attempts}
+        return [i for i in ids if str(i) not in finished]
+
+    def plan(
+        self, endpoint: str, ids: Iterable[str], stale_after_days: Optional[float] = None, max_attempts: int = 3
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Splits IDs by priority for a refresh:
+        - new:   never fetched for this endpoint (in the given order)
+        - retry: failed fewer than max_attempts times
+        - stale: done/empty longer than stale_after_days ago, oldest first (None: no refresh)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ykiho, status, attempts, updated_at FROM checkpoints WHERE endpoint = ?", (endpoint,)
+            ).fetchall()
+        state = {ykiho: (status, attempts, updated_at) for ykiho, status, attempts, updated_at in rows}
+        cutoff = None
+        if stale_after_days is not None:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=stale_after_days)).isoformat(timespec="seconds")
+
+        new, retry, stale = [], [], []
+        for i in ids:
+            record = state.get(str(i))
+            if record is None:
+                new.append(i)
+            elif record[0] == FAILED:
+                if record[1] < max_attempts:
+                    retry.append(i)
+            elif cutoff is not None and record[2] < cutoff:
+                stale.append(i)
+        stale.sort(key=lambda i: state[str(i)][2])
+        return new, retry, stale
+
+    def mark_many(self, endpoint: str, ids: Iterable[str], status: str, error: Optional[str] = None) -> None:
+        """
+        Records the status of several IDs in one transaction.
+        """
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        failed = 1 if status == FAILED else 0
+        rows = [(endpoint, str(i), status, failed, error, now) for i in ids]
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO checkpoints (endpoint, ykiho, status, attempts, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (endpoint, ykiho) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = checkpoints.attempts + excluded.attempts,
+                    error = excluded.error,
+                    updated_at = excluded.updated_at
+            """, rows)
+            self._conn.commit()
+
+    def mark(self, endpoint: str, ykiho: str, status: str, error: Optional[str] = None) -> None:
+        self.mark_many(endpoint, [ykiho], status, error)
+
+    def summary(self, endpoint: str) -> dict:
+        """
+        Number of IDs per status for an endpoint.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM checkpoints WHERE endpoint = ? GROUP BY status", (endpoint,)
+            ).fetchall()
+        return dict(rows)
+
+    def reset(self, endpoint: str) -> None:
+        """
+        Forgets all progress for an endpoint (the next run starts from the first ID).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE endpoint = ?", (endpoint,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CheckpointedBatch:
+    """
+    Streams fetched results for one endpoint into a writer and commits progress in batches.
+
+    The writer (e.g. streaming_writer.FanOutWriter) has write(result), touch(ykiho) for
+    hospitals without items, and flush(); it may also flush on its own when its row
+    buffer fills. Every `flush_every` hospitals the
+    writer is flushed and only then are those IDs marked done, so a crash re-fetches at
+    most one batch (writes must be idempotent upserts). Only IDs are held here.
+    """
+
+    def __init__(self, store: CheckpointStore, endpoint: str, writer, flush_every: int = 100):
+        self.store = store
+        self.endpoint = endpoint
+        self.writer = writer
+        self.flush_every = flush_every
+        self.counts = {DONE: 0, EMPTY: 0, FAILED: 0, SKIPPED: 0}
+        self._ids, self._empty = [], []
+
+    def add(self, ykiho: str, result: Optional[object]) -> bool:
+        """
+        Writes a fetched result (None: no items). Returns True if this committed a batch.
+        """
+        if result is None:
+            self.writer.touch(ykiho)
+            self._empty.append(ykiho)
+        else:
+            self.writer.write(result)
+            self._ids.append(ykiho)
+        if len(self._ids) + len(self._empty) >= self.flush_every:
+            self.flush()
+            return True
+        return False
+
+    def fail(self, ykiho: str, error: Exception) -> None:
+        print(f"⚠️ {self.endpoint}: failed to fetch {ykiho}: {error}")
+        self.store.mark(self.endpoint, ykiho, FAILED, str(error)[:500])
+        self.counts[FAILED] += 1
+
+    def skip(self, ykiho: str, error: Exception) -> None:
+        """
+        Leaves an ID pending without recording an attempt, for errors that say nothing
+        about the hospital (e.g. a replay-mode cache miss).
+        """
+        print(f"🟠 {self.endpoint}: skipped {ykiho}: {error}")
+        self.counts[SKIPPED] += 1
+
+    def flush(self) -> None:
+        self.writer.flush()
+        self.store.mark_many(self.endpoint, self._ids, DONE)
+        self.store.mark_many(self.endpoint, self._empty, EMPTY)
+        self.counts[DONE] += len(self._ids)
+        self.counts[EMPTY] += len(self._empty)
+        self._ids, self._empty = [], []
+
+    def report(self) -> None:
+        print(f"✅ {self.endpoint}: {self.counts[DONE]} done, {self.counts[EMPTY]} empty, "
+              f"{self.counts[FAILED]} failed, {self.counts[SKIPPED]} skipped this run "
+              f"({self.store.summary(self.endpoint)} overall)")
+
+
+def run_with_checkpoints(
+    store: CheckpointStore,
+    endpoint: str,
+    ids: List[str],
+    fetch: Callable[[str], Optional[object]],
+    writer,
+    flush_every: int = 100,
+    limit: Optional[int] = None,
+    stop_on: tuple = (),
+    skip_on: tuple = (),
+    skip_finished: bool = True,
+) -> dict:
+    """
+    Fetches every pending ID and streams results into writer, committing progress
+    in batches (see CheckpointedBatch).
+
+    - fetch(ykiho) returns a result, or None when the API has no items for it
+    - fetch errors mark the ID failed and the run continues
+    - an exception in stop_on (e.g. an exhausted quota) flushes the current batch
+      and returns; Ctrl-C flushes it and re-raises. The interrupted ID stays pending
+    - an exception in skip_on (e.g. a replay-mode cache miss) leaves the ID pending
+      without using up one of its attempts, and the run continues
+    - skip_finished=False fetches ids as given (for callers that already planned
+      them with CheckpointStore.plan, including stale ones to refresh)
+    """
+    todo = store.pending(endpoint, ids) if skip_finished else list(ids)
+    if limit is not None:
+        todo = todo[:limit]
+    print(f"{endpoint}: {len(todo)} of {len(ids)} hospitals to fetch this run (so far: {store.summary(endpoint)})")
+
+    batch = CheckpointedBatch(store, endpoint, writer, flush_every)
+    start = time.perf_counter()
+    interrupted = False
+    try:
+        for n, ykiho in enumerate(todo, 1):
+            try:
+                result = fetch(ykiho)
+            except stop_on as e:
+                print(f"🔴 Stopping at {ykiho}: {e}")
+                break
+            except skip_on as e:
+                batch.skip(ykiho, e)
+                continue
+            except Exception as e:
+                batch.fail(ykiho, e)
+                continue
+
+            if batch.add(ykiho, result):
+                elapsed = time.perf_counter() - start
+                print(f"  [{n}/{len(todo)}] flushed, {elapsed:.0f}s elapsed, ~{elapsed / n * (len(todo) - n):.0f}s left")
+    except KeyboardInterrupt:
+        print("🔴 Interrupted, flushing the current batch")
+        interrupted = True
+    batch.flush()
+
+    batch.report()
+    if interrupted:
+        raise KeyboardInterrupt
+    return batch.counts
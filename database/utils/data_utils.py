@@ -6,9 +6,13 @@ import pandas as pd
 def extract_items_from_response(response: dict) -> pd.DataFrame:
     """
     Extracts the list of items from the OpenAPI JSON response and returns a DataFrame.
+    A response without results (`"items": ""`) gives an empty DataFrame.
     """
     try:
-        items = response["response"]["body"]["items"]["item"]
+        items = response["response"]["body"]["items"]
+        if not items:
+            return pd.DataFrame()
+        items = items["item"]
         if isinstance(items, dict):  # single record
             items = [items]
         return pd.DataFrame(items)
@@ -1,14 +1,13 @@
 # db_utils.py
+import io
 import os
+import uuid
 import pandas as pd
 from sqlalchemy import create_engine
+from sqlalchemy import inspect
 from sqlalchemy import text
 from dotenv import load_dotenv
 
-from sqlalchemy import MetaData, Table
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.exc import SQLAlchemyError
-
 # Load .env file
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -17,10 +16,18 @@ def get_engine():
     return create_engine(DATABASE_URL)
 
 def upload_dataframe(df: pd.DataFrame, table_name: str, if_exists="append"):
+    """
+    Appends df to table_name with COPY (see copy_dataframe).
+    - if_exists="replace" recreates the table from df's columns first
+    - a missing table is created from df's columns, like DataFrame.to_sql
+    """
     engine = get_engine()
-    with engine.connect() as connection:
-        df.to_sql(table_name, con=connection, if_exists=if_exists, index=False)
-        print(f"✅ Uploaded to table: {table_name}")
+    if if_exists != "append" or not inspect(engine).has_table(table_name):
+        with engine.begin() as connection:
+            df.head(0).to_sql(table_name, con=connection, if_exists=if_exists, index=False)
+    rows = copy_dataframe(df, table_name, engine=engine)
+    print(f"✅ Uploaded {rows} rows to table: {table_name}")
+
 
 def get_hospital_ids():
     engine = get_engine()
@@ -79,34 +86,112 @@ def upload_dataframe_ignore_dups(
     pk: list[str] | None = None
 ):
     """
-    - If pk is None: behaves like df.to_sql(..., if_exists=if_exists)
-    - If pk is provided and if_exists='append', does a bulk INSERT ... ON CONFLICT DO NOTHING
-      based on those pk columns.
+    - If pk is None: behaves like upload_dataframe(df, table_name, if_exists)
+    - If pk is provided and if_exists='append', COPYs into a staging table and merges
+      with INSERT ... ON CONFLICT (pk) DO NOTHING
     """
-    engine = get_engine()
-
     if pk is None or if_exists != "append":
-        # Simple path: use pandas
-        with engine.connect() as conn:
-            df.to_sql(table_name, con=conn, if_exists=if_exists, index=False)
-            print(f"✅ Uploaded to table: {table_name} (mode={if_exists})")
+        upload_dataframe(df, table_name, if_exists=if_exists)
         return
 
-    # Upsert path
-    metadata = MetaData()
-    table = Table(table_name, metadata, autoload_with=engine)
-
-    records = df.to_dict(orient="records")
-    if not records:
+    if df.empty:
         print(f"⚠️ No records to insert into {table_name}")
         return
 
-    stmt = insert(table).on_conflict_do_nothing(index_elements=pk)
-
     try:
-        with engine.begin() as conn:
-            conn.execute(stmt, records)
-        print(f"✅ Upserted {len(records)} rows into {table_name}, duplicates skipped on {pk}")
-    except SQLAlchemyError as e:
+        inserted = copy_dataframe(df, table_name, pk=pk, on_conflict="nothing")
+        print(f"✅ Upserted {inserted} of {len(df)} rows into {table_name}, duplicates skipped on {pk}")
+    except Exception as e:
         print(f"❌ Failed to upsert into {table_name}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# --- COPY-based bulk loading ---
+
+COPY_CHUNK_ROWS = 50000  # rows serialized to CSV per COPY call (bounds the CSV buffer)
+COPY_NULL = "\\N"       # NULL marker, so empty strings stay empty strings
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _csv_ready(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Float columns holding only whole numbers (integer columns that picked up NaN)
+    are written as integers, since COPY rejects "2.0" for an integer column.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col]):
+            values = df[col].dropna()
+            if len(values) and (values % 1 == 0).all():
+                df[col] = df[col].astype("Int64")
+    return df
+
+
+def copy_dataframe(
+    df: pd.DataFrame,
+    table_name: str,
+    pk: list[str] | None = None,
+    on_conflict: str = "nothing",
+    engine=None,
+) -> int:
+    """
+    Bulk-loads df into an existing table with Postgres COPY, in one transaction.
+
+    - Without pk: COPY straight into the table (plain append)
+    - With pk: COPY into a temporary staging table, then
+      INSERT INTO table SELECT ... FROM staging ON CONFLICT (pk) DO NOTHING / DO UPDATE
+      (on_conflict="nothing" or "update"; for updates the last row per key wins)
+
+    :return: Number of rows inserted (or updated) in the target table
+    """
+    if on_conflict not in ("nothing", "update"):
+        raise ValueError("on_conflict must be 'nothing' or 'update'")
+    if df.empty:
+        return 0
+    engine = engine or get_engine()
+    columns = ", ".join(_quote(c) for c in df.columns)
+    target = _quote(table_name)
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if pk:
+            staging = _quote(f"staging_{table_name}_{uuid.uuid4().hex[:8]}")
+            cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP")
+            copy_into = staging
+        else:
+            copy_into = target
+
+        df = _csv_ready(df)
+        for start in range(0, len(df), COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {copy_into} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer
+            )
+        rows = len(df)
+
+        if pk:
+            keys = ", ".join(_quote(c) for c in pk)
+            updates = [c for c in df.columns if c not in pk]
+            if on_conflict == "update" and updates:
+                # DISTINCT ON keeps one row per key: ON CONFLICT DO UPDATE cannot touch a row twice
+                select = f"SELECT DISTINCT ON ({keys}) {columns} FROM {staging} ORDER BY {keys}, ctid DESC"
+                action = "DO UPDATE SET " + ", ".join(f"{_quote(c)} = EXCLUDED.{_quote(c)}" for c in updates)
+            else:
+                select = f"SELECT {columns} FROM {staging}"
+                action = "DO NOTHING"
+            cursor.execute(f"INSERT INTO {target} ({columns}) {select} ON CONFLICT ({keys}) {action}")
+            rows = cursor.rowcount
+
+        connection.commit()
+        return rows
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
@@ -0,0 +1,161 @@
+# delta_sync.py
+# Incremental refresh: fingerprint each incoming row, compare with the fingerprints
+# stored in the table, and write only what changed.
+#
+# Target tables get two columns (added on first use):
+#   row_fingerprint  md5 of the row's non-key values as last written
+#   deleted_at       set when a row disappears from the source (soft delete),
+#                    cleared again if it comes back
+#
+# A refresh then costs one fingerprint read plus writes proportional to churn,
+# instead of re-appending the whole table.
+
+import hashlib
+import math
+
+import pandas as pd
+from sqlalchemy import text
+
+from database.utils.db_utils import copy_dataframe, get_engine
+
+FINGERPRINT_COLUMN = "row_fingerprint"
+DELETED_COLUMN = "deleted_at"
+
+
+def _canonical(value) -> str:
+    """
+    Text form of a value that ignores dtype noise (2 vs 2.0, NaN vs None vs pd.NA).
+    """
+    if value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+        return "\x00"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, float):
+        return repr(round(value, 7))
+    return str(value).strip()
+
+
+def row_fingerprints(df: pd.DataFrame, key_columns: list) -> pd.Series:
+    """
+    md5 fingerprint of each row's non-key columns (in sorted column order).
+    """
+    value_columns = sorted(c for c in df.columns if c not in key_columns
+                           and c not in (FINGERPRINT_COLUMN, DELETED_COLUMN))
+    values = df[value_columns].astype(object).itertuples(index=False, name=None)
+    return pd.Series(
+        [hashlib.md5("\x1f".join(_canonical(v) for v in row).encode("utf-8")).hexdigest() for row in values],
+        index=df.index,
+    )
+
+
+def ensure_delta_columns(engine, table_name: str) -> None:
+    """
+    Add row_fingerprint and deleted_at to a table created before delta refresh existed.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            ALTER TABLE "{table_name}"
+            ADD COLUMN IF NOT EXISTS {FINGERPRINT_COLUMN} TEXT,
+            ADD COLUMN IF NOT EXISTS {DELETED_COLUMN} TIMESTAMPTZ;
+        """))
+
+
+def load_fingerprints(engine, table_name: str, key_columns: list,
+                      scope_column: str = None, scope_values: list = None) -> pd.DataFrame:
+    """
+    Stored keys (as text), fingerprints and soft-delete state, optionally limited
+    to rows whose scope_column is in scope_values (e.g. the hospitals just fetched).
+    """
+    keys = ", ".join(f'"{c}"::text AS "{c}"' for c in key_columns)
+    where, params = "", {}
+    if scope_column is not None:
+        where = f'WHERE "{scope_column}"::text = ANY(:scope)'
+        params["scope"] = [str(v) for v in scope_values]
+    query = text(f"""
+        SELECT {keys}, {FINGERPRINT_COLUMN}, {DELETED_COLUMN} IS NOT NULL AS deleted
+        FROM "{table_name}" {where}
+    """)
+    with engine.connect() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return pd.DataFrame(rows, columns=key_columns + [FINGERPRINT_COLUMN, "deleted"])
+
+
+def soft_delete(engine, table_name: str, key_columns: list, keys: pd.DataFrame) -> int:
+    """
+    Sets deleted_at = now() on the rows with the given keys (still active ones only).
+    """
+    if keys.empty:
+        return 0
+    unnest = ", ".join(f"unnest(CAST(:k{i} AS text[])) AS k{i}" for i in range(len(key_columns)))
+    match = " AND ".join(f't."{c}"::text = gone.k{i}' for i, c in enumerate(key_columns))
+    query = text(f"""
+        UPDATE "{table_name}" AS t SET {DELETED_COLUMN} = now()
+        FROM (SELECT {unnest}) AS gone
+        WHERE {match} AND t.{DELETED_COLUMN} IS NULL
+    """)
+    params = {f"k{i}": keys[c].astype(str).tolist() for i, c in enumerate(key_columns)}
+    with engine.begin() as conn:
+        return conn.execute(query, params).rowcount
+
+
+def apply_delta(
+    df: pd.DataFrame,
+    table_name: str,
+    key_columns: list,
+    scope_column: str = None,
+    scope_values: list = None,
+    delete_missing: bool = True,
+    engine=None,
+) -> dict:
+    """
+    Brings table_name in line with df, writing only the difference.
+
+    - new keys are inserted, keys whose fingerprint changed (or that were
+      soft-deleted and came back) are updated, identical rows are not touched
+    - with delete_missing, stored active rows missing from df are soft-deleted.
+      With scope_column/scope_values only stored rows in that scope are compared,
+      e.g. the relation rows of the hospitals fetched in this batch (pass hospitals
+      that returned no rows too, so their old rows are deleted)
+
+    :return: Counts of inserted, updated, deleted and unchanged rows
+    """
+    engine = engine or get_engine()
+    ensure_delta_columns(engine, table_name)
+
+    df = df.drop_duplicates(subset=key_columns, keep="last").reset_index(drop=True)
+    incoming = df[key_columns].astype(str)
+    incoming[FINGERPRINT_COLUMN] = row_fingerprints(df, key_columns)
+    if scope_column is not None and scope_values is None:
+        scope_values = df[scope_column].unique().tolist()
+    stored = load_fingerprints(engine, table_name, key_columns, scope_column, scope_values)
+
+    merged = incoming.merge(stored, on=key_columns, how="left", suffixes=("", "_stored"), indicator=True)
+    is_new = (merged["_merge"] == "left_only").to_numpy()
+    is_changed = (~is_new) & ((merged[FINGERPRINT_COLUMN] != merged[f"{FINGERPRINT_COLUMN}_stored"])
+                             | merged["deleted"].fillna(False).astype(bool)).to_numpy()
+
+    changed = df[is_new | is_changed].copy()
+    changed[FINGERPRINT_COLUMN] = incoming.loc[is_new | is_changed, FINGERPRINT_COLUMN]
+    changed[DELETED_COLUMN] = None
+    if not changed.empty:
+        copy_dataframe(changed, table_name, pk=key_columns, on_conflict="update", engine=engine)
+
+    deleted = 0
+    if delete_missing and not stored.empty:
+        active = stored[~stored["deleted"].astype(bool)]
+        gone = active.merge(incoming[key_columns], on=key_columns, how="left", indicator=True)
+        deleted = soft_delete(engine, table_name, key_columns, gone.loc[gone["_merge"] == "left_only", key_columns])
+
+    return {
+        "inserted": int(is_new.sum()),
+        "updated": int(is_changed.sum()),
+        "deleted": int(deleted),
+        "unchanged": int(len(df) - is_new.sum() - is_changed.sum()),
+    }
+
+
+def format_delta(table_name: str, report: dict) -> str:
+    return (f"{table_name}: +{report['inserted']} inserted, ~{report['updated']} updated, "
+            f"-{report['deleted']} deleted, {report['unchanged']} unchanged")
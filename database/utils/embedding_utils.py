@@ -1,4 +1,5 @@
 from sentence_transformers import SentenceTransformer
 EMBED_MODEL = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
 def embed_texts(texts):
+    # Unit-norm float32 rows, stored as is in review_chunks
     return EMBED_MODEL.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
@@ -0,0 +1,99 @@
+from dotenv import load_dotenv
+from app.utils.database import load_database_url, create_db_engine
+from app.core.aspect_scores import ASPECT_CATEGORIES, compute_aspect_vector
+from sqlalchemy import text
+from itertools import groupby
+from typing import Dict, List, Any
+
+def create_aspect_scores_table(engine) -> None:
+    """
+    Create table to store per-hospital review aspect vectors next to review_summaries
+
+    Args:
+        engine: SQLAlchemy engine object
+    """
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS review_aspect_scores (
+                    hospital_id TEXT PRIMARY KEY REFERENCES hospitals(id),
+                    chunk_count INTEGER NOT NULL,
+                    coverage REAL[] NOT NULL,
+                    sentiment REAL[] NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+            """))
+            conn.commit()
+            print("review_aspect_scores table ready.")
+        except Exception as e:
+            print(f"Error creating table: {str(e)}")
+            conn.rollback()
+            raise
+
+def generate_aspect_scores(batch_size: int = 500) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute coverage and sentiment per review category for every hospital
+    with review_chunks, and upsert them into review_aspect_scores
+
+    Vectors are ordered as app.core.aspect_scores.ASPECT_CATEGORIES.
+
+    Args:
+        batch_size: Number of hospitals upserted per statement
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Hospital ID to aspect vector mapping
+    """
+    load_dotenv()
+    db_url = load_database_url()
+    engine = create_db_engine(db_url)
+
+    create_aspect_scores_table(engine)
+
+    query = text("""
+        SELECT hospital_id, category, chunk_text
+        FROM review_chunks
+        ORDER BY hospital_id
+    """)
+    upsert_query = text("""
+        INSERT INTO review_aspect_scores (hospital_id, chunk_count, coverage, sentiment, updated_at)
+        VALUES (:hospital_id, :chunk_count, :coverage, :sentiment, now())
+        ON CONFLICT (hospital_id) DO UPDATE
+        SET chunk_count = EXCLUDED.chunk_count,
+            coverage = EXCLUDED.coverage,
+            sentiment = EXCLUDED.sentiment,
+            updated_at = EXCLUDED.updated_at
+    """)
+
+    aspect_scores = {}
+    pending: List[Dict[str, Any]] = []
+
+    def flush(conn):
+        if pending:
+            conn.execute(upsert_query, pending)
+            print(f"Upserted {len(pending)} hospitals ({len(aspect_scores)} total)")
+            pending.clear()
+
+    with engine.connect() as read_conn, engine.begin() as write_conn:
+        rows = read_conn.execution_options(stream_results=True).execute(query)
+        for hospital_id, hospital_rows in groupby(rows, key=lambda row: row[0]):
+            coverage, sentiment, chunk_count = compute_aspect_vector(
+                (row[1], row[2]) for row in hospital_rows
+            )
+            record = {
+                "hospital_id": hospital_id,
+                "chunk_count": chunk_count,
+                "coverage": [round(float(v), 4) for v in coverage],
+                "sentiment": [round(float(v), 4) for v in sentiment]
+            }
+            aspect_scores[hospital_id] = record
+            pending.append(record)
+            if len(pending) >= batch_size:
+                flush(write_conn)
+        flush(write_conn)
+
+    print(f"Aspect scores generated for {len(aspect_scores)} hospitals "
+          f"(categories: {', '.join(ASPECT_CATEGORIES)})")
+    return aspect_scores
+
+if __name__ == "__main__":
+    generate_aspect_scores()
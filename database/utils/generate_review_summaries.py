@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 from app.utils.database import load_database_url, create_db_engine
 from app.core.hospital_search import search_hospitals
+from app.core.similarity_calculator import normalize_rows
 from sqlalchemy import text, MetaData, Table, Column, String, ForeignKey, create_engine, inspect
 from collections import defaultdict
 from openai import OpenAI
@@ -92,7 +93,8 @@ def create_review_summaries_table(engine) -> None:
                     hospital_id TEXT PRIMARY KEY REFERENCES hospitals(id),
                     name TEXT,
                     review TEXT,
-                    embedding vector(1536)
+                    embedding vector(1536),
+                    embedding_normalized BOOLEAN NOT NULL DEFAULT false
                 );
             """))
             conn.commit()
@@ -102,6 +104,70 @@ def create_review_summaries_table(engine) -> None:
             conn.rollback()
             raise
 
+def ensure_embedding_normalized_column(engine) -> None:
+    """
+    Add the embedding_normalized flag to a review_summaries table created before it existed
+    
+    Args:
+        engine: SQLAlchemy engine object
+    """
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("""
+                ALTER TABLE review_summaries
+                ADD COLUMN IF NOT EXISTS embedding_normalized BOOLEAN NOT NULL DEFAULT false;
+            """))
+            conn.commit()
+        except Exception as e:
+            print(f"Error adding embedding_normalized column: {str(e)}")
+            conn.rollback()
+            raise
+
+def normalize_stored_embeddings(batch_size: int = 500) -> int:
+    """
+    One-off backfill: L2 normalize stored summary embeddings and flag them
+    
+    Args:
+        batch_size: Number of rows updated per statement
+        
+    Returns:
+        int: Number of rows normalized
+    """
+    load_dotenv()
+    db_url = load_database_url()
+    engine = create_db_engine(db_url)
+    ensure_embedding_normalized_column(engine)
+    
+    select_query = text("""
+        SELECT hospital_id, embedding::text AS embedding
+        FROM review_summaries
+        WHERE NOT embedding_normalized AND embedding IS NOT NULL
+        ORDER BY hospital_id
+        LIMIT :limit
+    """)
+    update_query = text("""
+        UPDATE review_summaries
+        SET embedding = :embedding, embedding_normalized = true
+        WHERE hospital_id = :hospital_id
+    """)
+    
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select_query, {"limit": batch_size}).fetchall()
+            if not rows:
+                break
+            vectors = normalize_rows([json.loads(row[1]) for row in rows])
+            conn.execute(update_query, [
+                {"hospital_id": row[0], "embedding": str(vector.tolist())}
+                for row, vector in zip(rows, vectors)
+            ])
+        total += len(rows)
+        print(f"Normalized {total} embeddings")
+    
+    print(f"Embedding normalization finished ({total} rows)")
+    return total
+
 def generate_review_summaries(hospital_reviews: Dict[str, Dict[str, List[Dict[str, str]]]]) -> Dict[str, str]:
     """
     Generate hospital review summaries using GPT
@@ -114,7 +180,7 @@ def generate_review_summaries(hospital_reviews: Dict[str, Dict[str, List[Dict[st
     """
     # OpenAI API setup
     load_dotenv()
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), base_url=os.getenv('OPENAI_BASE_URL'))
     
     processed_hospitals = {}
     total_hospitals = len(hospital_reviews)
@@ -193,6 +259,8 @@ def generate_review_summaries(hospital_reviews: Dict[str, Dict[str, List[Dict[st
                 if not embedding:
                     print(f"Failed to generate embedding (hospital_id: {hospital_id})")
                     continue
+                # Store unit-norm float32 so the request path can skip normalization
+                embedding = str(normalize_rows([embedding])[0].tolist())
                 
                 # Connect to database
                 db_url = load_database_url()
@@ -206,10 +274,10 @@ def generate_review_summaries(hospital_reviews: Dict[str, Dict[str, List[Dict[st
                     
                     # Save to database
                     upsert_query = text("""
-                        INSERT INTO review_summaries (hospital_id, name, review, embedding)
-                        VALUES (:hospital_id, :name, :review, :embedding)
+                        INSERT INTO review_summaries (hospital_id, name, review, embedding, embedding_normalized)
+                        VALUES (:hospital_id, :name, :review, :embedding, true)
                         ON CONFLICT (hospital_id) DO UPDATE
-                        SET review = :review, embedding = :embedding
+                        SET review = :review, embedding = :embedding, embedding_normalized = true
                     """)
                     
                     conn.execute(upsert_query, {
@@ -271,9 +339,10 @@ def process_hospital_reviews(city: str = "서울", district: str = "강남구",
     
     # Create review_summaries table if it doesn't exist
     # create_review_summaries_table(engine)
+    ensure_embedding_normalized_column(engine)
     
     # Initialize OpenAI client
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), base_url=os.getenv('OPENAI_BASE_URL'))
     
     query = text("""
         SELECT h.id, h.name, rc.chunk_text, rc.embedding, rc.category
@@ -324,4 +393,5 @@ def process_hospital_reviews(city: str = "서울", district: str = "강남구",
 
 if __name__ == "__main__":
     # analyze_review_categories()
+    # normalize_stored_embeddings()
     process_hospital_reviews()
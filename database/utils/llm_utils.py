@@ -12,6 +12,8 @@ from database.utils.chunking_prompt import SYSTEM_CHUNK_PROMPT
 load_dotenv()
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 MODEL = "gpt-4o-mini"   # or whichever model you prefer
+# Point at any OpenAI-compatible server (e.g. benchmarks/fake_openai_server.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
 
 # Common headers for OpenAI
 HEADERS = {
@@ -38,7 +40,7 @@ def chunk_review_with_llm(review_text: str, timeout: int = 30) -> dict:
         "temperature": 0.0
     }
 
-    url = "https://api.openai.com/v1/chat/completions"
+    url = f"{OPENAI_BASE_URL}/chat/completions"
     try:
         resp = requests.post(url, headers=HEADERS, json=payload, timeout=timeout)
         resp.raise_for_status()
@@ -0,0 +1,137 @@
+# seen_store.py
+# Local sqlite record of crawled review posts, shared by re-runs and parallel shards of
+# naver_blog_crawler, so posts already processed are skipped before the cost is paid:
+#   - seen URLs are checked before fetching
+#   - content hashes are checked (and claimed) before the LLM chunking call, which also
+#     catches the same text reached through a different URL
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+DEFAULT_SEEN_PATH = os.path.join(os.getenv("INGEST_STATE_DIR", ".ingest_state"), "crawl_seen.sqlite")
+
+DONE = "done"            # chunked, embedded and uploaded
+EMPTY = "empty"          # the LLM produced no chunks
+DUPLICATE = "duplicate"  # same content as a post processed under another URL
+
+# claim_content results
+ACQUIRED = "acquired"    # this run processes the content
+HELD = "held"            # another run is processing it right now; retry later
+FINISHED = "finished"    # already processed (under this or another URL)
+
+CLAIM_LEASE_SECONDS = 3600  # a claim older than this (crashed run) can be taken over
+
+
+def content_hash(text: str) -> str:
+    """
+    sha256 of the post text with whitespace normalized.
+    """
+    return hashlib.sha256(re.sub(r"\s+", " ", text).strip().encode("utf-8")).hexdigest()
+
+
+class SeenStore:
+    """
+    Processed post URLs and content hashes in a local sqlite file.
+    Several crawler processes may share one file; content claims are atomic.
+    """
+
+    def __init__(self, path: str = DEFAULT_SEEN_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                url          TEXT PRIMARY KEY,
+                hospital_id  TEXT,
+                status       TEXT NOT NULL,
+                content_hash TEXT,
+                chunks       INTEGER NOT NULL DEFAULT 0,
+                updated_at   TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS content_hashes (
+                hash       TEXT PRIMARY KEY,
+                url        TEXT NOT NULL,
+                finished   INTEGER NOT NULL DEFAULT 0,
+                claimed_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def unseen(self, urls: Iterable[str]) -> List[str]:
+        """
+        URLs (in the given order, without repeats) that have not been processed yet.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        with self._lock:
+            seen = {row[0] for row in self._conn.execute(
+                f"SELECT url FROM seen_urls WHERE url IN ({', '.join('?' * len(urls))})", urls
+            )}
+        return [url for url in urls if url not in seen]
+
+    def claim_content(self, digest: str, url: str) -> str:
+        """
+        Claims a content hash before the expensive steps.
+        Returns ACQUIRED, HELD (claimed by another run within CLAIM_LEASE_SECONDS;
+        it may still fail and release it) or FINISHED.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute("""
+                INSERT INTO content_hashes (hash, url, finished, claimed_at) VALUES (?, ?, 0, ?)
+                ON CONFLICT (hash) DO UPDATE SET url = excluded.url, claimed_at = excluded.claimed_at
+                WHERE content_hashes.finished = 0 AND content_hashes.claimed_at < ?
+            """, (digest, url, now, now - CLAIM_LEASE_SECONDS))
+            self._conn.commit()
+            if cursor.rowcount == 1:
+                return ACQUIRED
+            row = self._conn.execute("SELECT finished FROM content_hashes WHERE hash = ?", (digest,)).fetchone()
+        return FINISHED if row and row[0] else HELD
+
+    def release_content(self, digest: str) -> None:
+        """
+        Gives up a claim after a failure, so a later run retries the post.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM content_hashes WHERE hash = ? AND finished = 0", (digest,))
+            self._conn.commit()
+
+    def mark(self, url: str, status: str, hospital_id: Optional[str] = None,
+             digest: Optional[str] = None, chunks: int = 0) -> None:
+        """
+        Records a processed URL (and finishes its content claim).
+        """
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO seen_urls (url, hospital_id, status, content_hash, chunks, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (url, hospital_id, status, digest, chunks, now))
+            if digest is not None and status != DUPLICATE:
+                self._conn.execute("UPDATE content_hashes SET finished = 1 WHERE hash = ?", (digest,))
+            self._conn.commit()
+
+    def summary(self) -> dict:
+        """
+        Number of URLs per status.
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM seen_urls GROUP BY status").fetchall())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM seen_urls")
+            self._conn.execute("DELETE FROM content_hashes")
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,204 @@
+# streaming_writer.py
+# Bounded-memory table writers for ingestion: rows are buffered up to `buffer_rows`
+# and flushed with INSERT ... ON CONFLICT, so partial progress lands in the DB as it
+# is produced and memory does not grow with the number of hospitals.
+
+import pandas as pd
+from sqlalchemy import MetaData, Table
+from sqlalchemy.dialects.postgresql import insert
+
+from database.utils.db_utils import get_engine
+from database.utils.delta_sync import DELETED_COLUMN, FINGERPRINT_COLUMN, apply_delta
+
+
+def dataframe_rows(df: pd.DataFrame) -> list:
+    """
+    DataFrame rows as dicts with NaN/pd.NA turned into None (NULL).
+    """
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+class StreamingTableWriter:
+    """
+    Buffers rows for one table and upserts them every `buffer_rows` rows.
+
+    - update=True:  ON CONFLICT (pk) DO UPDATE the non-key columns (refreshed data wins)
+    - update=False: ON CONFLICT (pk) DO NOTHING (first write wins, e.g. code tables)
+    Rows with the same key within one buffer are collapsed to the last one, since
+    Postgres cannot update the same row twice in a single statement.
+    """
+
+    def __init__(self, table_name: str, pk: list, buffer_rows: int = 5000, update: bool = True, engine=None):
+        self.table_name = table_name
+        self.pk = list(pk)
+        self.buffer_rows = buffer_rows
+        self.update = update
+        self._engine = engine
+        self._table = None
+        self._buffer = {}  # pk tuple -> row
+        self.rows_written = 0
+        self.flushes = 0
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    @property
+    def table(self) -> Table:
+        if self._table is None:
+            self._table = Table(self.table_name, MetaData(), autoload_with=self.engine)
+        return self._table
+
+    @property
+    def full(self) -> bool:
+        return len(self._buffer) >= self.buffer_rows
+
+    def write(self, rows, autoflush: bool = True) -> None:
+        """
+        Adds rows (a DataFrame or a list of dicts); flushes whenever the buffer is full
+        unless autoflush is off (the caller then checks `full` and flushes itself).
+        """
+        if isinstance(rows, pd.DataFrame):
+            rows = dataframe_rows(rows)
+        for row in rows:
+            self._buffer[tuple(row[k] for k in self.pk)] = row
+            if autoflush and self.full:
+                self.flush()
+
+    def touch(self, scope_value) -> None:
+        """
+        Records that a hospital was fetched, even with no rows. Only delta writers use it.
+        """
+
+    def upsert_statement(self, columns: list):
+        """
+        INSERT ... ON CONFLICT statement for rows with the given columns.
+        """
+        stmt = insert(self.table)
+        updates = [c for c in columns if c not in self.pk]
+        if self.update and updates:
+            return stmt.on_conflict_do_update(index_elements=self.pk,
+                                              set_={c: stmt.excluded[c] for c in updates})
+        return stmt.on_conflict_do_nothing(index_elements=self.pk)
+
+    def flush(self) -> int:
+        """
+        Upserts the buffered rows in one transaction. Returns the number of rows written.
+        """
+        if not self._buffer:
+            return 0
+        rows = list(self._buffer.values())
+        # Detail responses do not always carry every field: align rows on the table's columns
+        columns = [c.name for c in self.table.columns if any(c.name in row for row in rows)]
+        records = [{c: row.get(c) for c in columns} for row in rows]
+        with self.engine.begin() as conn:
+            conn.execute(self.upsert_statement(columns), records)
+        self._buffer = {}
+        self.rows_written += len(records)
+        self.flushes += 1
+        return len(records)
+
+    def close(self) -> None:
+        self.flush()
+
+    def summary(self):
+        return self.rows_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+class DeltaTableWriter(StreamingTableWriter):
+    """
+    Streaming writer for delta refresh (delta_sync.apply_delta): each flush compares the
+    buffered rows with what is stored for the same hospitals (scope_column) and writes only
+    new and changed rows; stored rows of those hospitals that were not fetched again
+    are soft-deleted. A hospital's rows are never split across flushes.
+    """
+
+    def __init__(self, table_name: str, pk: list, columns: list = None, scope_column: str = "hospital_id",
+                 buffer_rows: int = 5000, delete_missing: bool = True, engine=None):
+        """
+        :param columns: Columns this writer owns (missing fields are written as NULL).
+                        Defaults to every column seen so far; pass the full list when
+                        responses omit empty fields, so fingerprints stay comparable
+        """
+        super().__init__(table_name, pk, buffer_rows=buffer_rows, update=True, engine=engine)
+        self.columns = list(columns) if columns else None
+        self._seen = dict.fromkeys(self.pk)
+        self.scope_column = scope_column
+        self.delete_missing = delete_missing
+        self._scope = set()
+        self.delta = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    def touch(self, scope_value) -> None:
+        self._scope.add(scope_value)
+
+    def write(self, rows, autoflush: bool = True) -> None:
+        if isinstance(rows, pd.DataFrame):
+            rows = dataframe_rows(rows)
+        for row in rows:
+            self._buffer[tuple(row[k] for k in self.pk)] = row
+            self._scope.add(row[self.scope_column])
+            self._seen.update(dict.fromkeys(row))
+        if autoflush and self.full:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self._buffer and not self._scope:
+            return 0
+        rows = list(self._buffer.values())
+        wanted = self.columns or self._seen
+        columns = [c.name for c in self.table.columns
+                   if c.name in wanted and c.name not in (FINGERPRINT_COLUMN, DELETED_COLUMN)]
+        df = pd.DataFrame([{c: row.get(c) for c in columns} for row in rows], columns=columns)
+        report = apply_delta(df, self.table_name, self.pk, scope_column=self.scope_column,
+                             scope_values=list(self._scope), delete_missing=self.delete_missing,
+                             engine=self.engine)
+        for key, count in report.items():
+            self.delta[key] += count
+        self._buffer, self._scope = {}, set()
+        self.rows_written += report["inserted"] + report["updated"]
+        self.flushes += 1
+        return report["inserted"] + report["updated"]
+
+    def summary(self):
+        return dict(self.delta)
+
+
+class FanOutWriter:
+    """
+    Routes each fetched DataFrame to several table writers, each taking a subset of columns
+    (e.g. department codes to `departments`, relations to `hospital_departments`).
+    Writers are flushed in order, so referenced code tables land before relations.
+    """
+
+    def __init__(self, routes: list):
+        """
+        :param routes: (StreamingTableWriter, columns or None for all) pairs
+        """
+        self.routes = routes
+
+    def write(self, df: pd.DataFrame) -> None:
+        for writer, columns in self.routes:
+            writer.write(df if columns is None else df[[c for c in columns if c in df.columns]], autoflush=False)
+        if any(writer.full for writer, _ in self.routes):
+            self.flush()
+
+    def touch(self, scope_value) -> None:
+        for writer, _ in self.routes:
+            writer.touch(scope_value)
+
+    def flush(self) -> None:
+        for writer, _ in self.routes:
+            writer.flush()
+
+    def summary(self) -> dict:
+        return {writer.table_name: writer.summary() for writer, _ in self.routes}
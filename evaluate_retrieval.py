@@ -1,111 +1,210 @@
+"""
+Offline retrieval evaluation for review-embedding search
+
+For sampled hospitals a user-style query is generated from the review
+summary, embedded, and ranked against every review_summaries embedding
+with SimilarityCalculator. Recall@k and MRR measure how often the source
+hospital comes back on top.
+
+Generated queries and their embeddings are cached under EVAL_CACHE_DIR
+(default .eval_cache/), so repeated runs only call the API for new samples.
+
+    python evaluate_retrieval.py --samples 2000 --k 1 3 10 --workers 8 --rate 5
+"""
 import os
-import pandas as pd
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
 import numpy as np
+import pandas as pd
 from sqlalchemy import text
 from dotenv import load_dotenv
-from app.core.hospital_search import HospitalSearchEngine
+from app.ai.openai_client import OpenAIClient
+from app.core.similarity_calculator import SimilarityCalculator
 from app.utils.database import get_database_connection
-from openai import OpenAI
-
-# Load environment
-load_dotenv()
+from app.utils.rate_limiter import RateLimiter
 
-# Instantiate the client with the API key
-client = OpenAI()
+QUERY_MODEL = "gpt-4o"
+# Bump when the generation prompt changes so cached queries are regenerated
+QUERY_PROMPT_VERSION = "v1"
+QUERY_SYSTEM_PROMPT = "당신은 병원 검색을 위한 사용자 쿼리를 생성하는 전문가입니다."
 
-# Initialize engine and search
-engine = get_database_connection()
-search_engine = HospitalSearchEngine(engine=engine)
 
-# Step 1: Get review samples
-def fetch_review_samples(n=10):
+# Step 1: Get review corpus (every hospital with a summary embedding)
+def fetch_review_corpus(engine) -> pd.DataFrame:
     query = text("""
-        SELECT
-            hospital_id,
-            name AS hospital_name,
-            review AS summary
+        SELECT hospital_id, name, review, embedding
         FROM review_summaries
-        WHERE review IS NOT NULL AND review != ''
-        LIMIT :limit
+        WHERE review IS NOT NULL AND review != '' AND embedding IS NOT NULL
+        ORDER BY hospital_id
     """)
     with engine.connect() as conn:
-        result = conn.execute(query, {'limit': n})
-        rows = result.fetchall()
-    return pd.DataFrame(rows, columns=["hospital_id", "hospital_name", "summary"])
-
-
-# Step 2: Generate query from summary
-def generate_user_query(summary: str) -> str:
+        rows = conn.execute(query).fetchall()
+    return pd.DataFrame(rows, columns=["hospital_id", "name", "review", "embedding"])
+
+
+class QueryCache:
+    """Disk cache of generated queries (JSON lines) and their embeddings (npz)"""
+
+    def __init__(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.queries_path = os.path.join(cache_dir, "queries.jsonl")
+        self.embeddings_path = os.path.join(cache_dir, "query_embeddings.npz")
+        self.queries: Dict[str, str] = {}
+        self.embeddings: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.queries_path):
+            with open(self.queries_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.queries[record["key"]] = record["query"]
+        if os.path.exists(self.embeddings_path):
+            data = np.load(self.embeddings_path)
+            self.embeddings = dict(zip(data["keys"].tolist(), data["vectors"]))
+
+    @staticmethod
+    def key(summary: str) -> str:
+        return hashlib.sha256(f"{QUERY_PROMPT_VERSION}|{QUERY_MODEL}|{summary}".encode("utf-8")).hexdigest()
+
+    def add_query(self, key: str, query: str) -> None:
+        """Record a generated query; appended immediately so interrupted runs resume"""
+        with self._lock:
+            self.queries[key] = query
+            with open(self.queries_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "query": query}, ensure_ascii=False) + "\n")
+
+    def save_embeddings(self) -> None:
+        keys = list(self.embeddings)
+        vectors = np.vstack([self.embeddings[k] for k in keys]).astype("float32") if keys else np.empty((0, 0))
+        np.savez(self.embeddings_path, keys=np.array(keys), vectors=vectors)
+
+
+# Step 2: Generate queries from summaries (parallel, rate limited)
+def generate_user_query(client: OpenAIClient, summary: str) -> str:
     prompt = f"""아래는 병원 후기에 대한 요약입니다. 사용자가 병원을 찾으려고 할 때 검색창에 입력할 법한 쿼리를 한 문장으로 작성해주세요.
 
 후기 요약: "{summary}"
 
 쿼리:"""
-    
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "당신은 병원 검색을 위한 사용자 쿼리를 생성하는 전문가입니다."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        max_tokens=40
-    )
-    return response.choices[0].message.content.strip()
-
-# Step 3: Run hospital search (dummy metadata)
-def run_search(query_text):
-    return search_engine.search_hospitals(
-        query_text,
-        city_name="서울특별시",
-        district_name="강남구",
-        hospital_type_name="병원",
-        department_name="정형외과",
-        limit=10
-    )
+
+    return client.chat_completion([
+        {"role": "system", "content": QUERY_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ], temperature=0.7)
+
+
+def generate_queries(client: OpenAIClient, summaries: List[str], cache: QueryCache,
+                     workers: int, rate: float) -> List[str]:
+    """Return one query per summary, generating only the ones missing from cache"""
+    keys = [cache.key(s) for s in summaries]
+    missing = {k: s for k, s in zip(keys, summaries) if k not in cache.queries}
+    print(f"Queries: {len(summaries) - len(missing)} cached, {len(missing)} to generate")
+
+    limiter = RateLimiter(rate, burst=workers)
+
+    def task(key, summary):
+        with limiter:
+            return key, generate_user_query(client, summary)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(task, k, s) for k, s in missing.items()]
+        for done, future in enumerate(as_completed(futures), 1):
+            key, query = future.result()
+            if query:
+                cache.add_query(key, query)
+            else:
+                failed += 1
+            if done % 100 == 0:
+                print(f"  generated {done}/{len(missing)}")
+    if failed:
+        print(f"  {failed} queries failed and will be retried next run")
+
+    return [cache.queries.get(k, "") for k in keys]
+
+
+# Step 3: Embed queries (batched, cached)
+def embed_queries(client: OpenAIClient, queries: List[str], cache: QueryCache) -> np.ndarray:
+    keys = [cache.key(q) for q in queries]
+    missing = sorted({k: q for k, q in zip(keys, queries) if k not in cache.embeddings}.items())
+    print(f"Query embeddings: {len(queries) - len(missing)} cached, {len(missing)} to embed")
+    if missing:
+        vectors = client.get_embeddings([q for _, q in missing])
+        if len(vectors) != len(missing):
+            raise RuntimeError("Embedding request failed")
+        for (key, _), vector in zip(missing, vectors):
+            cache.embeddings[key] = np.asarray(vector, dtype="float32")
+        cache.save_embeddings()
+    return np.vstack([cache.embeddings[k] for k in keys])
+
 
 # Step 4: Evaluation
-def compute_metrics(true_hospital, results, k=5):
+def compute_metrics(ranked_positions: np.ndarray, true_positions: np.ndarray,
+                    ks: List[int]) -> Dict[str, float]:
     """
-    Compute recall@k: whether the true hospital is in the top-k results.
+    Compute Recall@k and MRR over all queries at once
+
+    Args:
+        ranked_positions: Ranked corpus positions per query, shape (n_queries, max_k)
+        true_positions: Corpus position of the source hospital per query, shape (n_queries,)
+        ks: Cutoffs for Recall@k
+
+    Returns:
+        Dict[str, float]: Metric name to value
     """
-    predicted_ids = [res['hospital_id'] for res in results[:k]]
-    recall_at_k = 1.0 if true_hospital in predicted_ids else 0.0
-    return {
-        'recall@{}'.format(k): recall_at_k
-    }
-
-def evaluate_search_engine(n=50, k=3):
-    samples = fetch_review_samples(n)
-    recall_hits = 0
-    reciprocal_ranks = []
-
-    for _, row in samples.iterrows():
-        query = generate_user_query(row["summary"])
-        results = run_search(query)
-        hospital_id_gt = row["hospital_id"]
-
-        # Extract predicted hospital IDs
-        predicted_ids = [res['hospital_id'] for res in results]
-
-        # Recall@k
-        if hospital_id_gt in predicted_ids[:k]:
-            recall_hits += 1
-
-        # MRR
-        try:
-            rank = predicted_ids.index(hospital_id_gt) + 1
-            reciprocal_ranks.append(1 / rank)
-        except ValueError:
-            reciprocal_ranks.append(0.0)  # hospital not in result
-
-    recall_at_k = recall_hits / n
-    mrr = sum(reciprocal_ranks) / n
-
-    return {
-        f"Recall@{k}": recall_at_k,
-        "MRR": mrr
-    }
-
-metrics = evaluate_search_engine(n=50, k=3)
-print(metrics)
\ No newline at end of file
+    hits = ranked_positions == true_positions[:, None]
+    found = hits.any(axis=1)
+    first_hit = hits.argmax(axis=1)
+    metrics = {f"Recall@{k}": float(hits[:, :k].any(axis=1).mean()) for k in ks}
+    metrics[f"MRR@{ranked_positions.shape[1]}"] = float(np.where(found, 1.0 / (first_hit + 1), 0.0).mean())
+    return metrics
+
+
+def evaluate_search_engine(samples: int = 500, ks: List[int] = (1, 3, 10), workers: int = 8,
+                           rate: float = 5.0, seed: int = 0, cache_dir: str = None) -> Dict[str, float]:
+    load_dotenv()
+    cache = QueryCache(cache_dir or os.getenv("EVAL_CACHE_DIR", ".eval_cache"))
+    client = OpenAIClient()
+    calculator = SimilarityCalculator(openai_client=client)
+
+    corpus = fetch_review_corpus(get_database_connection())
+    index, metadata = calculator.build_index(corpus.to_dict("records"))
+    if index is None:
+        raise RuntimeError("No review embeddings found")
+    position_of = {m["hospital_id"]: i for i, m in enumerate(metadata)}
+
+    rng = np.random.default_rng(seed)
+    sample_rows = corpus.iloc[rng.permutation(len(corpus))[:samples]]
+    sample_rows = sample_rows[sample_rows["hospital_id"].astype(str).isin(position_of)]
+
+    queries = generate_queries(client, sample_rows["review"].tolist(), cache, workers, rate)
+    valid = np.array([bool(q) for q in queries])
+    queries = [q for q in queries if q]
+    true_positions = np.array([position_of[str(h)] for h in sample_rows["hospital_id"]])[valid]
+
+    query_embeddings = embed_queries(client, queries, cache)
+    _, ranked_positions = calculator.search(index, query_embeddings, top_k=max(ks))
+
+    metrics = compute_metrics(ranked_positions, true_positions, list(ks))
+    metrics["queries"] = len(queries)
+    metrics["corpus"] = len(metadata)
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate review-embedding retrieval")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--workers", type=int, default=8, help="Parallel query generation requests")
+    parser.add_argument("--rate", type=float, default=5.0, help="Query generation requests per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", help="Query/embedding cache directory (default: EVAL_CACHE_DIR or .eval_cache)")
+    args = parser.parse_args()
+
+    metrics = evaluate_search_engine(args.samples, args.k, args.workers, args.rate, args.seed, args.cache_dir)
+    print(metrics)